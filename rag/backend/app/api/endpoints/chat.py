@@ -1,26 +1,72 @@
 """Chat endpoint for RAG queries."""
 
+import asyncio
+import hashlib
 import json
-from typing import AsyncGenerator
+import logging
+import math
+from typing import TYPE_CHECKING, Any, AsyncGenerator, AsyncIterator, Callable, Optional
 
-from fastapi import APIRouter, HTTPException
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sse_starlette.sse import EventSourceResponse
-
+from starlette.background import BackgroundTask
+
+from app.api.endpoints.profiling import (
+    PROFILE_HEADER,
+    authorize_profiling,
+    collapsed_response,
+    profiling_session,
+)
+from app.core.admission import Overloaded, admission
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import get_rag_db
-from app.models.graph import Post
-from app.rag.graphrag_chain import graphrag_chain
-from app.rag.schemas import QuestionRequest, StreamToken
-
+from app.core.tracing import add_event, end_span, set_trace_attributes, start_span
+from app.models.graph import IndexStats, Post
+from app.rag.post_cache import post_cache
+from app.rag.schemas import (
+    BatchAnswer,
+    BatchQuestionRequest,
+    QuestionRequest,
+    SearchFilters,
+    StreamToken,
+)
+from app.sync.stats import STATS_ID, stats_payload
+
+if TYPE_CHECKING:
+    from app.rag.graphrag_chain import GraphRAGChain
+
+logger = logging.getLogger(__name__)
 router = APIRouter()
+status_cache = TTLCache(settings.status_cache_seconds)
+
+
+def get_chain() -> "GraphRAGChain":
+    """Get the shared GraphRAG chain.
+
+    The chain module pulls in LangGraph and the OpenAI client, so it is only
+    imported when a question is asked, keeping the other endpoints light.
+    """
+    from app.rag.graphrag_chain import get_graphrag_chain
+
+    return get_graphrag_chain()
 
 
-async def generate_stream(question: str, conversation_id: str) -> AsyncGenerator[str, None]:
+async def generate_stream(
+    question: str,
+    conversation_id: str,
+    filters: Optional[SearchFilters] = None,
+    chain: Optional["GraphRAGChain"] = None,
+) -> AsyncGenerator[str, None]:
     """Generate SSE stream for the answer.
 
     Args:
         question: The question to answer
         conversation_id: Conversation ID for tracking (not used in GraphRAG)
+        filters: Optional filters applied to retrieval
+        chain: GraphRAG chain to answer with (defaults to the shared one)
 
     Yields:
         SSE formatted events
@@ -41,16 +87,23 @@ async def generate_stream(question: str, conversation_id: str) -> AsyncGenerator
         # Run the chain asynchronously to get the full result including citations
         import asyncio
 
-        full_result_task = asyncio.create_task(graphrag_chain.ainvoke(question, stream_handler))
+        full_result_task = asyncio.create_task(
+            (chain or get_chain()).ainvoke(question, stream_handler, filters=filters)
+        )
+
+        # Stream tokens, and each citation as soon as it appears in the answer
+        async for kind, payload in stream_handler.aiter_events():
+            if kind == "citation":
+                yield json.dumps({"type": "citation", "citation": payload})
+                continue
 
-        # Stream tokens
-        async for token in stream_handler.aiter():
             token_count += 1
             logger.debug(
-                f"Received token {token_count}: " f"{token[:20] if len(token) > 20 else token}"
+                f"Received token {token_count}: "
+                f"{payload[:20] if len(payload) > 20 else payload}"
             )
             # Format as SSE event
-            event_data = StreamToken(token=token).model_dump_json()
+            event_data = StreamToken(token=payload).model_dump_json()
             yield f"{event_data}"
 
         # Wait for the full result to get citations
@@ -79,26 +132,105 @@ async def generate_stream(question: str, conversation_id: str) -> AsyncGenerator
         yield f"{error_data}"
 
 
-@router.post("/ask")
-async def ask_question(request: QuestionRequest) -> EventSourceResponse:
+async def _admit() -> Callable[[], None]:
+    """Wait for an admission slot, turning overload into a 429."""
+    try:
+        return await admission.acquire()
+    except Overloaded as e:
+        logger.warning(f"Rejecting question: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many questions in progress, please retry shortly",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+
+async def _traced_stream(stream: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Record the response stream as a span with one event per flushed chunk."""
+    stream_span = start_span("sse.stream")
+    flushes = 0
+    try:
+        async for chunk in stream:
+            yield chunk
+            # Resumed once the server has sent the chunk
+            flushes += 1
+            add_event(stream_span, "flush")
+    finally:
+        if stream_span is not None:
+            stream_span.attributes["flushes"] = flushes
+        end_span(stream_span)
+
+
+async def _release_after(
+    stream: AsyncIterator[str], release: Callable[[], None]
+) -> AsyncGenerator[str, None]:
+    """Hold an admission slot until the response stream ends."""
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        release()
+
+
+async def _profiled_answer(
+    request: QuestionRequest, conversation_id: str, chain: "GraphRAGChain"
+) -> Response:
+    """Answer a question under the sampling profiler and return the profile."""
+    release = await _admit()
+    try:
+        with profiling_session() as profiler:
+            async for _ in generate_stream(
+                request.question, conversation_id, request.filters, chain
+            ):
+                pass
+    finally:
+        release()
+    return collapsed_response(profiler, "ask")
+
+
+@router.post("/ask", response_model=None)
+async def ask_question(
+    request: QuestionRequest,
+    chain: "GraphRAGChain" = Depends(get_chain),
+    profile_token: Optional[str] = Header(None, alias=PROFILE_HEADER, include_in_schema=False),
+) -> EventSourceResponse | Response:
     """Ask a question about the bulletin board content.
 
-    This endpoint streams the answer using Server-Sent Events (SSE).
+    This endpoint streams the answer using Server-Sent Events (SSE). With an
+    admin ``X-Profile-Token`` header the answer is generated to completion
+    under the sampling profiler and a collapsed-stack file is returned
+    instead of the stream.
 
     Args:
-        request: Question request with question text and optional conversation ID
+        request: Question request with question text, optional conversation ID and filters
+        chain: GraphRAG chain to answer with
+        profile_token: Admin profiling token, requesting a profile of this question
 
     Returns:
-        EventSourceResponse streaming the answer tokens
+        EventSourceResponse streaming the answer tokens, or the profile
     """
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
     # Use provided conversation_id or generate a default one
     conversation_id = request.conversation_id or "default"
+    set_trace_attributes(conversation_id=conversation_id)
 
+    if profile_token is not None:
+        authorize_profiling(profile_token)
+        return await _profiled_answer(request, conversation_id, chain)
+
+    # The slot is held until the stream ends; the background task covers
+    # clients that disconnect before the stream starts
+    release = await _admit()
     return EventSourceResponse(
-        generate_stream(request.question, conversation_id),
+        _release_after(
+            _traced_stream(
+                generate_stream(request.question, conversation_id, request.filters, chain)
+            ),
+            release,
+        ),
+        background=BackgroundTask(release),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -108,37 +240,165 @@ async def ask_question(request: QuestionRequest) -> EventSourceResponse:
     )
 
 
-@router.get("/status")
-async def get_index_status() -> dict:
-    """Get the current index status."""
+def _batch_answer(index: int, question: str, result: dict[str, Any]) -> BatchAnswer:
+    if "error" in result:
+        return BatchAnswer(index=index, question=question, error=result["error"])
+    return BatchAnswer(
+        index=index,
+        question=question,
+        answer=result["answer"],
+        citations=result["citations"],
+        stats=result["stats"],
+    )
+
+
+@router.post("/ask/batch", response_model=None)
+async def ask_batch(
+    request: BatchQuestionRequest, chain: "GraphRAGChain" = Depends(get_chain)
+) -> dict[str, Any] | StreamingResponse:
+    """Answer many questions without streaming tokens.
+
+    Questions are embedded in one call and answered with bounded concurrency.
+    With ``format=ndjson`` each answer is written as one JSON line as soon as
+    it completes; otherwise all answers are returned in request order.
+
+    Args:
+        request: Questions, optional filters and the response format
+        chain: GraphRAG chain to answer with
+
+    Returns:
+        JSON with the answers, or an NDJSON stream of answers
+    """
+    questions = [q.strip() for q in request.questions]
+    if not all(questions):
+        raise HTTPException(status_code=400, detail="Questions cannot be empty")
+    if len(questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_questions} questions per batch",
+        )
+
+    # A batch takes one admission slot; its questions share the stage limits
+    release = await _admit()
+    answers = chain.abatch(
+        questions, request.filters, max_concurrency=settings.batch_max_concurrency
+    )
+
+    if request.format == "ndjson":
+
+        async def lines() -> AsyncGenerator[str, None]:
+            async for index, result in answers:
+                yield _batch_answer(index, questions[index], result).model_dump_json() + "\n"
+
+        return StreamingResponse(
+            _release_after(_traced_stream(lines()), release),
+            background=BackgroundTask(release),
+            media_type="application/x-ndjson",
+        )
+
     try:
-        with get_rag_db() as session:
-            # Get total posts count
-            total_posts = session.query(func.count(Post.post_id)).scalar() or 0
+        results = [
+            _batch_answer(index, questions[index], result) async for index, result in answers
+        ]
+    finally:
+        release()
+    results.sort(key=lambda answer: answer.index)
+    return {"answers": [answer.model_dump() for answer in results]}
 
-            # Get min and max post numbers
-            min_max = session.query(
-                func.min(Post.source_post_no), func.max(Post.source_post_no)
-            ).first()
 
-            min_post_no = min_max[0] if min_max[0] is not None else 0
-            max_post_no = min_max[1] if min_max[1] is not None else 0
+def _lookup_posts(nos: list[int]) -> dict[str, Any]:
+    with get_rag_db() as session:
+        records = post_cache.get_many(session, nos)
+    return {
+        "posts": [records[no].to_dict() for no in nos if no in records],
+        "missing": [no for no in nos if no not in records],
+    }
+
+
+@router.get("/posts")
+async def get_posts(
+    nos: str = Query(..., description="Comma-separated post numbers, e.g. 12,15,20")
+) -> dict[str, Any]:
+    """Get full posts by post number.
+
+    Hot posts are served from the in-process post cache; the rest are read
+    in one query.
+
+    Args:
+        nos: Comma-separated post numbers
+
+    Returns:
+        The posts found, in request order, and the numbers that do not exist
+    """
+    try:
+        numbers = list(dict.fromkeys(int(no) for no in nos.split(",") if no.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="nos must be comma-separated integers")
+    if not numbers:
+        raise HTTPException(status_code=400, detail="No post numbers given")
+    if len(numbers) > settings.posts_max_lookup:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.posts_max_lookup} posts per request"
+        )
+
+    return await asyncio.to_thread(_lookup_posts, numbers)
 
-            # Get last sync timestamp
-            last_sync = session.query(func.max(Post.created_at)).scalar()
 
-            return {
-                "status": "ok",
+def _vector_count() -> Optional[int]:
+    try:
+        count: int = get_chain()._get_vectorstore()._collection.count()
+        return count
+    except Exception as e:
+        logger.warning(f"Could not count Chroma vectors: {e}")
+        return None
+
+
+def _index_status() -> dict[str, Any]:
+    """Build the status payload from the precomputed stats row."""
+    with get_rag_db() as session:
+        stats = session.get(IndexStats, STATS_ID)
+        if stats is not None:
+            payload = stats_payload(stats)
+        else:
+            # Sync has not run since the stats table was added
+            total_posts = session.query(func.count(Post.post_id)).scalar() or 0
+            # An aggregate query always returns exactly one row
+            min_no, max_no = session.execute(
+                select(func.min(Post.source_post_no), func.max(Post.source_post_no))
+            ).one()
+            last_sync = session.query(func.max(Post.created_at)).scalar()
+            payload = {
                 "index": {
                     "total_posts": total_posts,
-                    "min_post_no": min_post_no,
-                    "max_post_no": max_post_no,
+                    "min_post_no": min_no or 0,
+                    "max_post_no": max_no or 0,
                     "last_sync": last_sync.isoformat() if last_sync else None,
                 },
+                "sync": None,
             }
-    except Exception as e:
-        import logging
 
-        logger = logging.getLogger(__name__)
+    return {"status": "ok", **payload, "vectors": {"count": _vector_count()}}
+
+
+@router.get("/status")
+async def get_index_status(request: Request) -> Response:
+    """Get the current index status.
+
+    Served from precomputed stats and cached briefly in process; clients
+    revalidating with ``If-None-Match`` get 304 while nothing changed.
+    """
+    try:
+        body = await asyncio.to_thread(status_cache.get_or_set, "status", _index_status)
+    except Exception as e:
         logger.error(f"Error getting index status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+    content = json.dumps(body, ensure_ascii=False, sort_keys=True)
+    etag = f'"{hashlib.sha1(content.encode("utf-8")).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"max-age={int(settings.status_cache_seconds)}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,70 @@
+"""Prometheus metrics endpoint."""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Response
+
+from app.api.endpoints.chat import _index_status, status_cache
+from app.core.config import settings
+from app.core.database import pool_status
+from app.core.metrics import (
+    DB_POOL_CONNECTIONS,
+    INDEX_POSTS,
+    INDEX_VECTORS,
+    REGISTRY,
+    SYNC_LAG_POSTS,
+    SYNC_LAST_BATCH_POSTS,
+    SYNC_LAST_BATCH_SECONDS,
+    SYNC_LAST_SUCCESS,
+    SYNC_THROUGHPUT,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_gauges() -> None:
+    """Refresh the gauges that are read from shared state at scrape time.
+
+    The sync pipeline runs in its own process, so its lag and throughput are
+    read from the index stats row (through the /status cache) rather than
+    from counters in this process.
+    """
+    for database, counts in pool_status().items():
+        for state, value in counts.items():
+            DB_POOL_CONNECTIONS.set(value, database=database, state=state)
+
+    status = status_cache.get_or_set("status", _index_status)
+    INDEX_POSTS.set(status["index"]["total_posts"])
+    if status["vectors"]["count"] is not None:
+        INDEX_VECTORS.set(status["vectors"]["count"])
+
+    sync = status.get("sync")
+    if not sync:
+        return
+    if sync["lag_posts"] is not None:
+        SYNC_LAG_POSTS.set(sync["lag_posts"])
+    SYNC_LAST_BATCH_POSTS.set(sync["last_batch_size"])
+    SYNC_LAST_BATCH_SECONDS.set(sync["last_batch_duration_ms"] / 1000)
+    if sync["last_batch_duration_ms"]:
+        SYNC_THROUGHPUT.set(sync["last_batch_size"] / (sync["last_batch_duration_ms"] / 1000))
+    if status["index"]["last_sync"]:
+        SYNC_LAST_SUCCESS.set(datetime.fromisoformat(status["index"]["last_sync"]).timestamp())
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Expose all metrics in the Prometheus text format."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    try:
+        await asyncio.to_thread(collect_gauges)
+    except Exception as e:
+        # Still serve the in-process metrics when the database is unreachable
+        logger.warning(f"Could not refresh gauges: {e}")
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,85 @@
+"""Admin endpoint for on-demand sampling profiles of a live worker."""
+
+import asyncio
+import hmac
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+
+from app.core.config import settings
+from app.core.profiling import ProfilerBusy, SamplingProfiler, sampling_profile
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+PROFILE_HEADER = "X-Profile-Token"
+
+
+def authorize_profiling(token: Optional[str]) -> None:
+    """Check the admin token sent with a profiling request.
+
+    Raises:
+        HTTPException: 404 while profiling is disabled, 403 for a wrong token
+    """
+    expected = settings.profiling_token.get_secret_value()
+    if not expected:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not hmac.compare_digest((token or "").encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@contextmanager
+def profiling_session() -> Iterator[SamplingProfiler]:
+    """Profile the enclosed block with the configured interval.
+
+    Raises:
+        HTTPException: 409 while another profile is running
+    """
+    try:
+        with sampling_profile(settings.profiling_interval, settings.profiling_max_seconds) as p:
+            yield p
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def collapsed_response(profiler: SamplingProfiler, name: str) -> Response:
+    """Return the samples as a collapsed-stack file for flamegraph.pl or speedscope."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    logger.info(f"Profile {name} took {profiler.sample_count} samples in {profiler.duration:.2f}s")
+    return Response(
+        content=profiler.collapsed(),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}-{stamp}.collapsed"',
+            "X-Profile-Samples": str(profiler.sample_count),
+        },
+    )
+
+
+@router.post("/debug/profile", include_in_schema=False)
+async def profile_window(
+    seconds: float = Query(10.0, gt=0, description="How long to sample the worker"),
+    token: Optional[str] = Header(None, alias=PROFILE_HEADER),
+) -> Response:
+    """Sample every thread of this worker for a time window.
+
+    Args:
+        seconds: Length of the window, at most ``profiling_max_seconds``
+        token: Admin profiling token
+
+    Returns:
+        The samples as a collapsed-stack file
+    """
+    authorize_profiling(token)
+    if seconds > settings.profiling_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.profiling_max_seconds} seconds per profile",
+        )
+
+    with profiling_session() as profiler:
+        await asyncio.sleep(seconds)
+    return collapsed_response(profiler, "window")
@@ -0,0 +1,186 @@
+"""Admission control and per-stage concurrency limits for the RAG pipeline."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Mapping, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+    STAGE_IN_FLIGHT,
+    STAGE_WAIT_SECONDS,
+)
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        """Initialize the error.
+
+        Args:
+            reason: Why the request was rejected ("queue_full" or "queue_timeout")
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__(f"Server overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bound the number of requests running and waiting to run.
+
+    Up to ``max_in_flight`` requests run at once and up to ``max_queue``
+    more wait for a slot. Anything beyond that, or a request that waits
+    longer than ``queue_timeout``, is rejected immediately so overload
+    turns into fast 429s instead of exhausted pools and provider errors.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: float = 1.0,
+    ):
+        """Initialize the controller.
+
+        Args:
+            max_in_flight: Requests allowed to run concurrently
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before being rejected
+            retry_after: Retry-After hint given to rejected clients
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.waiting = 0
+
+    def _reject(self, reason: str) -> Overloaded:
+        ADMISSION_REJECTED.inc(reason=reason)
+        return Overloaded(reason, self.retry_after)
+
+    async def acquire(self) -> Callable[[], None]:
+        """Wait for a slot.
+
+        Returns:
+            An idempotent function that releases the slot
+
+        Raises:
+            Overloaded: If the queue is full or the wait times out
+        """
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            raise self._reject("queue_full")
+
+        self.waiting += 1
+        ADMISSION_QUEUE_DEPTH.inc()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("queue_timeout")
+        finally:
+            self.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.dec()
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started)
+        ADMISSION_IN_FLIGHT.inc()
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._slots.release()
+                ADMISSION_IN_FLIGHT.dec()
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        release = await self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+
+class StageLimiter:
+    """Per-stage semaphores bounding calls to shared downstream resources."""
+
+    def __init__(self, limits: Mapping[str, int]):
+        """Initialize the limiter.
+
+        Args:
+            limits: Maximum concurrent calls per stage name
+        """
+        self._semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in limits.items()}
+
+    async def acquire(self, stage: str) -> Callable[[], None]:
+        """Wait for a slot of the stage.
+
+        Returns:
+            An idempotent function that releases the slot
+        """
+        semaphore = self._semaphores[stage]
+        started = time.perf_counter()
+        await semaphore.acquire()
+        STAGE_WAIT_SECONDS.inc(time.perf_counter() - started, stage=stage)
+        STAGE_IN_FLIGHT.inc(stage=stage)
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+                STAGE_IN_FLIGHT.dec(stage=stage)
+
+        return release
+
+    @asynccontextmanager
+    async def limit(self, stage: str) -> AsyncIterator[None]:
+        """Run the block once a slot of the stage is free."""
+        release = await self.acquire(stage)
+        try:
+            yield
+        finally:
+            release()
+
+    async def to_thread(self, stage: str, function: Callable[..., T], *args: Any) -> T:
+        """Run blocking work in a thread once a slot of the stage is free.
+
+        A thread cannot be interrupted, so when the caller is cancelled (e.g.
+        by a timeout) the slot stays held until the thread returns and stops
+        using the resource, such as a pooled DB connection.
+        """
+        release = await self.acquire(stage)
+        thread = asyncio.ensure_future(asyncio.to_thread(function, *args))
+        thread.add_done_callback(lambda _: release())
+        return await asyncio.shield(thread)
+
+
+admission = AdmissionController(
+    settings.admission_max_in_flight,
+    settings.admission_max_queue,
+    settings.admission_queue_timeout,
+    settings.admission_retry_after,
+)
+
+stages = StageLimiter(
+    {
+        "embedding": settings.embedding_concurrency,
+        "db": settings.db_concurrency,
+        "llm": settings.llm_concurrency,
+    }
+)
@@ -0,0 +1,43 @@
+"""Small in-process caches for cheap, frequently polled responses."""
+
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """Cache values for a fixed number of seconds.
+
+    Concurrent callers that miss the same key share a single computation.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds a cached value stays fresh (0 disables caching)
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() < entry[0]:
+                return entry[1]
+            value = compute()
+            if self.ttl > 0:
+                self._entries[key] = (self._clock() + self.ttl, value)
+            return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop one key, or every key when none is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
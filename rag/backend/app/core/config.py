@@ -41,6 +41,36 @@ class Settings(BaseSettings):
     # Backend server settings
     backend_host: str = "0.0.0.0"
     backend_port: int = 8000
+    warm_up_on_startup: bool = True  # Build the chain in the background after startup
+    metrics_enabled: bool = True  # Record metrics and serve them at /metrics
+
+    # Request tracing
+    tracing_enabled: bool = True  # Record spans for each request
+    tracing_exporter: str = "none"  # "jsonl" (local file) or "none"
+    tracing_file: str = "traces.jsonl"
+    tracing_sample_rate: float = 0.01  # Fraction of traces exported regardless of duration
+    tracing_slow_seconds: float = 10.0  # Requests at least this slow are always exported
+    status_cache_seconds: float = 5.0  # How long /status responses are reused
+
+    # On-demand sampling profiler (disabled while no token is set)
+    profiling_token: SecretStr = SecretStr("")  # Admin token sent as X-Profile-Token
+    profiling_interval: float = 0.005  # Seconds between stack samples
+    profiling_max_seconds: float = 60.0  # Longest profile, also bounding a profiled /ask
+
+    # Outbound HTTP connection pool shared by the OpenAI clients
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    http_timeout: float = 60.0
+
+    # Admission control and per-stage concurrency
+    admission_max_in_flight: int = 16  # Questions answered at once per worker
+    admission_max_queue: int = 32  # Questions waiting for a slot before 429s
+    admission_queue_timeout: float = 10.0  # Seconds a question may wait for a slot
+    admission_retry_after: float = 2.0  # Retry-After sent with 429 responses
+    embedding_concurrency: int = 8  # Concurrent embedding API calls
+    db_concurrency: int = 10  # Concurrent DB stages, below the pool's 5 + 10 overflow
+    llm_concurrency: int = 8  # Concurrent LLM generations
 
     # Model settings
     embedding_model: str = "text-embedding-3-small"
@@ -52,10 +82,50 @@ class Settings(BaseSettings):
     window_size: int = 50
     window_overlap: int = 20
     child_chunk_size: int = 400
+    docstore_backend: str = "sqlite"  # "sqlite" (single compressed file) or "file"
     search_k: int = 5
 
-    # Citation extraction model
-    citation_model: str = "gpt-3.5-turbo"
+    # Post lookup settings
+    post_cache_size: int = 10000  # Rendered posts kept in memory
+    post_cache_ttl_seconds: float = 300.0  # Cached posts are re-read after this long
+    posts_max_lookup: int = 100  # Largest number of posts per /posts request
+
+    # Batch question settings
+    batch_max_questions: int = 200  # Largest batch accepted by /ask/batch
+    batch_max_concurrency: int = 4  # Questions of one batch answered at once
+
+    # Micro-window chunking settings
+    index_chunking: str = "post"  # "post" (one vector per post), "micro" or "window" (sliding)
+    micro_window_max_tokens: int = 256
+    micro_window_max_posts: int = 20
+    micro_window_max_gap_seconds: float = 1800.0  # Silence that starts a new window
+    micro_window_topic_threshold: float = 0.3  # Post-to-window similarity below which to split
+
+    # Near-duplicate detection settings
+    dedup_enabled: bool = True  # Cluster copypasta so only representatives are embedded
+    dedup_max_distance: int = 3  # SimHash bits two near-duplicates may differ in
+
+    # Retrieval branch settings
+    retrieval_branch_timeout: float = 3.0  # Seconds before a slow branch is dropped
+    rrf_k: int = 60  # Reciprocal-rank fusion damping constant
+    fusion_max_seeds: int = 10  # Fused posts handed to graph traversal
+    lexical_bigram_index: bool = False  # posts.content has a pg_bigm index (add-bigram-index)
+    lexical_short_term_scan_posts: int = 50000  # Newest posts scanned for 2-character terms
+
+    # Temporal routing settings
+    board_timezone: str = "Asia/Tokyo"  # Time zone of relative expressions like 昨日
+    temporal_candidate_limit: int = 200  # Newest posts in range considered for reranking
+    temporal_rerank: bool = True  # Rerank in-range posts by similarity to the question
+
+    # Graph traversal settings
+    graph_index_enabled: bool = False  # Walk an in-process CSR index instead of SQL
+    graph_index_refresh_seconds: float = 60.0
+    sequential_edge_mode: str = "materialized"  # "materialized" or "implicit"
+    sequential_window: int = 20  # Following posts linked by IS_SEQUENTIAL_TO
+    expansion_decay: float = 0.5  # Score multiplier per hop from a vector hit
+    context_token_budget: int = 6000  # Tokens of posts placed in the LLM context
+    prune_top_n: int = 15  # Expanded posts kept by query similarity (0 = no pruning)
+    prune_neighbor_window: int = 1  # Sequential neighbours kept around each top post
 
 
 settings = Settings()
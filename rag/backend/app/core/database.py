@@ -1,26 +1,60 @@
 """Database connection management."""
 
 from contextlib import contextmanager
-from typing import Generator
+from functools import lru_cache
+from typing import Generator, Protocol, cast
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 from app.core.config import settings
+from app.core.tracing import instrument_engine
 
-# Engine for source database (read-only)
-source_engine = create_engine(settings.database_url, pool_pre_ping=True)
-SourceSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=source_engine)
 
-# Engine for RAG database
-rag_engine = create_engine(settings.rag_database_url, pool_pre_ping=True)
-RagSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=rag_engine)
+class _PoolCounters(Protocol):
+    """Connection counters of a QueuePool, which the SQLAlchemy stubs leave untyped."""
+
+    def size(self) -> int: ...
+
+    def checkedout(self) -> int: ...
+
+    def checkedin(self) -> int: ...
+
+    def overflow(self) -> int: ...
+
+
+@lru_cache(maxsize=1)
+def get_source_engine() -> Engine:
+    """Get the engine for the source database (read-only), creating it on first use."""
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
+    instrument_engine(engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_rag_engine() -> Engine:
+    """Get the engine for the RAG database, creating it on first use."""
+    engine = create_engine(settings.rag_database_url, pool_pre_ping=True)
+    instrument_engine(engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def _source_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_source_engine())
+
+
+@lru_cache(maxsize=1)
+def _rag_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_rag_engine())
 
 
 @contextmanager
 def get_source_db() -> Generator[Session, None, None]:
     """Get source database session (read-only)."""
-    db = SourceSessionLocal()
+    db = _source_sessionmaker()()
     try:
         yield db
     finally:
@@ -30,16 +64,67 @@ def get_source_db() -> Generator[Session, None, None]:
 @contextmanager
 def get_rag_db() -> Generator[Session, None, None]:
     """Get RAG database session."""
-    db = RagSessionLocal()
+    db = _rag_sessionmaker()()
     try:
         yield db
     finally:
         db.close()
 
 
+def set_statement_timeout(session: Session, seconds: float) -> None:
+    """Make PostgreSQL cancel statements of the current transaction after ``seconds``."""
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": f"{int(seconds * 1000)}ms"},
+        )
+
+
+@contextmanager
+def get_rag_autocommit_connection() -> Generator[Connection, None, None]:
+    """Get a RAG database connection that runs each statement outside a transaction.
+
+    For statements such as CREATE INDEX CONCURRENTLY and VACUUM, which cannot
+    run inside a transaction block.
+    """
+    engine = create_engine(
+        settings.rag_database_url, isolation_level="AUTOCOMMIT", poolclass=NullPool
+    )
+    try:
+        with engine.connect() as conn:
+            yield conn
+    finally:
+        engine.dispose()
+
+
+def pool_status() -> dict[str, dict[str, int]]:
+    """Return connection counts of each created engine's pool, keyed by database."""
+    status = {}
+    for database, get_engine in (("source", get_source_engine), ("rag", get_rag_engine)):
+        if not get_engine.cache_info().currsize:
+            continue
+        pool = get_engine().pool
+        if isinstance(pool, QueuePool):
+            counters = cast(_PoolCounters, pool)
+            status[database] = {
+                "size": counters.size(),
+                "checked_out": counters.checkedout(),
+                "idle": counters.checkedin(),
+                "overflow": max(counters.overflow(), 0),
+            }
+    return status
+
+
+def dispose_engines() -> None:
+    """Close the pooled connections of any engine that was created."""
+    for get_engine in (get_source_engine, get_rag_engine):
+        if get_engine.cache_info().currsize:
+            get_engine().dispose()
+
+
 def init_rag_db() -> None:
     """Initialize RAG database tables."""
     from app.models.base import Base
-    from app.models.graph import Post, Relationship  # noqa: F401
+    from app.models.graph import IndexStats, Post, Relationship  # noqa: F401
 
-    Base.metadata.create_all(bind=rag_engine)
+    Base.metadata.create_all(bind=get_rag_engine())
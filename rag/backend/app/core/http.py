@@ -0,0 +1,37 @@
+"""Shared HTTP connection pools for outbound API clients."""
+
+from functools import lru_cache
+
+import httpx
+
+from app.core.config import settings
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Get the process-wide synchronous HTTP client."""
+    return httpx.Client(limits=_limits(), timeout=settings.http_timeout)
+
+
+@lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the process-wide asynchronous HTTP client."""
+    return httpx.AsyncClient(limits=_limits(), timeout=settings.http_timeout)
+
+
+async def close_http_clients() -> None:
+    """Close the shared clients and drop them so they are recreated on next use."""
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+        get_async_http_client.cache_clear()
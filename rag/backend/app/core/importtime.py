@@ -0,0 +1,66 @@
+"""Measurement of module import cost with ``python -X importtime``."""
+
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class ImportProfile:
+    """Import cost of one target module in a fresh interpreter."""
+
+    target: str
+    total_us: int = 0  # Sum of the self times of every imported module
+    cumulative_us: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_ms(self) -> float:
+        """Total import time in milliseconds."""
+        return self.total_us / 1000
+
+    def loaded(self, package: str) -> bool:
+        """Whether the package or any of its submodules was imported."""
+        return any(name == package or name.startswith(package + ".") for name in self.cumulative_us)
+
+    def slowest(self, n: int = 10) -> list[tuple[str, int]]:
+        """Return the n modules with the largest cumulative import time."""
+        return sorted(self.cumulative_us.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+def measure_import(target: str, cwd: Optional[Path] = None) -> ImportProfile:
+    """Import a module in a fresh interpreter and parse its ``-X importtime`` report.
+
+    Args:
+        target: Dotted module name, e.g. ``app.main`` or ``scripts.sync_data``
+        cwd: Directory the interpreter runs in (defaults to the backend root)
+
+    Returns:
+        The import profile
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=cwd or BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+
+    profile = ImportProfile(target)
+    for line in result.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        profile.total_us += int(self_us)
+        profile.cumulative_us[name.strip()] = int(cumulative_us)
+    return profile
@@ -0,0 +1,362 @@
+"""In-process metrics registry with Prometheus text exposition."""
+
+import bisect
+import functools
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Upper bounds for token-count histograms
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+# Upper bounds in seconds for queueing-delay histograms
+WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Upper bounds in seconds for stage-latency histograms
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Upper bounds for per-request result counts
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Registry:
+    """Collection of metrics rendered together, with a global on/off switch.
+
+    When disabled, every update is a no-op and :func:`time_async` returns the
+    wrapped function itself, so instrumentation costs nothing on the hot path.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """Initialize the registry.
+
+        Args:
+            enabled: Whether metric updates are recorded
+        """
+        self.enabled = enabled
+        self._metrics: dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        """Add a metric, replacing any earlier metric of the same name."""
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(enabled=settings.metrics_enabled)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Named metric keyed by label values."""
+
+    type_name = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def render(self) -> list[str]:
+        """Render the metric's samples in the Prometheus text format."""
+        raise NotImplementedError
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed bucket upper bounds."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        """Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text for the metric
+            buckets: Sorted bucket upper bounds (+Inf is implied)
+            labelnames: Names of the labels each observation is keyed by
+            registry: Registry the metric is rendered with
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation."""
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def snapshot(self, **labels: Any) -> dict[str, float]:
+        """Return the observation count and sum for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            return {"count": sum(self._counts.get(key, ())), "sum": self._sums.get(key, 0.0)}
+
+    def render(self) -> list[str]:
+        """Render buckets, sum and count per label combination."""
+        lines = self._header()
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class _Value(_Metric):
+    """Metric holding one number per label combination."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        """Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text for the metric
+            labelnames: Names of the labels each value is keyed by
+            registry: Registry the metric is rendered with
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increment the value for the given label values."""
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> dict[tuple[str, ...], float]:
+        """Return the current value per label combination."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        """Render the value per label combination."""
+        lines = self._header()
+        for key, value in self.snapshot().items():
+            lines.append(f"{self.name}{self._labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Value):
+    """Monotonic counter, optionally split by label values."""
+
+    type_name = "counter"
+
+
+class Gauge(_Value):
+    """Value that can go up and down, optionally split by label values."""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Decrease the gauge for the given label values."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the gauge for the given label values."""
+        if not self._registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+def time_async(
+    histogram: Histogram, function: Callable[..., Awaitable[T]], **labels: Any
+) -> Callable[..., Awaitable[T]]:
+    """Wrap an async function so the duration of each call is observed.
+
+    Returns ``function`` unchanged when metrics are disabled.
+    """
+    if not histogram._registry.enabled:
+        return function
+
+    @functools.wraps(function)
+    async def timed(*args: Any, **kwargs: Any) -> T:
+        started = time.perf_counter()
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, **labels)
+
+    return timed
+
+
+PROMPT_TOKENS = Histogram(
+    "rag_prompt_tokens",
+    "Tokens in the prompt sent to the LLM per request",
+    TOKEN_BUCKETS,
+)
+
+QUERY_PATHS = Counter(
+    "rag_query_path_total",
+    "Questions by retrieval path chosen by the query analyzer",
+    ("path",),
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "rag_admission_queue_depth",
+    "Requests waiting for an admission slot",
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "rag_admission_in_flight",
+    "Requests holding an admission slot",
+)
+
+ADMISSION_WAIT_SECONDS = Histogram(
+    "rag_admission_wait_seconds",
+    "Time admitted requests waited in the admission queue",
+    WAIT_BUCKETS,
+)
+
+ADMISSION_REJECTED = Counter(
+    "rag_admission_rejected_total",
+    "Requests rejected by admission control",
+    ("reason",),
+)
+
+STAGE_IN_FLIGHT = Gauge(
+    "rag_stage_in_flight",
+    "Calls currently running per pipeline stage",
+    ("stage",),
+)
+
+STAGE_WAIT_SECONDS = Counter(
+    "rag_stage_wait_seconds_total",
+    "Total time calls waited for a pipeline stage slot",
+    ("stage",),
+)
+
+NODE_SECONDS = Histogram(
+    "rag_node_duration_seconds",
+    "Duration of each GraphRAG workflow node",
+    LATENCY_BUCKETS,
+    ("node",),
+)
+
+TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from sending the prompt to the first streamed answer token",
+    LATENCY_BUCKETS,
+)
+
+STREAMED_TOKENS = Histogram(
+    "rag_streamed_tokens",
+    "Answer tokens streamed per request",
+    TOKEN_BUCKETS,
+)
+
+BRANCH_HITS = Histogram(
+    "rag_branch_hits",
+    "Posts found per request by each retrieval branch",
+    COUNT_BUCKETS,
+    ("branch",),
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "rag_db_pool_connections",
+    "Connections of each database pool by state",
+    ("database", "state"),
+)
+
+INDEX_POSTS = Gauge(
+    "rag_index_posts",
+    "Posts in the RAG database",
+)
+
+INDEX_VECTORS = Gauge(
+    "rag_index_vectors",
+    "Vectors in the Chroma collection",
+)
+
+SYNC_LAG_POSTS = Gauge(
+    "rag_sync_lag_posts",
+    "Posts in the source database not yet synced",
+)
+
+SYNC_LAST_BATCH_POSTS = Gauge(
+    "rag_sync_last_batch_posts",
+    "Posts synced by the last non-empty sync batch",
+)
+
+SYNC_LAST_BATCH_SECONDS = Gauge(
+    "rag_sync_last_batch_duration_seconds",
+    "Duration of the last non-empty sync batch",
+)
+
+SYNC_THROUGHPUT = Gauge(
+    "rag_sync_throughput_posts_per_second",
+    "Posts per second of the last non-empty sync batch",
+)
+
+SYNC_LAST_SUCCESS = Gauge(
+    "rag_sync_last_success_timestamp_seconds",
+    "Unix time of the last sync batch that added posts",
+)
@@ -0,0 +1,133 @@
+"""On-demand sampling profiler producing flamegraph collapsed stacks."""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import CodeType, FrameType
+from typing import Iterator, Optional
+
+# Leaf frames of threads that are blocked waiting for work, not burning CPU
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+}
+
+_session_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+class SamplingProfiler:
+    """Sample the Python stacks of every thread from a background thread.
+
+    Nothing is installed in the interpreter: a sampler thread reads
+    ``sys._current_frames()`` every ``interval`` seconds, so the profiled
+    code runs unmodified and nothing runs at all outside a profile. Samples
+    cover the whole worker, including concurrent requests.
+    """
+
+    def __init__(self, interval: float = 0.005, max_seconds: float = 60.0, skip_idle: bool = True):
+        """Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            max_seconds: Sampling stops after this long even if not stopped
+            skip_idle: Drop samples of threads blocked waiting for work
+        """
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.skip_idle = skip_idle
+        self.samples: Counter[str] = Counter()
+        self.sample_count = 0
+        self.duration = 0.0
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Render the samples as collapsed stacks, one ``frame;...;frame count`` per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        started = time.monotonic()
+        deadline = started + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._collapse(frame)
+                if stack:
+                    self.samples[f"{names.get(ident, ident)};{stack}"] += 1
+            self.sample_count += 1
+        self.duration = time.monotonic() - started
+
+    def _collapse(self, leaf: FrameType) -> str:
+        code = leaf.f_code
+        if self.skip_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return ""
+        labels = []
+        frame: Optional[FrameType] = leaf
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            # Semicolons separate frames in the collapsed format
+            label = self._labels[code] = label.replace(";", ":")
+        return label
+
+
+def _short_path(filename: str) -> str:
+    """Strip the longest ``sys.path`` entry, leaving e.g. ``app/rag/llm.py``."""
+    for entry in sorted((p for p in sys.path if p), key=len, reverse=True):
+        prefix = os.path.join(os.path.abspath(entry), "")
+        if filename.startswith(prefix):
+            return filename[len(prefix) :]
+    return filename
+
+
+@contextmanager
+def sampling_profile(
+    interval: float = 0.005, max_seconds: float = 60.0
+) -> Iterator[SamplingProfiler]:
+    """Sample all threads while the enclosed block runs.
+
+    Only one profile runs per worker at a time, so concurrent admin requests
+    do not stack samplers on an already busy process.
+
+    Raises:
+        ProfilerBusy: If another profile is running
+    """
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    profiler = SamplingProfiler(interval=interval, max_seconds=max_seconds)
+    try:
+        profiler.start()
+        yield profiler
+    finally:
+        profiler.stop()
+        _session_lock.release()
@@ -0,0 +1,431 @@
+"""Request-scoped span tracing with pluggable exporters."""
+
+import functools
+import json
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, Optional, Protocol, TypeVar
+from uuid import uuid4
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Events kept per span, bounding traces of long token streams
+MAX_SPAN_EVENTS = 1000
+# Characters allowed in a Server-Timing metric name (an HTTP token)
+SERVER_TIMING_INVALID = re.compile(r"[^!#$%&'*+\-.^_`|~0-9A-Za-z]")
+
+
+@dataclass
+class Span:
+    """One timed operation inside a trace."""
+
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ms: float  # Offset from the start of the trace
+    duration_ms: Optional[float] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    events: list[tuple[float, str]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the span for an exporter."""
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round(self.start_ms, 3),
+            "duration_ms": None if self.duration_ms is None else round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "events": [{"offset_ms": round(t, 3), "name": n} for t, n in self.events],
+        }
+
+
+@dataclass
+class Trace:
+    """All spans recorded while handling one request."""
+
+    trace_id: str
+    started_at: datetime
+    attributes: dict[str, Any] = field(default_factory=dict)
+    spans: list[Span] = field(default_factory=list)
+    force: bool = False
+    duration_ms: Optional[float] = None
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the trace started."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the trace for an exporter."""
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": None if self.duration_ms is None else round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+
+class Exporter(Protocol):
+    """Destination for finished, sampled traces."""
+
+    def export(self, trace: Trace) -> None:
+        """Write one trace."""
+
+    def flush(self) -> None:
+        """Wait until every exported trace is written."""
+
+
+class NullExporter:
+    """Exporter that drops every trace."""
+
+    def export(self, trace: Trace) -> None:
+        """Drop the trace."""
+
+    def flush(self) -> None:
+        """Nothing is ever pending."""
+
+
+class JsonLinesExporter:
+    """Append each trace as one JSON line to a local file for offline analysis.
+
+    Traces are serialized and written by a background thread, so exporting
+    never blocks the event loop on disk I/O. While ``max_pending`` traces
+    are waiting to be written, further traces are dropped.
+    """
+
+    def __init__(self, path: str | Path, max_pending: int = 1000):
+        """Initialize the exporter.
+
+        Args:
+            path: File the traces are appended to, created if missing
+            max_pending: Traces allowed to wait for the writer thread
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._pending: queue.Queue[Trace] = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        """Queue the trace for the writer thread."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write, name="trace-exporter", daemon=True
+                )
+                self._writer.start()
+        try:
+            self._pending.put_nowait(trace)
+        except queue.Full:
+            logger.warning(f"Trace export queue is full, dropping trace {trace.trace_id}")
+
+    def flush(self) -> None:
+        """Wait until every queued trace is written."""
+        self._pending.join()
+
+    def _write(self) -> None:
+        while True:
+            trace = self._pending.get()
+            try:
+                line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except Exception as e:
+                logger.warning(f"Could not write trace {trace.trace_id}: {e}")
+            finally:
+                self._pending.task_done()
+
+
+class Tracer:
+    """Start traces and decide which finished traces are exported.
+
+    Spans are recorded for every request while tracing is enabled; a trace
+    is exported when it was forced, drawn by ``sample_rate``, or slower than
+    ``slow_seconds``, so slow outliers are always kept.
+    """
+
+    def __init__(
+        self,
+        exporter: Exporter,
+        sample_rate: float = 0.0,
+        slow_seconds: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        """Initialize the tracer.
+
+        Args:
+            exporter: Destination of exported traces
+            sample_rate: Fraction of traces exported regardless of duration
+            slow_seconds: Traces at least this long are always exported
+            enabled: Whether traces are recorded at all
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.enabled = enabled
+
+    @contextmanager
+    def trace(
+        self,
+        trace_id: Optional[str] = None,
+        force: bool = False,
+        **attributes: Any,
+    ) -> Iterator[Optional[Trace]]:
+        """Record spans of the enclosed work as one trace.
+
+        Args:
+            trace_id: Request ID used as trace ID (generated if omitted)
+            force: Export the trace regardless of sampling
+            **attributes: Attributes of the trace, e.g. the request path
+
+        Yields:
+            The trace, or None when tracing is disabled
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        trace = Trace(
+            trace_id=trace_id or uuid4().hex,
+            started_at=datetime.now(timezone.utc),
+            attributes=attributes,
+            force=force,
+        )
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            yield trace
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.duration_ms = trace.elapsed_ms()
+            if self._sampled(trace):
+                try:
+                    self.exporter.export(trace)
+                except Exception as e:
+                    logger.warning(f"Could not export trace {trace.trace_id}: {e}")
+
+    def _sampled(self, trace: Trace) -> bool:
+        if trace.force or random.random() < self.sample_rate:
+            return True
+        return (
+            self.slow_seconds is not None
+            and trace.duration_ms is not None
+            and trace.duration_ms >= self.slow_seconds * 1000
+        )
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace of the current request, if one is being recorded."""
+    return _current_trace.get()
+
+
+def set_trace_attributes(**attributes: Any) -> None:
+    """Attach attributes such as the conversation ID to the current trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Start a leaf span; finish it with :func:`end_span`.
+
+    For callbacks that cannot wrap the work in a ``with`` block, such as
+    SQLAlchemy cursor events.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    span = Span(
+        name=name,
+        span_id=uuid4().hex[:16],
+        parent_id=_current_span.get(),
+        start_ms=trace.elapsed_ms(),
+        attributes=attributes,
+    )
+    trace.spans.append(span)
+    return span
+
+
+def end_span(span: Optional[Span]) -> None:
+    """Finish a span started with :func:`start_span`."""
+    trace = _current_trace.get()
+    if span is not None and trace is not None:
+        span.duration_ms = trace.elapsed_ms() - span.start_ms
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record the enclosed block as a span; spans started inside become its children."""
+    started = start_span(name, **attributes)
+    if started is None:
+        yield None
+        return
+    token = _current_span.set(started.span_id)
+    try:
+        yield started
+    except BaseException as e:
+        started.attributes["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(started)
+
+
+def add_event(target: Optional[Span], name: str) -> None:
+    """Record a point-in-time event, such as an SSE flush, on a span."""
+    trace = _current_trace.get()
+    if target is not None and trace is not None and len(target.events) < MAX_SPAN_EVENTS:
+        target.events.append((trace.elapsed_ms(), name))
+
+
+def traced(name: str, function: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Wrap an async function so each call is recorded as a span.
+
+    Returns ``function`` unchanged when tracing is disabled.
+    """
+    if not tracer.enabled:
+        return function
+
+    @functools.wraps(function)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        with span(name):
+            return await function(*args, **kwargs)
+
+    return wrapper
+
+
+def server_timing(trace: Optional[Trace], limit: int = 10) -> str:
+    """Summarize the finished top-level spans of a trace as a Server-Timing value.
+
+    Durations of spans with the same name are added up.
+    """
+    if trace is None:
+        return ""
+    totals: dict[str, float] = {}
+    for item in trace.spans:
+        if item.parent_id is None and item.duration_ms is not None:
+            totals[item.name] = totals.get(item.name, 0.0) + item.duration_ms
+    slowest = sorted(totals.items(), key=lambda entry: entry[1], reverse=True)[:limit]
+    return ", ".join(
+        f"{SERVER_TIMING_INVALID.sub('_', name)};dur={duration:.1f}" for name, duration in slowest
+    )
+
+
+def instrument_engine(engine: Any) -> None:
+    """Record every SQL statement run by an engine as a span of the current trace."""
+    if not tracer.enabled:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Connection
+
+    def _before(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("trace_spans", []).append(
+            start_span("sql", statement=" ".join(statement.split())[:300])
+        )
+
+    def _after(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        spans = conn.info.get("trace_spans")
+        if spans:
+            end_span(spans.pop())
+
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+
+
+class TracingMiddleware:
+    """ASGI middleware tracing each HTTP request.
+
+    The request ID comes from ``X-Request-ID`` or is generated, and is echoed
+    back together with a ``Server-Timing`` summary of the spans finished
+    before the response headers were sent. ``X-Trace: 1`` forces export.
+    """
+
+    def __init__(self, app: Any):
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+        """
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: dict[str, Any],
+        receive: Callable[[], Awaitable[dict[str, Any]]],
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Handle one ASGI connection."""
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid4().hex
+        force = headers.get(b"x-trace") == b"1"
+
+        with tracer.trace(
+            request_id, force=force, method=scope.get("method"), path=scope.get("path")
+        ) as trace:
+
+            async def send_with_timing(message: dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    if trace is not None:
+                        trace.attributes["status"] = message["status"]
+                    extra = [(b"x-request-id", request_id.encode("latin-1"))]
+                    timing = server_timing(trace)
+                    if timing:
+                        extra.append((b"server-timing", timing.encode("latin-1")))
+                    message = {**message, "headers": [*message.get("headers", []), *extra]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+
+def _create_exporter() -> Exporter:
+    if settings.tracing_exporter == "jsonl":
+        return JsonLinesExporter(settings.tracing_file)
+    if settings.tracing_exporter == "none":
+        return NullExporter()
+    raise ValueError(f"Unknown tracing exporter: {settings.tracing_exporter}")
+
+
+tracer = Tracer(
+    exporter=_create_exporter() if settings.tracing_enabled else NullExporter(),
+    sample_rate=settings.tracing_sample_rate,
+    slow_seconds=settings.tracing_slow_seconds,
+    enabled=settings.tracing_enabled,
+)
@@ -1,13 +1,22 @@
 """Main FastAPI application."""
 
+import asyncio
 import logging
 import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
 
-from app.api.endpoints import chat
+from app.api.endpoints import chat, metrics, profiling
 from app.core.config import settings
+from app.core.database import dispose_engines, get_rag_db
+from app.core.http import close_http_clients
+from app.core.tracing import TracingMiddleware, tracer
 
 # Configure logging
 logging.basicConfig(
@@ -20,12 +29,77 @@ logging.basicConfig(
 logging.getLogger("app.api.endpoints.chat").setLevel(logging.DEBUG)
 logging.getLogger("app.rag.graphrag_chain").setLevel(logging.DEBUG)
 
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up_chain() -> None:
+    chat.get_chain()
+
+
+def _ping_rag_db() -> None:
+    with get_rag_db() as session:
+        session.execute(text("SELECT 1"))
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Build the heavy shared resources in the background and mark the app ready.
+
+    Imports and clients are created lazily, so the worker starts serving
+    liveness checks immediately; readiness flips once this finishes.
+    """
+    timings: dict[str, float] = {}
+    try:
+        for name, step in (("graphrag_chain", _warm_up_chain), ("rag_db", _ping_rag_db)):
+            started = time.perf_counter()
+            await asyncio.to_thread(step)
+            timings[name] = round(time.perf_counter() - started, 3)
+        app.state.ready = True
+        logger.info(f"Warm-up finished: {timings}")
+    except Exception as e:
+        app.state.startup_error = str(e)
+        logger.error(f"Warm-up failed after {timings}: {e}")
+
+
+def _drop_cached_chains() -> None:
+    """Forget the shared chains, whose OpenAI clients use the pools closed on shutdown.
+
+    Only modules that were imported are touched, so shutdown does not pull in
+    the LangChain stack.
+    """
+    for module_name, getter in (
+        ("app.rag.graphrag_chain", "get_graphrag_chain"),
+        ("app.rag.chain", "get_rag_chain"),
+    ):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            getattr(module, getter).cache_clear()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Warm up shared resources after startup and release them on shutdown."""
+    task = asyncio.create_task(warm_up(app)) if settings.warm_up_on_startup else None
+    yield
+    if task is not None:
+        task.cancel()
+    await close_http_clients()
+    _drop_cached_chains()
+    dispose_engines()
+    # Traces of the last requests may still be queued for the exporter
+    await asyncio.to_thread(tracer.exporter.flush)
+    app.state.ready = False
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.project_name,
     version=settings.project_version,
     openapi_url=f"{settings.api_v1_str}/openapi.json",
+    lifespan=lifespan,
 )
+app.state.ready = False
+app.state.startup_error = None
 
 # Add CORS middleware
 app.add_middleware(
@@ -42,6 +116,11 @@ app.include_router(
     prefix=f"{settings.api_v1_str}",
     tags=["chat"],
 )
+app.include_router(metrics.router)
+app.include_router(profiling.router)
+
+# Outermost, so the trace covers the whole request
+app.add_middleware(TracingMiddleware)
 
 
 @app.get("/")
@@ -58,3 +137,18 @@ async def root() -> dict[str, str]:
 async def health_check() -> dict[str, str]:
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/ready", response_model=None)
+async def readiness_check() -> dict[str, Any] | JSONResponse:
+    """Readiness endpoint: OK once shared resources are built and the RAG DB answers."""
+    if not app.state.ready and not settings.warm_up_on_startup:
+        # Nothing warms up in the background, so check on demand
+        await warm_up(app)
+    if not app.state.ready:
+        status = "error" if app.state.startup_error else "starting"
+        return JSONResponse(
+            status_code=503,
+            content={"status": status, "detail": app.state.startup_error},
+        )
+    return {"status": "ready"}
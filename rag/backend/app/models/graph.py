@@ -2,7 +2,7 @@
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 
@@ -18,7 +18,9 @@ class Post(Base):
     source_post_no = Column(Integer, nullable=False, unique=True, index=True)
     content = Column(Text, nullable=False)
     author = Column(Text, nullable=True)  # name_and_trip from source DB
-    timestamp = Column(DateTime(timezone=True), nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+    simhash = Column(BigInteger, nullable=True)  # Near-duplicate signature of content
+    duplicate_of_no = Column(Integer, nullable=True, index=True)  # Cluster representative
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -40,3 +42,19 @@ class Relationship(Base):
     )  # IS_REPLY_TO, IS_SEQUENTIAL_TO
     properties = Column(JSONB, default={})  # Additional properties like confidence score
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IndexStats(Base):
+    """Single-row summary of the posts table, maintained by the sync pipeline."""
+
+    __tablename__ = "index_stats"
+
+    id = Column(Integer, primary_key=True, default=1)
+    total_posts = Column(Integer, nullable=False, default=0)
+    min_post_no = Column(Integer, nullable=True)
+    max_post_no = Column(Integer, nullable=True)
+    source_max_post_no = Column(Integer, nullable=True)  # Newest post in the source DB
+    last_sync_at = Column(DateTime(timezone=True), nullable=True)  # Last batch with new posts
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)  # Last sync attempt
+    last_batch_size = Column(Integer, nullable=False, default=0)
+    last_batch_duration_ms = Column(Integer, nullable=False, default=0)
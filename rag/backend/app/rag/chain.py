@@ -1,17 +1,18 @@
 """RAG chain implementation with streaming support."""
 
 import asyncio
-import json
+from functools import lru_cache
 from typing import Any, AsyncIterator, Optional
 from uuid import UUID
 
 from langchain.callbacks.base import AsyncCallbackHandler
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 
-from app.core.config import settings
+from app.rag.citations import resolve_citations
+from app.rag.llm import create_chat_model
 from app.rag.retriever import get_retriever
 from app.rag.schemas import CitationPost
 
@@ -72,62 +73,18 @@ def create_prompt_template() -> ChatPromptTemplate:
     return ChatPromptTemplate.from_template(template)
 
 
-async def extract_citations(context: str, answer: str) -> list[CitationPost]:
-    """Extract citation post numbers from the answer using GPT-3.5-turbo.
+async def extract_citations(answer: str, documents: list[Document]) -> list[CitationPost]:
+    """Extract the posts cited in the answer from the retrieved context.
 
     Args:
-        context: The context containing posts
         answer: The generated answer
+        documents: The context documents the answer was generated from
 
     Returns:
         List of cited posts
     """
-    llm = ChatOpenAI(
-        model=settings.citation_model,
-        temperature=0,
-        api_key=settings.openai_api_key,
-    )
-
-    prompt = ChatPromptTemplate.from_template(
-        """以下の回答文から、参照されているレス番号（No.XXX形式）を全て抽出してください。
-文脈から該当するレスの情報を取得して、JSON配列で返してください。
-
-【文脈】
-{context}
-
-【回答】
-{answer}
-
-【出力形式】
-[
-  {{
-    "no": レス番号,
-    "name_and_trip": "投稿者名",
-    "datetime": "投稿日時",
-    "content": "レス内容の最初の100文字"
-  }}
-]
-
-レス番号が見つからない場合は空の配列[]を返してください。"""
-    )
-
-    chain = prompt | llm
-
     try:
-        result = await chain.ainvoke({"context": context, "answer": answer})
-        citations_data = json.loads(str(result.content))
-
-        citations = []
-        for item in citations_data:
-            citation = CitationPost(
-                no=item["no"],
-                name_and_trip=item["name_and_trip"],
-                datetime=item["datetime"],
-                content=item["content"],
-            )
-            citations.append(citation)
-
-        return citations
+        return await asyncio.to_thread(resolve_citations, answer, documents)
     except Exception as e:
         print(f"Error extracting citations: {e}")
         return []
@@ -140,6 +97,12 @@ class RAGChain:
         self.retriever = get_retriever()
         self.prompt = create_prompt_template()
 
+        # Built once and shared by all requests; streaming callbacks are passed
+        # per request through the run config
+        self.llm = create_chat_model(streaming=True)
+        self.document_chain = create_stuff_documents_chain(self.llm, self.prompt)
+        self.retrieval_chain = create_retrieval_chain(self.retriever, self.document_chain)
+
     async def astream(
         self, question: str, conversation_id: Optional[str] = None
     ) -> AsyncIterator[str]:
@@ -155,23 +118,12 @@ class RAGChain:
         # Create streaming callback
         stream_handler = StreamingCallbackHandler()
 
-        # Initialize LLM with streaming
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            temperature=settings.llm_temperature,
-            api_key=settings.openai_api_key,
-            streaming=True,
-            callbacks=[stream_handler],
-        )
-
-        # Create document chain
-        document_chain = create_stuff_documents_chain(llm, self.prompt)
-
-        # Create retrieval chain
-        retrieval_chain = create_retrieval_chain(self.retriever, document_chain)
-
         # Run chain asynchronously
-        task = asyncio.create_task(retrieval_chain.ainvoke({"input": question}))
+        task = asyncio.create_task(
+            self.retrieval_chain.ainvoke(
+                {"input": question}, config={"callbacks": [stream_handler]}
+            )
+        )
 
         # Stream tokens
         async for token in stream_handler.aiter():
@@ -190,28 +142,15 @@ class RAGChain:
         Returns:
             Dictionary with answer and citations
         """
-        # Initialize LLM without streaming
-        llm = ChatOpenAI(
-            model=settings.llm_model,
-            temperature=settings.llm_temperature,
-            api_key=settings.openai_api_key,
-        )
-
-        # Create document chain
-        document_chain = create_stuff_documents_chain(llm, self.prompt)
-
-        # Create retrieval chain
-        retrieval_chain = create_retrieval_chain(self.retriever, document_chain)
-
         # Get result
-        result = await retrieval_chain.ainvoke({"input": question})
+        result = await self.retrieval_chain.ainvoke({"input": question})
 
         # Extract context and answer
-        context = "\n\n".join([doc.page_content for doc in result.get("context", [])])
+        documents = result.get("context", [])
         answer = result.get("answer", "")
 
         # Extract citations
-        citations = await extract_citations(context, answer)
+        citations = await extract_citations(answer, documents)
 
         return {
             "answer": answer,
@@ -219,5 +158,7 @@ class RAGChain:
         }
 
 
-# Global chain instance
-rag_chain = RAGChain()
+@lru_cache(maxsize=1)
+def get_rag_chain() -> RAGChain:
+    """Get the process-wide RAG chain, building it on first use."""
+    return RAGChain()
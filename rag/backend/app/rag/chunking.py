@@ -0,0 +1,309 @@
+"""Chunking of consecutive posts into window documents for the vector index."""
+
+from collections import deque
+from datetime import timedelta
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence, cast
+from uuid import UUID
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.models.graph import Post
+from app.rag.tokens import count_tokens
+
+WINDOW_SEPARATOR = "\n\n---\n\n"
+
+
+def format_window_post(no: int, author: Any, timestamp: str, content: str) -> str:
+    """Format one post inside a window document."""
+    return f"No.{no} 名前：{author} 投稿日：{timestamp}\n{content}"
+
+
+class SlidingWindowChunker:
+    """Create sliding window chunks from documents.
+
+    Windows start every ``window_size - overlap`` posts. Posts are consumed
+    as a stream and only the last ``window_size`` are held in memory.
+    """
+
+    def __init__(self, window_size: int = 50, overlap: int = 20):
+        """Initialize the chunker.
+
+        Args:
+            window_size: Number of posts per window
+            overlap: Number of overlapping posts between windows
+        """
+        self.window_size = window_size
+        self.overlap = overlap
+
+    @property
+    def step(self) -> int:
+        """Number of posts between the starts of consecutive windows."""
+        return self.window_size - self.overlap
+
+    def create_windows(self, documents: list[Document]) -> list[Document]:
+        """Create sliding window documents from individual post documents.
+
+        Args:
+            documents: List of individual post documents
+
+        Returns:
+            List of window documents
+        """
+        return list(self.iter_windows(documents))
+
+    def iter_windows(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Yield sliding window documents from a stream of post documents.
+
+        A window is emitted as soon as its last post arrives; windows still
+        open when the stream ends are emitted with the posts they have.
+
+        Args:
+            documents: Post documents in post order, e.g. ``PostgresResLoader.lazy_load()``
+
+        Yields:
+            Window documents in order of their first post
+        """
+        buffer: deque[Document] = deque(maxlen=self.window_size)
+        count = 0
+        for doc in documents:
+            buffer.append(doc)
+            count += 1
+            # The window starting at count - window_size is now complete
+            start = count - self.window_size
+            if start >= 0 and start % self.step == 0:
+                yield self._window(list(buffer))
+
+        # Trailing windows that started but never filled up
+        first_open = max(count - self.window_size + 1, 0)
+        first_open = -(-first_open // self.step) * self.step
+        for start in range(first_open, count, self.step):
+            yield self._window(list(buffer)[start - count :])
+
+    def resume_from(self, existing: Iterable[Mapping[str, Any]]) -> Optional[tuple[int, list[str]]]:
+        """Find where incremental windowing must restart after posts are appended.
+
+        Only windows that had fewer than ``window_size`` posts can change when
+        posts are appended, and the first of them starts on a window boundary.
+        Re-streaming posts from there with :meth:`iter_windows` recreates those
+        windows and adds the new ones; all earlier windows stay as they are.
+
+        Args:
+            existing: Metadata of the windows already indexed
+
+        Returns:
+            The post number to stream from and the sources of the windows to
+            replace, or None if nothing is indexed yet
+        """
+        existing = list(existing)
+        if not existing:
+            return None
+
+        stale = [m for m in existing if m["post_count"] < self.window_size]
+        if not stale:
+            return max(int(m["end_no"]) for m in existing) + 1, []
+        return min(int(m["start_no"]) for m in stale), [m["source"] for m in stale]
+
+    @staticmethod
+    def _window(window_docs: list[Document]) -> Document:
+        # Combine posts into a single window document
+        combined_content = WINDOW_SEPARATOR.join(
+            format_window_post(
+                doc.metadata["no"],
+                doc.metadata["name_and_trip"],
+                doc.metadata["datetime"],
+                doc.page_content,
+            )
+            for doc in window_docs
+        )
+
+        # Create metadata for the window
+        start_no = window_docs[0].metadata["no"]
+        end_no = window_docs[-1].metadata["no"]
+
+        return Document(
+            page_content=combined_content,
+            metadata={
+                "start_no": start_no,
+                "end_no": end_no,
+                "post_count": len(window_docs),
+                "source": f"window_{start_no}_{end_no}",
+            },
+        )
+
+
+class MicroWindowChunker:
+    """Group consecutive posts into small, token-bounded conversational windows.
+
+    A window is closed when the next post would exceed the token or post
+    limit, arrives after a long silence, or (when post embeddings are given)
+    drifts away from the topic of the window so far.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        max_posts: int = 20,
+        max_gap_seconds: float = 1800.0,
+        topic_threshold: float = 0.3,
+        model: Optional[str] = None,
+    ):
+        """Initialize the chunker.
+
+        Args:
+            max_tokens: Token budget of a window
+            max_posts: Maximum number of posts per window
+            max_gap_seconds: Silence after which a new window is started
+            topic_threshold: Minimum cosine similarity between a post and the
+                window centroid for the post to join the window
+            model: Model whose tokenizer measures the window size
+        """
+        self.max_tokens = max_tokens
+        self.max_posts = max_posts
+        self.max_gap = timedelta(seconds=max_gap_seconds)
+        self.topic_threshold = topic_threshold
+        self.model = model
+
+    def chunk(
+        self,
+        posts: Iterable[Post],
+        embeddings: Optional[Mapping[UUID, Sequence[float]]] = None,
+    ) -> Iterator[Document]:
+        """Yield window documents for posts given in post order.
+
+        Posts are consumed as a stream; only the open window is held in memory.
+
+        Args:
+            posts: Posts ordered by post number
+            embeddings: Optional per-post embeddings used to detect topic shifts
+
+        Yields:
+            Window documents whose metadata maps back to the member posts
+        """
+        window: list[Post] = []
+        texts: list[str] = []
+        tokens = 0
+        centroid: Optional[np.ndarray] = None
+
+        for post in posts:
+            text = format_window_post(
+                cast(int, post.source_post_no),
+                post.author or "名無し",
+                post.timestamp.isoformat(),
+                cast(str, post.content),
+            )
+            post_tokens = count_tokens(text, self.model)
+            vector = self._vector(post, embeddings)
+
+            if window and self._should_split(window, post, tokens + post_tokens, centroid, vector):
+                yield self._document(window, texts)
+                window, texts, tokens, centroid = [], [], 0, None
+
+            window.append(post)
+            texts.append(text)
+            tokens += post_tokens
+            if vector is not None:
+                centroid = vector if centroid is None else centroid + vector
+
+        if window:
+            yield self._document(window, texts)
+
+    @staticmethod
+    def _vector(
+        post: Post, embeddings: Optional[Mapping[UUID, Sequence[float]]]
+    ) -> Optional[np.ndarray]:
+        post_id = cast(UUID, post.post_id)
+        if not embeddings or post_id not in embeddings:
+            return None
+        vector = np.asarray(embeddings[post_id], dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _should_split(
+        self,
+        window: list[Post],
+        post: Post,
+        tokens: int,
+        centroid: Optional[np.ndarray],
+        vector: Optional[np.ndarray],
+    ) -> bool:
+        if tokens > self.max_tokens or len(window) >= self.max_posts:
+            return True
+        if post.timestamp - window[-1].timestamp > self.max_gap:
+            return True
+        if centroid is not None and vector is not None:
+            similarity = float(centroid @ vector) / max(float(np.linalg.norm(centroid)), 1e-12)
+            if similarity < self.topic_threshold:
+                return True
+        return False
+
+    def _document(self, window: list[Post], texts: list[str]) -> Document:
+        first, last = window[0], window[-1]
+        return Document(
+            page_content=WINDOW_SEPARATOR.join(texts),
+            metadata={
+                "post_ids": ",".join(str(p.post_id) for p in window),
+                "start_no": first.source_post_no,
+                "end_no": last.source_post_no,
+                "post_count": len(window),
+                # Filters match a window by its first post
+                "source_post_no": first.source_post_no,
+                "timestamp": first.timestamp.isoformat(),
+                "timestamp_epoch": int(first.timestamp.timestamp()),
+                "source": f"micro_window_{first.source_post_no}_{last.source_post_no}",
+            },
+        )
+
+
+def window_post_ids(metadata: Mapping[str, Any]) -> list[UUID]:
+    """Return the member post IDs recorded in a micro-window's metadata."""
+    return [UUID(post_id) for post_id in str(metadata.get("post_ids", "")).split(",") if post_id]
+
+
+def covering_windows_where(post_numbers: Iterable[int]) -> Optional[dict[str, Any]]:
+    """Build a Chroma ``where`` clause matching the windows that contain posts.
+
+    Micro-windows and sliding windows carry one vector for several posts, so
+    per-post lookups (``post_id``) find nothing in a window index. Consecutive post numbers are
+    merged into runs, giving one ``start_no``/``end_no`` overlap test per run.
+    """
+    runs: list[list[int]] = []
+    for no in sorted(set(post_numbers)):
+        if runs and no == runs[-1][1] + 1:
+            runs[-1][1] = no
+        else:
+            runs.append([no, no])
+    clauses = [
+        {"$and": [{"start_no": {"$lte": high}}, {"end_no": {"$gte": low}}]} for low, high in runs
+    ]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def rechunk_spans(
+    windows: Iterable[Mapping[str, Any]], post_numbers: Iterable[int]
+) -> list[tuple[int, int]]:
+    """Return the post number ranges to chunk again after posts were edited.
+
+    Each span covers whole existing windows (those containing an edited post,
+    found with :func:`covering_windows_where`), so deleting those windows and
+    chunking the posts of each span again leaves no duplicates or gaps.
+
+    Args:
+        windows: Metadata of the windows containing the edited posts
+        post_numbers: Numbers of the edited posts
+
+    Returns:
+        Disjoint inclusive ``(start_no, end_no)`` ranges in post order
+    """
+    ranges = sorted(
+        [(int(m["start_no"]), int(m["end_no"])) for m in windows]
+        + [(no, no) for no in post_numbers]
+    )
+    spans: list[tuple[int, int]] = []
+    for start, end in ranges:
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
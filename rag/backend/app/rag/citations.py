@@ -0,0 +1,141 @@
+"""Local citation resolution for generated answers."""
+
+import re
+from typing import Any, Iterable, cast
+
+from langchain_core.documents import Document
+
+from app.models.graph import Post
+from app.rag.chunking import WINDOW_SEPARATOR
+from app.rag.post_cache import PostRecord, post_cache
+from app.rag.schemas import CitationPost
+
+# Post references the LLM is instructed to write, e.g. "No.123"
+POST_NO_PATTERN = re.compile(r"No\.(\d+)")
+# One post inside a window document, as written by format_window_post
+WINDOW_POST_PATTERN = re.compile(r"No\.(\d+) 名前：(.*?) 投稿日：(\S*)\n(.*)", re.DOTALL)
+EXCERPT_LENGTH = 100
+# Excerpt length of the GraphRAG citation payload
+CONTEXT_EXCERPT_LENGTH = 200
+# Longest unfinished reference kept between tokens ("No." plus the digits so far)
+SCANNER_TAIL = 16
+
+
+def find_post_numbers(text: str) -> list[int]:
+    """Return the distinct post numbers referenced in ``text`` in order of appearance."""
+    return list(dict.fromkeys(int(no) for no in POST_NO_PATTERN.findall(text)))
+
+
+def post_citation(post: Post | PostRecord) -> dict[str, Any]:
+    """Build the GraphRAG citation payload for a post."""
+    content = cast(str, post.content)
+    return {
+        "source_post_no": post.source_post_no,
+        "author": post.author or "名無し",
+        "timestamp": post.timestamp.isoformat(),
+        "content_excerpt": (
+            content[:CONTEXT_EXCERPT_LENGTH] + "..."
+            if len(content) > CONTEXT_EXCERPT_LENGTH
+            else content
+        ),
+    }
+
+
+class CitationScanner:
+    """Detect post references in a token stream as soon as they are complete."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._seen: set[int] = set()
+
+    def feed(self, token: str) -> list[int]:
+        """Consume a token and return post numbers whose reference just completed.
+
+        A reference is complete once a non-digit follows it, because the next
+        token could still extend the number.
+        """
+        self._buffer += token
+        found = []
+        consumed = 0
+        for match in POST_NO_PATTERN.finditer(self._buffer):
+            if match.end() == len(self._buffer):
+                break
+            consumed = match.end()
+            found.extend(self._new(int(match.group(1))))
+        self._buffer = self._buffer[consumed:][-SCANNER_TAIL:]
+        return found
+
+    def flush(self) -> list[int]:
+        """Return references still pending at the end of the stream."""
+        found = []
+        for match in POST_NO_PATTERN.finditer(self._buffer):
+            found.extend(self._new(int(match.group(1))))
+        self._buffer = ""
+        return found
+
+    def _new(self, no: int) -> list[int]:
+        if no in self._seen:
+            return []
+        self._seen.add(no)
+        return [no]
+
+
+def _citation(no: int, author: Any, timestamp: str, content: str) -> CitationPost:
+    return CitationPost(
+        no=no,
+        name_and_trip=author or "名無し",
+        datetime=timestamp,
+        content=content[:EXCERPT_LENGTH],
+    )
+
+
+def _posts_in_windows(documents: Iterable[Document], wanted: set[int]) -> dict[int, CitationPost]:
+    """Find the wanted posts inside retrieved sliding window documents."""
+    found: dict[int, CitationPost] = {}
+    for doc in documents:
+        start_no = doc.metadata.get("start_no")
+        end_no = doc.metadata.get("end_no")
+        if start_no is not None and end_no is not None:
+            if not any(int(start_no) <= no <= int(end_no) for no in wanted - found.keys()):
+                continue
+
+        for block in doc.page_content.split(WINDOW_SEPARATOR):
+            match = WINDOW_POST_PATTERN.match(block)
+            if not match:
+                continue
+            no = int(match.group(1))
+            if no in wanted and no not in found:
+                found[no] = _citation(no, match.group(2), match.group(3), match.group(4))
+    return found
+
+
+def resolve_citations(answer: str, documents: Iterable[Document]) -> list[CitationPost]:
+    """Resolve the posts cited in an answer without calling an LLM.
+
+    Cited numbers are looked up in the context documents that were already
+    retrieved; any that are not found there come from the post cache, which
+    fetches its misses in one batched query.
+
+    Args:
+        answer: The generated answer
+        documents: Context documents passed to the LLM
+
+    Returns:
+        Cited posts in order of first citation
+    """
+    post_numbers = find_post_numbers(answer)
+    if not post_numbers:
+        return []
+
+    found = _posts_in_windows(documents, set(post_numbers))
+
+    missing = [no for no in post_numbers if no not in found]
+    if missing:
+        from app.core.database import get_rag_db
+
+        with get_rag_db() as session:
+            records = post_cache.get_many(session, missing)
+        for no, record in records.items():
+            found[no] = _citation(no, record.author, record.timestamp.isoformat(), record.content)
+
+    return [found[no] for no in post_numbers if no in found]
@@ -0,0 +1,127 @@
+"""Token-budget-aware context assembly for the LLM prompt."""
+
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+from app.models.graph import Post
+from app.rag.graph_index import SEQUENTIAL_RELATIONSHIP
+from app.rag.tokens import count_tokens
+
+if TYPE_CHECKING:
+    from app.rag.post_cache import PostCache
+
+CONTEXT_HEADER = "=== CONVERSATION CONTEXT ===\n\nPosts:\n"
+POST_SEPARATOR = "\n---\n"
+RELATIONSHIPS_HEADER = "\n\n=== RELATIONSHIPS ===\n"
+STATISTICS_HEADER = "\n\n=== STATISTICS ===\n"
+STATISTICS_TEMPLATE = "- total_posts: {posts}\n- total_relationships: {relationships}\n"
+
+
+def format_post(post: Post) -> str:
+    """Format a single post the way it appears in the LLM context."""
+    author_name = post.author or "名無し"
+    timestamp_str = post.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    return f"No.{post.source_post_no} 名前：{author_name} 投稿日：{timestamp_str}\n{post.content}\n"
+
+
+class ContextBuilder:
+    """Assemble collected posts into an LLM context that fits a token budget."""
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        model: Optional[str] = None,
+        post_cache: Optional["PostCache"] = None,
+    ):
+        """Initialize the context builder.
+
+        Args:
+            token_budget: Maximum tokens of the assembled context (None = unlimited)
+            model: Model whose tokenizer is used (defaults to the configured LLM)
+            post_cache: Optional cache reusing the rendering of hot posts
+        """
+        self.token_budget = token_budget
+        self.model = model
+        self.post_cache = post_cache
+
+    def render(self, post: Post) -> str:
+        """Format a post for the context, from the post cache when available."""
+        if self.post_cache is not None:
+            return self.post_cache.render(post)
+        return format_post(post)
+
+    def post_tokens(self, post: Post) -> int:
+        """Count the tokens a post takes in the context, excluding its separator."""
+        return self._count(self.render(post))
+
+    def build(self, context_data: dict[str, Any]) -> tuple[str, int]:
+        """Build the context string.
+
+        Posts are kept in descending score order until the budget is spent and
+        are then laid out by post number. IS_SEQUENTIAL_TO lines are omitted
+        because post order already conveys them. Token counts found in
+        ``post_tokens`` are reused instead of tokenizing the posts again.
+
+        Args:
+            context_data: Context data from GraphTraverser.get_conversation_context
+
+        Returns:
+            The context string and its token count
+        """
+        posts: list[Post] = context_data["posts"]
+        scores: dict[Any, float] = context_data.get("scores", {})
+        post_tokens: dict[Any, int] = context_data.get("post_tokens", {})
+        relationships = context_data["relationships"]
+
+        formatted = {post.post_id: self.render(post) for post in posts}
+        remaining = None
+        if self.token_budget is not None:
+            # Reserve room for the headers and the largest possible statistics block
+            fixed = CONTEXT_HEADER + STATISTICS_HEADER
+            fixed += STATISTICS_TEMPLATE.format(posts=len(posts), relationships=len(relationships))
+            remaining = self.token_budget - self._count(fixed)
+
+        separator_tokens = self._count(POST_SEPARATOR)
+        kept: list[Post] = []
+        for post in sorted(posts, key=lambda p: scores.get(p.post_id, 0.0), reverse=True):
+            if remaining is not None:
+                tokens = post_tokens.get(post.post_id)
+                if tokens is None:
+                    tokens = self._count(formatted[post.post_id])
+                tokens += separator_tokens
+                if tokens > remaining:
+                    continue
+                remaining -= tokens
+            kept.append(post)
+        kept.sort(key=lambda p: cast(int, p.source_post_no))
+
+        id_to_no = {p.post_id: p.source_post_no for p in kept}
+        rel_lines: list[str] = []
+        for rel in relationships:
+            if rel.relationship_type == SEQUENTIAL_RELATIONSHIP:
+                continue
+            source_no = id_to_no.get(rel.source_node_id)
+            target_no = id_to_no.get(rel.target_node_id)
+            if source_no is None or target_no is None:
+                continue
+            line = f"- No.{source_no} {rel.relationship_type} No.{target_no}"
+            if remaining is not None:
+                tokens = self._count(line) + 1
+                if not rel_lines:
+                    tokens += self._count(RELATIONSHIPS_HEADER)
+                if tokens > remaining:
+                    continue
+                remaining -= tokens
+            rel_lines.append(line)
+
+        parts = [CONTEXT_HEADER, POST_SEPARATOR.join(formatted[p.post_id] for p in kept)]
+        if rel_lines:
+            parts += [RELATIONSHIPS_HEADER, "\n".join(rel_lines)]
+        parts += [
+            STATISTICS_HEADER,
+            STATISTICS_TEMPLATE.format(posts=len(kept), relationships=len(rel_lines)),
+        ]
+        context = "".join(parts)
+        return context, self._count(context)
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.model)
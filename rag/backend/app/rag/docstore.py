@@ -0,0 +1,128 @@
+"""Single-file, compressed byte store for parent documents."""
+
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from langchain_core.stores import ByteStore
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+# One-byte codec tag in front of every stored value
+RAW = b"r"
+ZLIB = b"d"
+ZSTD = b"z"
+# SQLite's default limit on bound parameters per statement
+MAX_VARIABLES = 900
+
+
+class SQLiteByteStore(ByteStore):
+    """Byte store keeping all values in one SQLite file.
+
+    Values are compressed with zstd when the ``zstandard`` package is
+    installed and with zlib otherwise. Each value records its codec, so a
+    store written with one codec stays readable with the other available.
+    """
+
+    def __init__(self, path: str | Path, compression_level: int = 3):
+        """Initialize the store.
+
+        Args:
+            path: SQLite database file, created if missing
+            compression_level: zstd or zlib compression level
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        # zstd (de)compressor objects must not be shared between threads
+        self._codecs = threading.local()
+
+    def _zstd_compressor(self) -> "zstandard.ZstdCompressor":
+        compressor = getattr(self._codecs, "compressor", None)
+        if compressor is None:
+            compressor = self._codecs.compressor = zstandard.ZstdCompressor(
+                level=self.compression_level
+            )
+        return compressor
+
+    def _zstd_decompressor(self) -> "zstandard.ZstdDecompressor":
+        decompressor = getattr(self._codecs, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._codecs.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def _encode(self, value: bytes) -> bytes:
+        if zstandard is not None:
+            return ZSTD + self._zstd_compressor().compress(value)
+        return ZLIB + zlib.compress(value, self.compression_level)
+
+    def _decode(self, blob: bytes) -> bytes:
+        codec, payload = blob[:1], blob[1:]
+        if codec == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read values written with zstd")
+            return self._zstd_decompressor().decompress(payload)
+        if codec == ZLIB:
+            return zlib.decompress(payload)
+        return payload
+
+    def mget(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        """Get the values of many keys with one query per batch of keys."""
+        found: dict[str, bytes] = {}
+        with self._lock:
+            for i in range(0, len(keys), MAX_VARIABLES):
+                batch = list(keys[i : i + MAX_VARIABLES])
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM kv WHERE key IN ({placeholders})", batch
+                )
+                found.update(rows)
+        return [self._decode(found[key]) if key in found else None for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, bytes]]) -> None:
+        """Set many values in a single transaction."""
+        rows = [(key, self._encode(value)) for key, value in key_value_pairs]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", rows)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        """Delete many keys in a single transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM kv WHERE key = ?", [(key,) for key in keys])
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        """Yield stored keys in key order, optionally only those with a prefix."""
+        prefix = prefix or ""
+        # Keys with the prefix sort between the prefix and its successor
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else "\U0010ffff"
+        last, comparison = prefix, ">="
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key FROM kv WHERE key {comparison} ? AND key < ? ORDER BY key LIMIT ?",
+                    (last, upper, MAX_VARIABLES),
+                ).fetchall()
+            if not rows:
+                return
+            for (key,) in rows:
+                yield key
+            last, comparison = rows[-1][0], ">"
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
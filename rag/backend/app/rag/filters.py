@@ -0,0 +1,104 @@
+"""Vector store metadata and search filter pushdown."""
+
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.models.graph import Post
+from app.rag.schemas import SearchFilters
+
+# Author stored for posts without a name
+ANONYMOUS_AUTHOR = "名無し"
+
+
+def _aware(value: datetime) -> datetime:
+    """Interpret naive filter times in the board time zone."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=ZoneInfo(settings.board_timezone))
+    return value
+
+
+def post_metadata(post: Post) -> dict[str, Any]:
+    """Build the vector store metadata for a post.
+
+    ``source_post_no`` and ``timestamp_epoch`` are numeric so that filters
+    can use range operators on them; ``timestamp`` stays ISO for display.
+    """
+    return {
+        "post_id": str(post.post_id),
+        "source_post_no": post.source_post_no,
+        "timestamp": post.timestamp.isoformat(),
+        "timestamp_epoch": int(post.timestamp.timestamp()),
+        "source": f"graphrag_post_{post.source_post_no}",
+        "author": post.author or ANONYMOUS_AUTHOR,
+    }
+
+
+def chroma_where(filters: Optional[SearchFilters]) -> Optional[dict[str, Any]]:
+    """Translate search filters into a Chroma ``where`` clause.
+
+    The author filter needs per-post ``author`` metadata. A micro-window
+    holds posts by several authors and has none, so with
+    ``index_chunking=micro`` the author is left out here and applied to
+    the member posts by :func:`filter_post_ids` instead.
+
+    Args:
+        filters: Requested filters
+
+    Returns:
+        The where clause, or None if nothing is filtered
+    """
+    if filters is None:
+        return None
+
+    clauses: list[dict[str, Any]] = []
+    if filters.post_no_from is not None:
+        clauses.append({"source_post_no": {"$gte": filters.post_no_from}})
+    if filters.post_no_to is not None:
+        clauses.append({"source_post_no": {"$lte": filters.post_no_to}})
+    if filters.since is not None:
+        clauses.append({"timestamp_epoch": {"$gte": int(_aware(filters.since).timestamp())}})
+    if filters.until is not None:
+        clauses.append({"timestamp_epoch": {"$lt": int(_aware(filters.until).timestamp())}})
+    if filters.author and settings.index_chunking != "micro":
+        clauses.append({"author": {"$eq": filters.author}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def filter_posts(query: Select, filters: Optional[SearchFilters]) -> Select:
+    """Apply search filters to a query over ``posts``."""
+    if filters is None:
+        return query
+    if filters.post_no_from is not None:
+        query = query.where(Post.source_post_no >= filters.post_no_from)
+    if filters.post_no_to is not None:
+        query = query.where(Post.source_post_no <= filters.post_no_to)
+    if filters.since is not None:
+        query = query.where(Post.timestamp >= _aware(filters.since))
+    if filters.until is not None:
+        query = query.where(Post.timestamp < _aware(filters.until))
+    if filters.author == ANONYMOUS_AUTHOR:
+        query = query.where(or_(Post.author.is_(None), Post.author == ANONYMOUS_AUTHOR))
+    elif filters.author:
+        query = query.where(Post.author == filters.author)
+    return query
+
+
+def filter_post_ids(
+    session: Session, post_ids: Sequence[UUID], filters: Optional[SearchFilters]
+) -> list[UUID]:
+    """Keep the posts that match the filters, in the given order."""
+    if filters is None or not post_ids:
+        return list(post_ids)
+    query = filter_posts(select(Post.post_id).where(Post.post_id.in_(post_ids)), filters)
+    matching = set(session.execute(query).scalars())
+    return [post_id for post_id in post_ids if post_id in matching]
@@ -0,0 +1,354 @@
+"""In-process CSR adjacency index for graph traversal."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SEQUENTIAL_RELATIONSHIP = "IS_SEQUENTIAL_TO"
+# New post IDs sent per edge query during a refresh
+EDGE_QUERY_BATCH = 10000
+
+ALL_EDGES_QUERY = text(
+    "SELECT source_node_id, target_node_id, relationship_type FROM relationships"
+)
+# Both node-id columns are indexed, so the two ANY() arms become index scans
+NEW_EDGES_QUERY = text(
+    """
+    SELECT source_node_id, target_node_id, relationship_type
+    FROM relationships
+    WHERE source_node_id = ANY(:ids) OR target_node_id = ANY(:ids)
+    """
+).bindparams(bindparam("ids", type_=ARRAY(PG_UUID(as_uuid=True))))
+
+
+@dataclass(frozen=True)
+class _CSR:
+    """Compressed sparse row adjacency for one relationship type."""
+
+    offsets: np.ndarray  # int64, length = node count + 1
+    targets: np.ndarray  # int32, length = 2 * edge count (edges are stored both ways)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.targets.nbytes)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Immutable view of the index that readers traverse without locking."""
+
+    post_ids: list[UUID] = field(default_factory=list)  # dense id -> post_id
+    post_nos: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    dense_ids: dict[UUID, int] = field(default_factory=dict)  # post_id -> dense id
+    edges: dict[str, tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    csr: dict[str, _CSR] = field(default_factory=dict)
+    high_water_mark: int = 0  # max source_post_no loaded
+
+    @property
+    def node_count(self) -> int:
+        return len(self.post_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(src) for src, _ in self.edges.values())
+
+
+def _build_csr(src: np.ndarray, dst: np.ndarray, node_count: int) -> _CSR:
+    """Build an undirected CSR adjacency from COO edge arrays."""
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    order = np.argsort(rows, kind="stable")
+    counts = np.bincount(rows, minlength=node_count)
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return _CSR(offsets=offsets, targets=cols[order].astype(np.int32, copy=False))
+
+
+def _gather_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenate ``arange(start, end)`` for every pair in one vectorised pass."""
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    # Position of each gathered element relative to the start of its own range
+    base = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return base + np.arange(total)
+
+
+def _neighbors(csr: _CSR, frontier: np.ndarray) -> np.ndarray:
+    """Gather the neighbours of every node in ``frontier``."""
+    # Nodes added after the CSR was built have no edges of this type yet
+    frontier = frontier[frontier < len(csr.offsets) - 1]
+    return np.take(csr.targets, _gather_ranges(csr.offsets[frontier], csr.offsets[frontier + 1]))
+
+
+def _sequential_neighbors(post_nos: np.ndarray, frontier: np.ndarray, window: int) -> np.ndarray:
+    """Gather the nodes within ``window`` post numbers of every node in ``frontier``.
+
+    Dense ids are assigned in ``source_post_no`` order, so ``post_nos`` is sorted
+    and each neighbourhood is a contiguous dense-id range.
+    """
+    nos = post_nos[frontier]
+    starts = np.searchsorted(post_nos, nos - window, side="left")
+    ends = np.searchsorted(post_nos, nos + window, side="right")
+    return _gather_ranges(starts, ends).astype(np.int32)
+
+
+class GraphIndex:
+    """Adjacency index over the ``relationships`` table held in process memory.
+
+    ``post_id``s are mapped to dense integer ids and the edges of each
+    relationship type are stored as NumPy CSR offset/target arrays. The graph is
+    append-mostly, so :meth:`refresh` only loads posts above the last
+    ``source_post_no`` high-water mark together with the edges that touch them.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0):
+        """Initialize the graph index.
+
+        Args:
+            refresh_interval: Minimum seconds between refreshes in maybe_refresh
+        """
+        self.refresh_interval = refresh_interval
+        self._snapshot = _Snapshot()
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+
+    @property
+    def high_water_mark(self) -> int:
+        """Highest ``source_post_no`` loaded into the index."""
+        return self._snapshot.high_water_mark
+
+    def maybe_refresh(self, session: Session) -> None:
+        """Refresh the index if the refresh interval has elapsed."""
+        if time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        self.refresh(session)
+
+    def refresh(self, session: Session) -> int:
+        """Load posts and relationships added since the last refresh.
+
+        Args:
+            session: RAG database session
+
+        Returns:
+            Number of newly loaded posts
+        """
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            hwm = self._snapshot.high_water_mark
+
+            post_rows = session.execute(
+                text(
+                    """
+                    SELECT post_id, source_post_no
+                    FROM posts
+                    WHERE source_post_no > :hwm
+                    ORDER BY source_post_no
+                    """
+                ),
+                {"hwm": hwm},
+            ).all()
+            if not post_rows:
+                return 0
+
+            # Every edge written by the sync pipeline touches at least one new post
+            new_ids = [post_id for post_id, _ in post_rows] if hwm else []
+            edge_rows: dict[tuple[Any, ...], None] = {}
+            if not hwm:
+                # The first load reads every edge anyway
+                edge_rows.update((tuple(row), None) for row in session.execute(ALL_EDGES_QUERY))
+            for i in range(0, len(new_ids), EDGE_QUERY_BATCH):
+                rows = session.execute(NEW_EDGES_QUERY, {"ids": new_ids[i : i + EDGE_QUERY_BATCH]})
+                # An edge between posts of different batches is returned twice
+                edge_rows.update((tuple(row), None) for row in rows)
+
+            self._snapshot = self._extend(self._snapshot, post_rows, edge_rows)
+
+        stats = self.memory_stats()
+        logger.info(
+            f"Graph index refreshed: +{len(post_rows)} posts, "
+            f"{stats['nodes']} nodes, {stats['edges']} edges, "
+            f"{stats['total_bytes'] / 1e6:.1f} MB "
+            f"({stats['bytes_per_million_edges'] / 1e6:.1f} MB per million edges)"
+        )
+        return len(post_rows)
+
+    @staticmethod
+    def _extend(
+        snapshot: _Snapshot,
+        post_rows: Iterable[Any],
+        edge_rows: Iterable[Any],
+    ) -> _Snapshot:
+        """Return a new snapshot with the given posts and edges appended."""
+        post_ids = list(snapshot.post_ids)
+        dense_ids = dict(snapshot.dense_ids)
+        new_nos = []
+        for post_id, post_no in post_rows:
+            if post_id in dense_ids:
+                continue
+            dense_ids[post_id] = len(post_ids)
+            post_ids.append(post_id)
+            new_nos.append(post_no)
+        post_nos = np.concatenate([snapshot.post_nos, np.asarray(new_nos, dtype=np.int64)])
+
+        new_edges: dict[str, tuple[list[int], list[int]]] = {}
+        for source_id, target_id, rel_type in edge_rows:
+            source = dense_ids.get(source_id)
+            target = dense_ids.get(target_id)
+            if source is None or target is None:
+                continue
+            src_list, dst_list = new_edges.setdefault(rel_type, ([], []))
+            src_list.append(source)
+            dst_list.append(target)
+
+        edges = dict(snapshot.edges)
+        for rel_type, (src_list, dst_list) in new_edges.items():
+            old_src, old_dst = edges.get(
+                rel_type, (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+            )
+            edges[rel_type] = (
+                np.concatenate([old_src, np.asarray(src_list, dtype=np.int32)]),
+                np.concatenate([old_dst, np.asarray(dst_list, dtype=np.int32)]),
+            )
+
+        # Types without new edges keep their CSR; it is padded lazily in _neighbors
+        csr = dict(snapshot.csr)
+        for rel_type in new_edges:
+            src, dst = edges[rel_type]
+            csr[rel_type] = _build_csr(src, dst, len(post_ids))
+
+        return _Snapshot(
+            post_ids=post_ids,
+            post_nos=post_nos,
+            dense_ids=dense_ids,
+            edges=edges,
+            csr=csr,
+            high_water_mark=int(post_nos.max()) if len(post_nos) else 0,
+        )
+
+    def traverse(
+        self,
+        start_post_ids: list[UUID],
+        relationship_types: Optional[list[str]] = None,
+        max_depth: int = 3,
+        sequential_window: Optional[int] = None,
+    ) -> dict[UUID, int]:
+        """Breadth-first expansion from the start posts.
+
+        Args:
+            start_post_ids: Starting post IDs
+            relationship_types: Types of relationships to follow (None = all)
+            max_depth: Maximum depth for graph traversal
+            sequential_window: If set, IS_SEQUENTIAL_TO edges are derived from post
+                numbers instead of the stored rows
+
+        Returns:
+            Mapping of reached post IDs to their hop distance from the nearest start post
+        """
+        snapshot = self._snapshot
+        depth = np.full(snapshot.node_count, -1, dtype=np.int32)
+        return self._bfs(
+            snapshot, depth, start_post_ids, relationship_types, max_depth, sequential_window
+        )
+
+    def traverse_each(
+        self,
+        start_post_ids: list[UUID],
+        relationship_types: Optional[list[str]] = None,
+        max_depth: int = 3,
+        sequential_window: Optional[int] = None,
+    ) -> dict[UUID, dict[UUID, int]]:
+        """Run :meth:`traverse` from every start post on its own.
+
+        All searches share one depth buffer, so a question with many seeds
+        allocates a node-sized array once instead of once per seed.
+
+        Returns:
+            Mapping of start post ID to {reached post ID: hop distance}
+        """
+        snapshot = self._snapshot
+        depth = np.full(snapshot.node_count, -1, dtype=np.int32)
+        return {
+            seed: self._bfs(
+                snapshot, depth, [seed], relationship_types, max_depth, sequential_window
+            )
+            for seed in start_post_ids
+        }
+
+    @staticmethod
+    def _bfs(
+        snapshot: _Snapshot,
+        depth: np.ndarray,
+        start_post_ids: list[UUID],
+        relationship_types: Optional[list[str]],
+        max_depth: int,
+        sequential_window: Optional[int],
+    ) -> dict[UUID, int]:
+        """Breadth-first search using ``depth`` (all -1) as scratch space.
+
+        Only the visited entries are touched, and they are reset to -1 before
+        returning so the buffer can be reused.
+        """
+        starts = [snapshot.dense_ids[p] for p in start_post_ids if p in snapshot.dense_ids]
+        if not starts:
+            return {}
+
+        types = relationship_types or list(snapshot.csr) + [SEQUENTIAL_RELATIONSHIP]
+        implicit = sequential_window is not None and SEQUENTIAL_RELATIONSHIP in types
+        if sequential_window is not None:
+            types = [t for t in types if t != SEQUENTIAL_RELATIONSHIP]
+        adjacency = [snapshot.csr[t] for t in types if t in snapshot.csr]
+
+        frontier = np.unique(np.asarray(starts, dtype=np.int32))
+        depth[frontier] = 0
+        levels = [frontier]
+
+        for level in range(1, max_depth + 1):
+            if not len(frontier) or not (adjacency or implicit):
+                break
+            parts = [_neighbors(csr, frontier) for csr in adjacency]
+            if implicit:
+                assert sequential_window is not None
+                parts.append(_sequential_neighbors(snapshot.post_nos, frontier, sequential_window))
+            reached = np.concatenate(parts)
+            reached = np.unique(reached)
+            frontier = reached[depth[reached] < 0]
+            depth[frontier] = level
+            levels.append(frontier)
+
+        visited = np.sort(np.concatenate(levels))
+        result = {snapshot.post_ids[i]: int(depth[i]) for i in visited}
+        depth[visited] = -1
+        return result
+
+    def memory_stats(self) -> dict[str, float]:
+        """Report the memory footprint of the index."""
+        snapshot = self._snapshot
+        array_bytes = snapshot.post_nos.nbytes
+        array_bytes += sum(src.nbytes + dst.nbytes for src, dst in snapshot.edges.values())
+        array_bytes += sum(csr.nbytes for csr in snapshot.csr.values())
+        # Rough CPython cost of the UUID list and the post_id -> dense id dict
+        mapping_bytes = snapshot.node_count * (8 + 56 + 100)
+
+        edges = snapshot.edge_count
+        total = array_bytes + mapping_bytes
+        return {
+            "nodes": snapshot.node_count,
+            "edges": edges,
+            "array_bytes": array_bytes,
+            "mapping_bytes": mapping_bytes,
+            "total_bytes": total,
+            "bytes_per_million_edges": total / edges * 1_000_000 if edges else 0.0,
+        }
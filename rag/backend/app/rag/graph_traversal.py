@@ -1,29 +1,69 @@
 """Graph traversal logic for GraphRAG."""
 
 import logging
-from typing import Any, Optional
+from typing import Any, Optional, cast
 from uuid import UUID
 
 from sqlalchemy import and_, select, text
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
+from app.core.tracing import span
 from app.models.graph import Post, Relationship
+from app.rag.context_builder import ContextBuilder
+from app.rag.graph_index import SEQUENTIAL_RELATIONSHIP, GraphIndex
+from app.rag.post_cache import PostCache
 
 logger = logging.getLogger(__name__)
 
+# Edge types that cannot be derived from post numbers and must be stored
+MATERIALIZED_RELATIONSHIP_TYPES = ["IS_REPLY_TO"]
+SEQUENTIAL_MODES = ("materialized", "implicit")
+
 
 class GraphTraverser:
     """Traverse the knowledge graph to collect context."""
 
-    def __init__(self, max_depth: int = 3, max_nodes: int = 50):
+    def __init__(
+        self,
+        max_depth: int = 3,
+        max_nodes: int = 50,
+        graph_index: Optional[GraphIndex] = None,
+        sequential_mode: str = "materialized",
+        sequential_window: int = 20,
+        decay: float = 0.5,
+        token_budget: Optional[int] = None,
+        post_cache: Optional[PostCache] = None,
+    ):
         """Initialize the graph traverser.
 
         Args:
             max_depth: Maximum depth for graph traversal
             max_nodes: Maximum number of nodes to collect
+            graph_index: Optional in-process adjacency index used instead of the
+                recursive SQL query
+            sequential_mode: "materialized" follows stored IS_SEQUENTIAL_TO rows,
+                "implicit" derives them from source_post_no ranges
+            sequential_window: Number of following posts linked by IS_SEQUENTIAL_TO
+            decay: Score multiplier applied per hop away from a start post
+            token_budget: Maximum tokens of selected posts (None = unlimited)
+            post_cache: Optional cache reusing the rendering of hot posts
         """
+        if sequential_mode not in SEQUENTIAL_MODES:
+            raise ValueError(f"Unknown sequential mode: {sequential_mode}")
+
         self.max_depth = max_depth
         self.max_nodes = max_nodes
+        self.graph_index = graph_index
+        self.sequential_mode = sequential_mode
+        self.sequential_window = sequential_window
+        self.decay = decay
+        self.token_budget = token_budget
+        self.context_builder = ContextBuilder(token_budget, post_cache=post_cache)
+
+    @property
+    def implicit_sequential(self) -> bool:
+        """Whether sequential edges are computed from post numbers."""
+        return self.sequential_mode == "implicit"
 
     def get_related_posts_recursive(
         self,
@@ -31,19 +71,178 @@ class GraphTraverser:
         start_post_ids: list[UUID],
         relationship_types: Optional[list[str]] = None,
     ) -> list[Post]:
-        """Get related posts using recursive SQL query.
+        """Get the highest-scoring related posts around the start posts.
 
         Args:
             session: Database session
-            start_post_ids: Starting post IDs
+            start_post_ids: Starting post IDs, most relevant first
             relationship_types: Types of relationships to follow (None = all)
 
         Returns:
-            List of related posts
+            List of related posts ordered by post number
         """
         if not start_post_ids:
             return []
 
+        distances = self.collect_candidates(session, start_post_ids, relationship_types)
+        scores = self.score_candidates(start_post_ids, distances)
+        posts, _ = self.select_posts(session, scores)
+        return posts
+
+    def collect_candidates(
+        self,
+        session: Session,
+        start_post_ids: list[UUID],
+        relationship_types: Optional[list[str]] = None,
+    ) -> dict[UUID, dict[UUID, float]]:
+        """Collect every post within reach of each start post.
+
+        Args:
+            session: Database session
+            start_post_ids: Starting post IDs
+            relationship_types: Types of relationships to follow (None = all)
+
+        Returns:
+            Mapping of start post ID to {reached post ID: distance in hops}
+        """
+        if self.graph_index is not None:
+            self.graph_index.maybe_refresh(session)
+            window = self.sequential_window if self.implicit_sequential else None
+            per_seed = self.graph_index.traverse_each(
+                start_post_ids, relationship_types, self.max_depth, sequential_window=window
+            )
+            return {
+                seed: {post_id: float(depth) for post_id, depth in distances.items()}
+                for seed, distances in per_seed.items()
+            }
+
+        if not self.implicit_sequential:
+            return self._stored_edge_candidates(session, start_post_ids, relationship_types)
+
+        distances: dict[UUID, dict[UUID, float]] = {}
+        if relationship_types is None or SEQUENTIAL_RELATIONSHIP in relationship_types:
+            distances = self._sequential_candidates(session, start_post_ids)
+
+        stored_types = [
+            t
+            for t in relationship_types or MATERIALIZED_RELATIONSHIP_TYPES
+            if t != SEQUENTIAL_RELATIONSHIP
+        ]
+        if stored_types:
+            stored = self._stored_edge_candidates(session, start_post_ids, stored_types)
+            for seed, reached in stored.items():
+                seed_distances = distances.setdefault(seed, {})
+                for post_id, distance in reached.items():
+                    seed_distances[post_id] = min(distance, seed_distances.get(post_id, distance))
+
+        return distances
+
+    def score_candidates(
+        self,
+        start_post_ids: list[UUID],
+        distances: dict[UUID, dict[UUID, float]],
+    ) -> dict[UUID, float]:
+        """Score candidates by distance-decayed proximity to the start posts.
+
+        Each start post contributes ``weight * decay ** distance`` to every post it
+        reaches, where the weight falls off with its vector search rank.
+
+        Args:
+            start_post_ids: Starting post IDs, most relevant first
+            distances: Output of collect_candidates
+
+        Returns:
+            Mapping of post ID to relevance score
+        """
+        scores: dict[UUID, float] = {}
+        for rank, seed in enumerate(dict.fromkeys(start_post_ids)):
+            weight = 1.0 / (rank + 1)
+            for post_id, distance in distances.get(seed, {}).items():
+                scores[post_id] = scores.get(post_id, 0.0) + weight * self.decay**distance
+        return scores
+
+    def select_posts(
+        self, session: Session, scores: dict[UUID, float]
+    ) -> tuple[list[Post], dict[UUID, int]]:
+        """Fill the token budget with the highest-scoring posts.
+
+        Args:
+            session: Database session
+            scores: Output of score_candidates
+
+        Returns:
+            Selected posts ordered by post number and the tokens of each, keyed by post ID
+        """
+        ranked = sorted(scores, key=lambda post_id: scores[post_id], reverse=True)
+        ranked = ranked[: self.max_nodes]
+        if not ranked:
+            return [], {}
+
+        # Post bodies are fetched in one batched query
+        posts = list(session.execute(select(Post).where(Post.post_id.in_(ranked))).scalars())
+        posts.sort(key=lambda p: scores[p.post_id], reverse=True)
+
+        selected = []
+        post_tokens: dict[UUID, int] = {}
+        used_tokens = 0
+        for post in posts:
+            tokens = self.context_builder.post_tokens(post)
+            if self.token_budget is not None and used_tokens + tokens > self.token_budget:
+                continue
+            used_tokens += tokens
+            selected.append(post)
+            post_tokens[post.post_id] = tokens
+
+        selected.sort(key=lambda p: p.source_post_no)
+        return selected, post_tokens
+
+    def _sequential_candidates(
+        self, session: Session, start_post_ids: list[UUID]
+    ) -> dict[UUID, dict[UUID, float]]:
+        """Derive the sequential neighbourhood of the start posts from post numbers.
+
+        Each post is implicitly linked to the ``sequential_window`` posts on either
+        side, so ``max_depth`` hops cover a ``source_post_no`` range scan.
+
+        Args:
+            session: Database session
+            start_post_ids: Starting post IDs
+
+        Returns:
+            Mapping of start post ID to {reached post ID: distance in hops}
+        """
+        span = self.sequential_window * self.max_depth
+        seed = aliased(Post)
+        query = (
+            select(seed.post_id, Post.post_id, Post.source_post_no - seed.source_post_no)
+            .join(
+                seed,
+                Post.source_post_no.between(seed.source_post_no - span, seed.source_post_no + span),
+            )
+            .where(seed.post_id.in_(start_post_ids))
+        )
+
+        distances: dict[UUID, dict[UUID, float]] = {}
+        for seed_id, post_id, offset in session.execute(query):
+            distances.setdefault(seed_id, {})[post_id] = abs(offset) / self.sequential_window
+        return distances
+
+    def _stored_edge_candidates(
+        self,
+        session: Session,
+        start_post_ids: list[UUID],
+        relationship_types: Optional[list[str]] = None,
+    ) -> dict[UUID, dict[UUID, float]]:
+        """Follow stored relationship rows with a recursive CTE.
+
+        Args:
+            session: Database session
+            start_post_ids: Starting post IDs
+            relationship_types: Types of relationships to follow (None = all)
+
+        Returns:
+            Mapping of start post ID to {reached post ID: distance in hops}
+        """
         # Build relationship type filter
         rel_filter = ""
         if relationship_types:
@@ -55,26 +254,18 @@ class GraphTraverser:
             f"""
         WITH RECURSIVE graph_traversal AS (
             -- Base case: starting posts
-            SELECT 
+            SELECT
                 p.post_id,
-                p.source_post_no,
-                p.content,
-                p.author,
-                p.timestamp,
                 0 as depth,
                 ARRAY[p.post_id] as path
             FROM posts p
             WHERE p.post_id = ANY(:start_ids)
-            
+
             UNION ALL
-            
+
             -- Recursive case: follow relationships
-            SELECT 
+            SELECT
                 p.post_id,
-                p.source_post_no,
-                p.content,
-                p.author,
-                p.timestamp,
                 gt.depth + 1,
                 gt.path || p.post_id
             FROM graph_traversal gt
@@ -83,24 +274,21 @@ class GraphTraverser:
                 {rel_filter}
             )
             JOIN posts p ON (
-                p.post_id = CASE 
+                p.post_id = CASE
                     WHEN r.source_node_id = gt.post_id THEN r.target_node_id
                     ELSE r.source_node_id
                 END
             )
-            WHERE 
+            WHERE
                 gt.depth < :max_depth
                 AND NOT p.post_id = ANY(gt.path)  -- Avoid cycles
         )
-        SELECT DISTINCT 
+        SELECT
+            path[1] AS seed_id,
             post_id,
-            source_post_no,
-            content,
-            author,
-            timestamp
+            MIN(depth) AS depth
         FROM graph_traversal
-        ORDER BY source_post_no
-        LIMIT :max_nodes
+        GROUP BY path[1], post_id
         """
         )
 
@@ -109,22 +297,13 @@ class GraphTraverser:
             {
                 "start_ids": start_post_ids,
                 "max_depth": self.max_depth,
-                "max_nodes": self.max_nodes,
             },
         )
 
-        posts = []
+        distances: dict[UUID, dict[UUID, float]] = {}
         for row in result:
-            post = Post(
-                post_id=row.post_id,
-                source_post_no=row.source_post_no,
-                content=row.content,
-                author=row.author,
-                timestamp=row.timestamp,
-            )
-            posts.append(post)
-
-        return posts
+            distances.setdefault(row.seed_id, {})[row.post_id] = float(row.depth)
+        return distances
 
     def get_conversation_context(
         self, session: Session, start_post_ids: list[UUID]
@@ -138,10 +317,12 @@ class GraphTraverser:
         Returns:
             Dictionary containing posts and relationships
         """
-        # Get sequential context (structural relationships)
-        sequential_posts = self.get_related_posts_recursive(
-            session, start_post_ids, ["IS_SEQUENTIAL_TO"]
-        )
+        # Get sequential context (structural relationships), best-scoring posts first
+        with span("traversal.collect_candidates", seeds=len(start_post_ids)):
+            distances = self.collect_candidates(session, start_post_ids, [SEQUENTIAL_RELATIONSHIP])
+        scores = self.score_candidates(start_post_ids, distances)
+        with span("traversal.select_posts", candidates=len(scores)):
+            sequential_posts, post_tokens = self.select_posts(session, scores)
 
         # Use sequential posts as the context
         all_post_ids = set()
@@ -164,15 +345,21 @@ class GraphTraverser:
                     Relationship.target_node_id.in_(all_post_ids),
                 )
             )
-            relationships = list(session.execute(rel_query).scalars().all())
+            with span("traversal.relationships", posts=len(all_post_ids)):
+                relationships = list(session.execute(rel_query).scalars().all())
 
         return {
             "posts": all_posts,
             "relationships": relationships,
+            "scores": {p.post_id: scores[cast(UUID, p.post_id)] for p in all_posts},
+            # Reused by the context builder instead of tokenizing the posts again
+            "post_tokens": post_tokens,
             "stats": {
                 "total_posts": len(all_posts),
                 "sequential_posts": len(sequential_posts),
+                "candidate_posts": len(scores),
                 "total_relationships": len(relationships),
+                "context_tokens": sum(post_tokens.values()),
             },
         }
 
@@ -185,40 +372,6 @@ class GraphTraverser:
         Returns:
             Formatted string for LLM
         """
-        posts = context_data["posts"]
-        relationships = context_data["relationships"]
-
-        # Build post ID to number mapping
-        id_to_no = {p.post_id: p.source_post_no for p in posts}
-
-        # Format posts
-        formatted_posts = []
-        for post in posts:
-            author_name = post.author or "名無し"
-            timestamp_str = post.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-            formatted_posts.append(
-                f"No.{post.source_post_no} 名前：{author_name} "
-                f"投稿日：{timestamp_str}\n"
-                f"{post.content}\n"
-            )
-
-        # Format relationships
-        formatted_rels = []
-        for rel in relationships:
-            source_no = id_to_no.get(rel.source_node_id, "?")
-            target_no = id_to_no.get(rel.target_node_id, "?")
-            formatted_rels.append(f"- No.{source_no} {rel.relationship_type} No.{target_no}")
-
-        # Combine into final context
-        context = "=== CONVERSATION CONTEXT ===\n\n"
-        context += "Posts:\n" + "\n---\n".join(formatted_posts)
-
-        if formatted_rels:
-            context += "\n\n=== RELATIONSHIPS ===\n"
-            context += "\n".join(formatted_rels)
-
-        context += "\n\n=== STATISTICS ===\n"
-        for key, value in context_data["stats"].items():
-            context += f"- {key}: {value}\n"
-
+        context, tokens = self.context_builder.build(context_data)
+        context_data["stats"]["context_tokens"] = tokens
         return context
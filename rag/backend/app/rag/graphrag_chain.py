@@ -2,61 +2,154 @@
 
 import asyncio
 import logging
-from typing import Any, AsyncIterator, Optional, TypedDict
+import time
+from functools import lru_cache
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Optional,
+    TypedDict,
+    TypeVar,
+    cast,
+)
 from uuid import UUID
+from zoneinfo import ZoneInfo
 
-from langchain.callbacks.base import AsyncCallbackHandler
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackHandler
 from langchain_core.outputs import LLMResult
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 from sqlalchemy import select
 
+from app.core.admission import stages
 from app.core.config import settings
-from app.core.database import get_rag_db
+from app.core.database import get_rag_db, set_statement_timeout
+from app.core.metrics import (
+    BRANCH_HITS,
+    NODE_SECONDS,
+    PROMPT_TOKENS,
+    QUERY_PATHS,
+    STREAMED_TOKENS,
+    TIME_TO_FIRST_TOKEN,
+    time_async,
+)
+from app.core.tracing import span, traced
 from app.models.graph import Post
+from app.rag.chunking import covering_windows_where, window_post_ids
+from app.rag.citations import CitationScanner, find_post_numbers, post_citation
+from app.rag.filters import chroma_where, filter_post_ids
+from app.rag.graph_index import GraphIndex
 from app.rag.graph_traversal import GraphTraverser
+from app.rag.llm import create_chat_model, create_embeddings
+from app.rag.post_cache import PostRecord, post_cache
+from app.rag.pruning import prune_posts, rank_by_similarity
+from app.rag.retrieval import (
+    extract_keywords,
+    extract_post_numbers,
+    lexical_search,
+    lookup_post_ids,
+    lookup_post_numbers,
+    posts_in_time_range,
+    reciprocal_rank_fusion,
+)
+from app.rag.schemas import SearchFilters
+from app.rag.temporal import TimeRange, parse_time_range
+from app.rag.tokens import count_tokens
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class StreamingCallbackHandler(AsyncCallbackHandler):
-    """Callback handler for streaming tokens."""
+    """Callback handler for streaming tokens and the citations found in them."""
 
-    def __init__(self):
-        self.queue: asyncio.Queue[str] = asyncio.Queue()
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
         self.done = False
-
-    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.citation_scanner: Optional[CitationScanner] = None
+        self.context_posts: dict[int, Post] = {}
+        self.prompt_sent_at: Optional[float] = None
+        self.token_count = 0
+
+    def track_citations(self, posts: list[Post]) -> None:
+        """Resolve post references in the stream against the given context posts."""
+        self.citation_scanner = CitationScanner()
+        self.context_posts = {cast(int, p.source_post_no): p for p in posts}
+
+    async def on_llm_new_token(
+        self, token: str | list[str | dict[str, Any]], **kwargs: Any
+    ) -> None:
         """Put new token to queue."""
+        if not isinstance(token, str):
+            # Content-block tokens carry their text in the "text" field
+            token = "".join(b if isinstance(b, str) else b.get("text", "") for b in token)
         token_preview = token[:20] if len(token) > 20 else token
         logger.debug(f"StreamingCallbackHandler received token: {token_preview}")
-        await self.queue.put(token)
+        if self.token_count == 0 and self.prompt_sent_at is not None:
+            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - self.prompt_sent_at)
+        self.token_count += 1
+        await self.queue.put(("token", token))
+        if self.citation_scanner:
+            await self._emit_citations(self.citation_scanner.feed(token))
 
     async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
         """Mark streaming as done."""
+        STREAMED_TOKENS.observe(self.token_count)
+        if self.citation_scanner:
+            await self._emit_citations(self.citation_scanner.flush())
         self.done = True
 
-    async def on_llm_error(self, error: Exception, **kwargs: Any) -> None:
+    async def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
         """Handle errors."""
         logger.error(f"LLM error: {error}")
         self.done = True
 
-    async def aiter(self) -> AsyncIterator[str]:
-        """Async iterator for tokens."""
+    async def _emit_citations(self, post_numbers: list[int]) -> None:
+        for post_no in post_numbers:
+            # Posts outside the context are resolved once the answer is complete
+            post = self.context_posts.get(post_no)
+            if post is not None:
+                await self.queue.put(("citation", post_citation(post)))
+
+    async def aiter_events(self) -> AsyncIterator[tuple[str, Any]]:
+        """Async iterator for ("token", str) and ("citation", dict) events."""
         while not self.done or not self.queue.empty():
             try:
-                token = await asyncio.wait_for(self.queue.get(), timeout=0.1)
-                yield token
+                event = await asyncio.wait_for(self.queue.get(), timeout=0.1)
+                yield event
             except asyncio.TimeoutError:
                 if self.done:
                     break
                 continue
 
+    async def aiter(self) -> AsyncIterator[str]:
+        """Async iterator for tokens."""
+        async for kind, payload in self.aiter_events():
+            if kind == "token":
+                yield payload
+
+
+def merge_branch_results(
+    left: dict[str, list[UUID]], right: dict[str, list[UUID]]
+) -> dict[str, list[UUID]]:
+    """Combine the rankings written by parallel retrieval branches."""
+    return {**left, **right}
+
 
 class GraphRAGState(TypedDict):
     """State for GraphRAG workflow."""
 
     question: str
+    filters: Optional[SearchFilters]
+    query_path: str
+    time_range: Optional[TimeRange]
+    query_embedding: list[float]
+    branch_results: Annotated[dict[str, list[UUID]], merge_branch_results]
     vector_results: list[UUID]
     graph_context: dict[str, Any]
     formatted_context: str
@@ -68,65 +161,187 @@ class GraphRAGState(TypedDict):
 class GraphRAGChain:
     """GraphRAG chain using LangGraph."""
 
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            api_key=settings.openai_api_key,
+    def __init__(self) -> None:
+        self.embeddings = create_embeddings()
+        self.llm = create_chat_model()
+        graph_index = (
+            GraphIndex(refresh_interval=settings.graph_index_refresh_seconds)
+            if settings.graph_index_enabled
+            else None
         )
-        self.llm = ChatOpenAI(
-            model=settings.llm_model,
-            temperature=settings.llm_temperature,
-            api_key=settings.openai_api_key,
+        self.graph_traverser = GraphTraverser(
+            max_depth=3,
+            max_nodes=50,
+            graph_index=graph_index,
+            sequential_mode=settings.sequential_edge_mode,
+            sequential_window=settings.sequential_window,
+            decay=settings.expansion_decay,
+            token_budget=settings.context_token_budget,
+            post_cache=post_cache,
         )
-        self.graph_traverser = GraphTraverser(max_depth=3, max_nodes=50)
+        self._vectorstore: Optional[Any] = None
         self.workflow = self._build_workflow()
 
-    def _build_workflow(self) -> StateGraph:
+    def _get_vectorstore(self) -> Any:
+        """Get the shared Chroma vector store."""
+        if self._vectorstore is None:
+            # Import Chroma here to avoid circular imports
+            from langchain_chroma import Chroma
+
+            self._vectorstore = Chroma(
+                collection_name=settings.collection_name,
+                embedding_function=self.embeddings,
+                persist_directory=settings.chroma_persist_directory,
+            )
+        return self._vectorstore
+
+    def _build_workflow(
+        self,
+    ) -> CompiledStateGraph[GraphRAGState, None, GraphRAGState, GraphRAGState]:
         """Build the LangGraph workflow."""
         workflow = StateGraph(GraphRAGState)
 
-        # Add nodes
-        workflow.add_node("vector_retriever", self._vector_retriever)
-        workflow.add_node("graph_traverser", self._graph_traverser)
-        workflow.add_node("context_synthesizer", self._context_synthesizer)
-        workflow.add_node("response_generator", self._response_generator)
-        workflow.add_node("citation_extractor", self._citation_extractor)
+        # Retrieval branches run in parallel and are merged by rank fusion
+        branches = {
+            "vector_retriever": self._vector_retriever,
+            "lexical_retriever": self._lexical_retriever,
+        }
+        # Paths the query analyzer can take instead of the retrieval fan-out
+        routes = {"post_number": "graph_traverser", "temporal": "temporal_retriever"}
+
+        # Add nodes, each timed into the node duration histogram and traced
+        nodes = {
+            "query_analyzer": self._query_analyzer,
+            **branches,
+            "temporal_retriever": self._temporal_retriever,
+            "rank_fusion": self._rank_fusion,
+            "graph_traverser": self._graph_traverser,
+            "post_pruner": self._post_pruner,
+            "context_synthesizer": self._context_synthesizer,
+            "response_generator": self._response_generator,
+            "citation_extractor": self._citation_extractor,
+        }
+        for name, node in nodes.items():
+            workflow.add_node(name, traced(name, time_async(NODE_SECONDS, node, node=name)))
 
         # Add edges
-        workflow.set_entry_point("vector_retriever")
-        workflow.add_edge("vector_retriever", "graph_traverser")
-        workflow.add_edge("graph_traverser", "context_synthesizer")
+        workflow.add_edge(START, "query_analyzer")
+        workflow.add_conditional_edges(
+            "query_analyzer",
+            lambda state: routes.get(state["query_path"], list(branches)),
+            [*routes.values(), *branches],
+        )
+        # A time range without matching posts falls back to the retrieval fan-out
+        workflow.add_conditional_edges(
+            "temporal_retriever",
+            lambda state: "graph_traverser" if state["vector_results"] else list(branches),
+            ["graph_traverser", *branches],
+        )
+        workflow.add_edge(list(branches), "rank_fusion")
+        workflow.add_edge("rank_fusion", "graph_traverser")
+        workflow.add_edge("graph_traverser", "post_pruner")
+        workflow.add_edge("post_pruner", "context_synthesizer")
         workflow.add_edge("context_synthesizer", "response_generator")
         workflow.add_edge("response_generator", "citation_extractor")
         workflow.add_edge("citation_extractor", END)
 
         return workflow.compile()
 
-    async def _vector_retriever(self, state: GraphRAGState) -> GraphRAGState:
+    async def _query_analyzer(self, state: GraphRAGState) -> dict[str, Any]:
+        """Choose the retrieval path for the question.
+
+        Questions that name their posts (No.123, >>123) seed traversal
+        directly and skip the embedding call and all retrieval branches.
+        Time-scoped questions (昨日, 最新, ...) go to a timestamp range scan.
+        Everything else goes to the retrieval fan-out.
+        """
+        post_numbers = extract_post_numbers(state["question"])
+        post_ids = []
+        if post_numbers:
+            post_ids = await self._in_db(self._db_search, lookup_post_numbers, post_numbers)
+        time_range = parse_time_range(state["question"], tz=ZoneInfo(settings.board_timezone))
+
+        update: dict[str, Any]
+        if post_ids:
+            update = {"query_path": "post_number", "vector_results": post_ids}
+        elif time_range is not None:
+            update = {"query_path": "temporal", "time_range": time_range}
+        else:
+            update = {"query_path": "retrieval"}
+        QUERY_PATHS.inc(path=update["query_path"])
+        logger.info(f"Query path: {update['query_path']} (referenced posts: {post_numbers})")
+        return update
+
+    async def _run_branch(self, name: str, search: Awaitable[Any], default: Any) -> Any:
+        """Await a retrieval branch, degrading to ``default`` if it is slow or fails."""
+        try:
+            return await asyncio.wait_for(search, timeout=settings.retrieval_branch_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Retrieval branch {name} timed out after {settings.retrieval_branch_timeout}s"
+            )
+        except Exception as e:
+            logger.warning(f"Retrieval branch {name} failed: {e}")
+        return default
+
+    async def _vector_retriever(self, state: GraphRAGState) -> dict[str, Any]:
         """Retrieve relevant posts using vector similarity."""
         logger.info(f"Vector retrieval for question: {state['question']}")
 
-        # Import Chroma here to avoid circular imports
-        from langchain_chroma import Chroma
-
-        # Initialize Chroma vector store
-        vectorstore = Chroma(
-            collection_name=settings.collection_name,
-            embedding_function=self.embeddings,
-            persist_directory=settings.chroma_persist_directory,
+        post_ids, query_embedding = await self._run_branch(
+            "vector",
+            self._vector_search(state["question"], state["filters"], state["query_embedding"]),
+            ([], []),
+        )
+        logger.info(f"Vector branch found {len(post_ids)} relevant posts")
+        # The pruning stage reuses the query embedding
+        return {"query_embedding": query_embedding, "branch_results": {"vector": post_ids}}
+
+    async def _vector_search(
+        self,
+        question: str,
+        filters: Optional[SearchFilters],
+        query_embedding: Optional[list[float]] = None,
+    ) -> tuple[list[UUID], list[float]]:
+        vectorstore = self._get_vectorstore()
+
+        # Embed the question once, unless a batch caller already did
+        if not query_embedding:
+            query_embedding = await self._embed_query(question)
+
+        # Search for similar documents; filters are evaluated inside the search
+        # so scoped questions still get k hits from within the scope
+        docs = await asyncio.to_thread(
+            vectorstore.similarity_search_by_vector,
+            query_embedding,
+            k=settings.search_k,
+            filter=chroma_where(filters),
         )
+        post_ids = await self._in_db(self._posts_for_documents, docs, filters)
+        return post_ids, query_embedding
 
-        # Search for similar documents
-        docs = await asyncio.to_thread(vectorstore.similarity_search, state["question"], k=5)
+    def _posts_for_documents(
+        self, docs: list[Any], filters: Optional[SearchFilters] = None
+    ) -> list[UUID]:
+        """Extract post IDs from the metadata of retrieved documents.
 
-        # Extract post IDs from metadata
+        Micro-windows are matched by their first post only, so their member
+        posts are filtered again here.
+        """
         post_ids = []
         with get_rag_db() as session:
+            # Runs inside the vector branch, which gives up after the branch timeout
+            set_statement_timeout(session, settings.retrieval_branch_timeout)
             for doc in docs:
                 logger.debug(f"Document metadata: {doc.metadata}")
 
                 # Handle different metadata formats
-                if "source_post_no" in doc.metadata:
+                if "post_ids" in doc.metadata:
+                    # Micro-window format - member posts are listed in the metadata
+                    for post_id in window_post_ids(doc.metadata):
+                        if post_id not in post_ids:
+                            post_ids.append(post_id)
+                elif "source_post_no" in doc.metadata:
                     # GraphRAG index format
                     post = session.execute(
                         select(Post).where(
@@ -153,24 +368,193 @@ class GraphRAGChain:
                     for post in posts[:5]:
                         if post.post_id not in post_ids:
                             post_ids.append(post.post_id)
+            if any("post_ids" in doc.metadata for doc in docs):
+                post_ids = filter_post_ids(session, post_ids, filters)
+        return post_ids
 
-        state["vector_results"] = post_ids
-        logger.info(f"Found {len(post_ids)} relevant posts")
-        return state
+    async def _lexical_retriever(self, state: GraphRAGState) -> dict[str, Any]:
+        """Find posts containing the question's keywords."""
+        keywords = extract_keywords(state["question"])
+        post_ids = []
+        if keywords:
+            post_ids = await self._run_branch(
+                "lexical",
+                self._in_db(
+                    self._branch_search,
+                    lexical_search,
+                    keywords,
+                    settings.search_k,
+                    state["filters"],
+                ),
+                [],
+            )
+        return {"branch_results": {"lexical": post_ids}}
+
+    @staticmethod
+    def _db_search(search: Callable[..., T], *args: Any) -> T:
+        with get_rag_db() as session:
+            return search(session, *args)
+
+    @staticmethod
+    def _branch_search(search: Callable[..., T], *args: Any) -> T:
+        """Run a retrieval branch query that PostgreSQL stops once the branch times out."""
+        with get_rag_db() as session:
+            set_statement_timeout(session, settings.retrieval_branch_timeout)
+            return search(session, *args)
+
+    @staticmethod
+    async def _in_db(function: Callable[..., T], *args: Any) -> T:
+        """Run blocking DB work in a thread, bounded by the DB stage limit."""
+        return await stages.to_thread("db", function, *args)
+
+    async def _embed_query(self, question: str) -> list[float]:
+        async with stages.limit("embedding"):
+            with span("openai.embeddings", model=settings.embedding_model, inputs=1):
+                return await self.embeddings.aembed_query(question)
+
+    async def _temporal_retriever(self, state: GraphRAGState) -> dict[str, Any]:
+        """Seed traversal from posts inside the question's time range.
+
+        When nothing matches (or the range holds no posts), the question is
+        answered by the normal retrieval branches instead.
+        """
+        time_range = state["time_range"]
+        if time_range is None:
+            return {"query_path": "retrieval", "vector_results": []}
+        # "最新" asks for the newest posts themselves, not the best match among them
+        rerank = settings.temporal_rerank and not time_range.latest
+        limit = settings.temporal_candidate_limit if rerank else settings.fusion_max_seeds
+        post_ids = await self._in_db(
+            self._db_search, posts_in_time_range, time_range, limit, state["filters"]
+        )
+        logger.info(f"Temporal range {time_range} matched {len(post_ids)} posts")
+        if not post_ids:
+            return {"query_path": "retrieval", "vector_results": []}
+
+        update: dict[str, Any] = {}
+        if rerank and len(post_ids) > settings.fusion_max_seeds:
+            query_embedding = state["query_embedding"] or await self._embed_query(state["question"])
+            embeddings = await self._stored_embeddings(post_ids)
+            post_ids = rank_by_similarity(post_ids, embeddings, query_embedding)
+            update["query_embedding"] = query_embedding
+
+        update["vector_results"] = post_ids[: settings.fusion_max_seeds]
+        return update
+
+    async def _stored_embeddings(
+        self, post_ids: list[UUID], post_numbers: Optional[list[int]] = None
+    ) -> dict[UUID, list[float]]:
+        """Fetch the stored embeddings of posts from the vector store in one batch.
+
+        In a micro-window index each post gets the vector of the window that
+        contains it; sliding windows overlap, so there a post gets the mean
+        vector of the windows containing it.
+
+        Args:
+            post_ids: Posts to look up
+            post_numbers: Their post numbers, read from the DB if omitted and
+                needed to find windows
+        """
+        where: Optional[dict[str, Any]]
+        numbers: dict[UUID, int] = {}
+        if settings.index_chunking not in ("micro", "window"):
+            where = {"post_id": {"$in": [str(post_id) for post_id in post_ids]}}
+        else:
+            if post_numbers is not None:
+                numbers = dict(zip(post_ids, post_numbers))
+            else:
+                numbers = await self._in_db(self._db_search, lookup_post_ids, post_ids)
+            where = covering_windows_where(numbers.values())
+            if where is None:
+                return {}
+
+        result = await asyncio.to_thread(
+            self._get_vectorstore().get, where=where, include=["embeddings", "metadatas"]
+        )
+        wanted = set(post_ids)
+        embeddings: dict[UUID, list[float]] = {}
+        overlapping: dict[UUID, list[list[float]]] = {}
+        for metadata, embedding in zip(result["metadatas"], result["embeddings"]):
+            if not metadata:
+                continue
+            if "post_ids" in metadata:
+                for post_id in window_post_ids(metadata):
+                    if post_id in wanted:
+                        embeddings[post_id] = embedding
+            elif "post_id" in metadata:
+                embeddings[UUID(metadata["post_id"])] = embedding
+            elif "start_no" in metadata and "end_no" in metadata:
+                start_no, end_no = int(metadata["start_no"]), int(metadata["end_no"])
+                for post_id, no in numbers.items():
+                    if start_no <= no <= end_no:
+                        overlapping.setdefault(post_id, []).append(embedding)
+        for post_id, vectors in overlapping.items():
+            embeddings[post_id] = np.mean(vectors, axis=0).tolist()
+        return embeddings
+
+    async def _rank_fusion(self, state: GraphRAGState) -> dict[str, Any]:
+        """Merge the branch rankings into the seeds for graph traversal."""
+        branch_results = state["branch_results"]
+        vector_results = reciprocal_rank_fusion(
+            branch_results, k=settings.rrf_k, limit=settings.fusion_max_seeds
+        )
+        counts = ", ".join(f"{name}={len(ids)}" for name, ids in branch_results.items())
+        logger.info(f"Fused {len(vector_results)} seed posts from branches ({counts})")
+        return {"vector_results": vector_results}
 
     async def _graph_traverser(self, state: GraphRAGState) -> GraphRAGState:
         """Traverse the graph to collect context."""
         logger.info("Starting graph traversal")
 
-        with get_rag_db() as session:
-            context = self.graph_traverser.get_conversation_context(
-                session, state["vector_results"]
-            )
+        context = await self._in_db(self._traverse, state["vector_results"])
+        context["stats"]["query_path"] = state["query_path"]
+        context["stats"]["branch_hits"] = {
+            name: len(ids) for name, ids in state["branch_results"].items()
+        }
+        for name, hits in context["stats"]["branch_hits"].items():
+            BRANCH_HITS.observe(hits, branch=name)
 
         state["graph_context"] = context
         logger.info(f"Collected {context['stats']['total_posts']} posts from graph")
         return state
 
+    def _traverse(self, post_ids: list[UUID]) -> dict[str, Any]:
+        with get_rag_db() as session:
+            return self.graph_traverser.get_conversation_context(session, post_ids)
+
+    async def _post_pruner(self, state: GraphRAGState) -> GraphRAGState:
+        """Drop expanded posts that are unrelated to the question."""
+        context = state["graph_context"]
+        posts = context.get("posts", [])
+        if settings.prune_top_n <= 0 or len(posts) <= settings.prune_top_n:
+            return state
+        if not state.get("query_embedding"):
+            return state
+
+        embeddings = await self._stored_embeddings(
+            [p.post_id for p in posts], [p.source_post_no for p in posts]
+        )
+
+        kept = prune_posts(
+            posts,
+            embeddings,
+            state["query_embedding"],
+            top_n=settings.prune_top_n,
+            neighbor_window=settings.prune_neighbor_window,
+        )
+        kept_ids = {p.post_id for p in kept}
+        context["posts"] = kept
+        context["relationships"] = [
+            r
+            for r in context.get("relationships", [])
+            if r.source_node_id in kept_ids and r.target_node_id in kept_ids
+        ]
+        context["stats"]["pruned_posts"] = len(posts) - len(kept)
+        context["stats"]["total_posts"] = len(kept)
+
+        logger.info(f"Pruned graph context from {len(posts)} to {len(kept)} posts")
+        return state
+
     async def _context_synthesizer(self, state: GraphRAGState) -> GraphRAGState:
         """Synthesize context for LLM."""
         logger.info("Synthesizing context")
@@ -205,15 +589,28 @@ class GraphRAGChain:
             {"role": "user", "content": user_prompt},
         ]
 
+        prompt_tokens = count_tokens(system_prompt) + count_tokens(user_prompt)
+        PROMPT_TOKENS.observe(prompt_tokens)
+        state["graph_context"].setdefault("stats", {})["prompt_tokens"] = prompt_tokens
+        logger.info(f"Prompt size: {prompt_tokens} tokens")
+
         # Use streaming handler if provided
-        if state.get("streaming_handler"):
-            response = await self.llm.ainvoke(
-                messages,
-                config={"callbacks": [state["streaming_handler"]]},
-                stream=True,  # Enable streaming for ChatOpenAI
-            )
+        handler = state.get("streaming_handler")
+        if handler:
+            if isinstance(handler, StreamingCallbackHandler):
+                handler.track_citations(state["graph_context"].get("posts", []))
+                handler.prompt_sent_at = time.perf_counter()
+            async with stages.limit("llm"):
+                with span("openai.chat", model=settings.llm_model, stream=True):
+                    response = await self.llm.ainvoke(
+                        messages,
+                        config={"callbacks": [handler]},
+                        stream=True,  # Enable streaming for ChatOpenAI
+                    )
         else:
-            response = await self.llm.ainvoke(messages)
+            async with stages.limit("llm"):
+                with span("openai.chat", model=settings.llm_model, stream=False):
+                    response = await self.llm.ainvoke(messages)
 
         state["answer"] = response.content
         return state
@@ -222,75 +619,59 @@ class GraphRAGChain:
         """Extract citations from the answer."""
         logger.info("Extracting citations")
 
-        import re
-
         # Extract post numbers from the answer (No.XXX format)
-        post_numbers = re.findall(r"No\.(\d+)", state["answer"])
+        post_numbers = find_post_numbers(state["answer"])
         logger.info(f"Found post numbers in answer: {post_numbers}")
 
-        citations = []
-        if post_numbers:
-            with get_rag_db() as session:
-                for post_no in post_numbers:
-                    try:
-                        post_no_int = int(post_no)
-                        post = session.execute(
-                            select(Post).where(Post.source_post_no == post_no_int)
-                        ).scalar_one_or_none()
-
-                        if post:
-                            # Create citation info
-                            citation = {
-                                "source_post_no": post.source_post_no,
-                                "author": post.author or "名無し",
-                                "timestamp": post.timestamp.isoformat(),
-                                "content_excerpt": (
-                                    post.content[:200] + "..."
-                                    if len(post.content) > 200
-                                    else post.content
-                                ),
-                            }
-                            citations.append(citation)
-                            logger.info(f"Added citation for No.{post_no}")
-                    except (ValueError, Exception) as e:
-                        logger.warning(f"Failed to extract citation for No.{post_no}: {e}")
+        # Most citations resolve against the posts already in the context
+        context_posts = state["graph_context"].get("posts", [])
+        posts_by_no = {p.source_post_no: p for p in context_posts}
+        missing = [no for no in post_numbers if no not in posts_by_no]
+        if missing:
+            posts_by_no.update(await self._in_db(self._cached_posts, missing))
+
+        citations = [post_citation(posts_by_no[no]) for no in post_numbers if no in posts_by_no]
 
         # Also add citations from the context that were used
-        if "posts" in state["graph_context"]:
-            context_posts = state["graph_context"]["posts"]
-            # Limit to top 5 most relevant posts not already in citations
-            cited_nos = {c["source_post_no"] for c in citations}
-
-            for post in context_posts[:10]:  # Check top 10 posts
-                if post.source_post_no not in cited_nos and len(citations) < 5:
-                    citation = {
-                        "source_post_no": post.source_post_no,
-                        "author": post.author or "名無し",
-                        "timestamp": post.timestamp.isoformat(),
-                        "content_excerpt": (
-                            post.content[:200] + "..." if len(post.content) > 200 else post.content
-                        ),
-                    }
-                    citations.append(citation)
+        cited_nos = {c["source_post_no"] for c in citations}
+        for post in context_posts[:10]:  # Check top 10 posts
+            if post.source_post_no not in cited_nos and len(citations) < 5:
+                citations.append(post_citation(post))
 
         state["citations"] = citations
         logger.info(f"Total citations: {len(citations)}")
         return state
 
+    @staticmethod
+    def _cached_posts(post_numbers: list[int]) -> dict[int, PostRecord]:
+        with get_rag_db() as session:
+            return post_cache.get_many(session, post_numbers)
+
     async def ainvoke(
-        self, question: str, streaming_handler: Optional[AsyncCallbackHandler] = None
+        self,
+        question: str,
+        streaming_handler: Optional[AsyncCallbackHandler] = None,
+        filters: Optional[SearchFilters] = None,
+        query_embedding: Optional[list[float]] = None,
     ) -> dict[str, Any]:
         """Invoke the GraphRAG chain.
 
         Args:
             question: User's question
             streaming_handler: Optional callback handler for streaming
+            filters: Optional filters applied to retrieval of the seed posts
+            query_embedding: Precomputed embedding of the question, if any
 
         Returns:
             Dictionary with answer and context
         """
         initial_state = GraphRAGState(
             question=question,
+            filters=filters,
+            query_path="",
+            time_range=None,
+            query_embedding=query_embedding or [],
+            branch_results={},
             vector_results=[],
             graph_context={},
             formatted_context="",
@@ -308,6 +689,45 @@ class GraphRAGChain:
             "stats": result["graph_context"].get("stats", {}),
         }
 
+    async def abatch(
+        self,
+        questions: list[str],
+        filters: Optional[SearchFilters] = None,
+        max_concurrency: int = 4,
+    ) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """Answer many questions without streaming.
+
+        All questions are embedded in one embeddings call up front, then run
+        through the workflow with at most ``max_concurrency`` in flight. A
+        failing question yields an ``error`` entry instead of aborting the batch.
+
+        Args:
+            questions: Questions to answer
+            filters: Optional filters applied to every question
+            max_concurrency: Maximum number of questions answered at once
+
+        Yields:
+            (index into questions, result) pairs in completion order
+        """
+        async with stages.limit("embedding"):
+            with span("openai.embeddings", model=settings.embedding_model, inputs=len(questions)):
+                embeddings = await self.embeddings.aembed_documents(questions)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def answer(index: int) -> tuple[int, dict[str, Any]]:
+            async with semaphore:
+                try:
+                    result = await self.ainvoke(
+                        questions[index], filters=filters, query_embedding=embeddings[index]
+                    )
+                except Exception as e:
+                    logger.error(f"Batch question {index} failed: {e}")
+                    return index, {"error": str(e)}
+                return index, result
+
+        for task in asyncio.as_completed([answer(i) for i in range(len(questions))]):
+            yield await task
+
     async def astream(self, question: str) -> AsyncIterator[str]:
         """Stream the answer for a question.
 
@@ -343,5 +763,7 @@ class GraphRAGChain:
             raise
 
 
-# Global GraphRAG chain instance
-graphrag_chain = GraphRAGChain()
+@lru_cache(maxsize=1)
+def get_graphrag_chain() -> GraphRAGChain:
+    """Get the process-wide GraphRAG chain, building it on first use."""
+    return GraphRAGChain()
@@ -0,0 +1,39 @@
+"""OpenAI model factories sharing one HTTP connection pool."""
+
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import settings
+from app.core.http import get_async_http_client, get_http_client
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+
+def create_embeddings() -> "OpenAIEmbeddings":
+    """Create the embedding model on the shared connection pool."""
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model=settings.embedding_model,
+        api_key=settings.openai_api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+
+
+def create_chat_model(**kwargs: Any) -> "ChatOpenAI":
+    """Create the chat model on the shared connection pool.
+
+    Args:
+        **kwargs: Extra ChatOpenAI options such as ``streaming``
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=settings.llm_model,
+        temperature=settings.llm_temperature,
+        api_key=settings.openai_api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        **kwargs,
+    )
@@ -18,6 +18,7 @@ class PostgresResLoader(BaseLoader):
         query: Optional[str] = None,
         start_no: Optional[int] = None,
         end_no: Optional[int] = None,
+        fetch_size: int = 1000,
     ):
         """Initialize the loader.
 
@@ -26,8 +27,10 @@ class PostgresResLoader(BaseLoader):
             query: Custom SQL query to fetch data
             start_no: Starting post number (inclusive)
             end_no: Ending post number (inclusive)
+            fetch_size: Rows fetched from the server per round trip
         """
         self.connection_string = connection_string or settings.database_url
+        self.fetch_size = fetch_size
 
         if query:
             self.query = query
@@ -58,7 +61,9 @@ class PostgresResLoader(BaseLoader):
 
         try:
             connection = psycopg2.connect(self.connection_string)
-            cursor = connection.cursor()
+            # A named (server-side) cursor streams rows instead of buffering the result
+            cursor = connection.cursor(name="res_loader")
+            cursor.itersize = self.fetch_size
 
             cursor.execute(self.query)
 
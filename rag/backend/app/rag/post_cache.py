@@ -0,0 +1,173 @@
+"""Bounded in-process cache of rendered post records."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional, cast
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.graph import Post
+from app.rag.context_builder import format_post
+
+
+@dataclass(frozen=True)
+class PostRecord:
+    """Detached copy of a post together with its LLM context rendering."""
+
+    post_id: UUID
+    source_post_no: int
+    author: Optional[str]
+    timestamp: datetime
+    content: str
+    updated_at: Optional[datetime]
+    text: str
+
+    @classmethod
+    def from_post(cls, post: Post) -> "PostRecord":
+        """Copy a post out of its session and render it once."""
+        return cls(
+            post_id=cast(UUID, post.post_id),
+            source_post_no=cast(int, post.source_post_no),
+            author=cast(Optional[str], post.author),
+            timestamp=cast(datetime, post.timestamp),
+            content=cast(str, post.content),
+            updated_at=cast(Optional[datetime], post.updated_at),
+            text=format_post(post),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Format the record for the posts API."""
+        return {
+            "source_post_no": self.source_post_no,
+            "author": self.author or "名無し",
+            "timestamp": self.timestamp.isoformat(),
+            "content": self.content,
+        }
+
+
+class PostCache:
+    """LRU cache of post records keyed by source post number.
+
+    Posts are edited by the sync process, whose cache is not this one, so
+    every read checks the cached records against the posts' current
+    ``updated_at``. Entries also expire after ``ttl`` seconds.
+    """
+
+    def __init__(
+        self, max_size: int = 10000, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached posts
+            ttl: Seconds a cached post is kept before it is re-read
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[float, PostRecord]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, no: int) -> Optional[PostRecord]:
+        entry = self._entries.get(no)
+        if entry is None:
+            return None
+        if self._clock() >= entry[0]:
+            del self._entries[no]
+            return None
+        self._entries.move_to_end(no)
+        return entry[1]
+
+    def _put(self, record: PostRecord) -> None:
+        self._entries[record.source_post_no] = (self._clock() + self.ttl, record)
+        self._entries.move_to_end(record.source_post_no)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, session: Session, nos: Iterable[int]) -> dict[int, PostRecord]:
+        """Return the records of the given post numbers that exist.
+
+        Cached posts are checked against their current ``updated_at`` in one
+        query that reads no post bodies; edited, deleted and uncached posts
+        are then loaded with a single query and cached.
+
+        Args:
+            session: RAG DB session
+            nos: Source post numbers
+
+        Returns:
+            Records keyed by post number (missing posts are omitted)
+        """
+        nos = list(dict.fromkeys(nos))
+        found: dict[int, PostRecord] = {}
+        with self._lock:
+            for no in nos:
+                record = self._get(no)
+                if record is not None:
+                    found[no] = record
+
+        if found:
+            current = {
+                no: updated_at
+                for no, updated_at in session.execute(
+                    select(Post.source_post_no, Post.updated_at).where(
+                        Post.source_post_no.in_(list(found))
+                    )
+                ).all()
+            }
+            stale = [
+                no
+                for no, record in found.items()
+                if no not in current or current[no] != record.updated_at
+            ]
+            with self._lock:
+                for no in stale:
+                    del found[no]
+                    self._entries.pop(no, None)
+
+        missing = [no for no in nos if no not in found]
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            posts = session.execute(select(Post).where(Post.source_post_no.in_(missing))).scalars()
+            records = [PostRecord.from_post(post) for post in posts]
+            with self._lock:
+                for record in records:
+                    self._put(record)
+                    found[record.source_post_no] = record
+        return found
+
+    def render(self, post: Post) -> str:
+        """Return the LLM context text of a loaded post, caching its record."""
+        with self._lock:
+            record = self._get(cast(int, post.source_post_no))
+            if record is None or record.updated_at != post.updated_at:
+                record = PostRecord.from_post(post)
+                self._put(record)
+        return record.text
+
+    def invalidate(self, nos: Optional[Iterable[int]] = None) -> None:
+        """Drop the given post numbers, or every post when none are given."""
+        with self._lock:
+            if nos is None:
+                self._entries.clear()
+                return
+            for no in nos:
+                self._entries.pop(no, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+post_cache = PostCache(settings.post_cache_size, settings.post_cache_ttl_seconds)
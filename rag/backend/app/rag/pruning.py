@@ -0,0 +1,85 @@
+"""Embedding-based pruning of graph-expanded posts."""
+
+from typing import Mapping, Sequence, cast
+from uuid import UUID
+
+import numpy as np
+
+from app.models.graph import Post
+
+
+def _cosine_similarities(
+    matrix: Sequence[Sequence[float]], query_embedding: Sequence[float]
+) -> np.ndarray:
+    vectors = np.asarray(matrix, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+    similarities: np.ndarray = vectors @ query / np.maximum(norms, 1e-12)
+    return similarities
+
+
+def rank_by_similarity(
+    post_ids: list[UUID],
+    embeddings: Mapping[UUID, Sequence[float]],
+    query_embedding: Sequence[float],
+) -> list[UUID]:
+    """Order posts by similarity to the question.
+
+    Posts without a stored embedding keep their relative order after the
+    scored ones.
+
+    Args:
+        post_ids: Candidate post IDs
+        embeddings: Stored embeddings keyed by post ID
+        query_embedding: Embedding of the question
+
+    Returns:
+        Post IDs, most similar first
+    """
+    scored = [post_id for post_id in post_ids if post_id in embeddings]
+    unscored = [post_id for post_id in post_ids if post_id not in embeddings]
+    if not scored:
+        return unscored
+
+    similarities = _cosine_similarities([embeddings[p] for p in scored], query_embedding)
+    order = np.argsort(-similarities, kind="stable")
+    return [scored[i] for i in order] + unscored
+
+
+def prune_posts(
+    posts: list[Post],
+    embeddings: Mapping[UUID, Sequence[float]],
+    query_embedding: Sequence[float],
+    top_n: int,
+    neighbor_window: int = 1,
+) -> list[Post]:
+    """Keep the posts most similar to the question and their sequential neighbours.
+
+    All candidates are scored with a single matrix product against the query
+    embedding. Posts without a stored embedding can only survive as neighbours.
+
+    Args:
+        posts: Graph-expanded posts
+        embeddings: Stored embeddings keyed by post ID
+        query_embedding: Embedding of the question
+        top_n: Number of most similar posts to keep
+        neighbor_window: Posts kept on either side of each top post
+
+    Returns:
+        Kept posts ordered by post number
+    """
+    ordered = sorted(posts, key=lambda p: cast(int, p.source_post_no))
+    scored = [i for i, post in enumerate(ordered) if post.post_id in embeddings]
+    if len(ordered) <= top_n or not scored:
+        return ordered
+
+    similarities = _cosine_similarities(
+        [embeddings[cast(UUID, ordered[i].post_id)] for i in scored], query_embedding
+    )
+
+    top = np.asarray(scored)[np.argsort(-similarities, kind="stable")[:top_n]]
+    keep = np.zeros(len(ordered), dtype=bool)
+    for offset in range(-neighbor_window, neighbor_window + 1):
+        keep[np.clip(top + offset, 0, len(ordered) - 1)] = True
+
+    return [post for post, kept in zip(ordered, keep) if kept]
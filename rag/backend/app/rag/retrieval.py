@@ -0,0 +1,171 @@
+"""Retrieval branches and rank fusion for the GraphRAG workflow."""
+
+import re
+from typing import Any, Iterable, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.graph import Post
+from app.rag.filters import filter_posts
+from app.rag.schemas import SearchFilters
+from app.rag.temporal import TimeRange
+
+# Explicit post references in a question, e.g. "No.123" or ">>123"
+POST_REFERENCE_PATTERN = re.compile(r"(?:No\.|>>|＞＞)\s*(\d+)")
+# Runs of kanji, katakana or ASCII alphanumerics long enough to be a search term
+KEYWORD_PATTERN = re.compile(r"[一-龯々]{2,}|[ァ-ヴー]{2,}|[A-Za-z0-9]{2,}")
+# Near-duplicates share the post number of their cluster representative
+CLUSTER_KEY = func.coalesce(Post.duplicate_of_no, Post.source_post_no)
+# Extra rows fetched so that collapsing duplicates still leaves enough results
+COLLAPSE_OVERFETCH = 2
+# Shortest term searched at all; most Japanese keywords are two kanji long
+MIN_LEXICAL_TERM_LENGTH = 2
+# Shortest term the pg_trgm index on posts.content can serve (one trigram)
+MIN_TRIGRAM_TERM_LENGTH = 3
+# Terms with ASCII letters are matched case-insensitively
+ASCII_LETTER_PATTERN = re.compile(r"[A-Za-z]")
+# Characters with a special meaning in LIKE patterns
+LIKE_SPECIAL_PATTERN = re.compile(r"([\\%_])")
+STOP_WORDS = {"教えて", "ください", "について", "投稿", "レス", "スレ", "内容", "流れ"}
+
+
+def extract_post_numbers(question: str) -> list[int]:
+    """Return the post numbers the question refers to explicitly."""
+    return list(dict.fromkeys(int(no) for no in POST_REFERENCE_PATTERN.findall(question)))
+
+
+def extract_keywords(question: str) -> list[str]:
+    """Return lexical search terms from the question."""
+    text = POST_REFERENCE_PATTERN.sub(" ", question)
+    return [t for t in dict.fromkeys(KEYWORD_PATTERN.findall(text)) if t not in STOP_WORDS]
+
+
+def collapse_duplicates(rows: Iterable[Sequence[Any]], limit: int) -> list[UUID]:
+    """Keep the first post of each near-duplicate cluster, preserving rank order."""
+    seen = set()
+    post_ids = []
+    for post_id, cluster in rows:
+        if cluster not in seen:
+            seen.add(cluster)
+            post_ids.append(post_id)
+    return post_ids[:limit]
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so a term matches literally, with backslash as escape."""
+    return LIKE_SPECIAL_PATTERN.sub(r"\\\1", term)
+
+
+def lookup_post_numbers(session: Session, post_numbers: Sequence[int]) -> list[UUID]:
+    """Resolve post numbers to post IDs, keeping the given order."""
+    if not post_numbers:
+        return []
+    rows = session.execute(
+        select(Post.source_post_no, Post.post_id).where(Post.source_post_no.in_(post_numbers))
+    ).all()
+    by_no = {no: post_id for no, post_id in rows}
+    return [by_no[no] for no in post_numbers if no in by_no]
+
+
+def lookup_post_ids(session: Session, post_ids: Sequence[UUID]) -> dict[UUID, int]:
+    """Resolve post IDs to their post numbers."""
+    if not post_ids:
+        return {}
+    rows = session.execute(
+        select(Post.post_id, Post.source_post_no).where(Post.post_id.in_(post_ids))
+    ).all()
+    return {post_id: no for post_id, no in rows}
+
+
+def posts_in_time_range(
+    session: Session,
+    time_range: TimeRange,
+    limit: int,
+    filters: Optional[SearchFilters] = None,
+) -> list[UUID]:
+    """Return the newest posts inside a time range, newest first.
+
+    Both bounds are applied to the indexed ``posts.timestamp`` column, so this
+    is a single index range scan.
+    """
+    query = select(Post.post_id, CLUSTER_KEY)
+    if time_range.start is not None:
+        query = query.where(Post.timestamp >= time_range.start)
+    if time_range.end is not None:
+        query = query.where(Post.timestamp < time_range.end)
+    query = (
+        filter_posts(query, filters)
+        .order_by(Post.timestamp.desc())
+        .limit(limit * COLLAPSE_OVERFETCH)
+    )
+    return collapse_duplicates(session.execute(query).all(), limit)
+
+
+def lexical_search(
+    session: Session,
+    terms: Sequence[str],
+    limit: int,
+    filters: Optional[SearchFilters] = None,
+) -> list[UUID]:
+    """Return posts containing the most search terms, newest first among ties.
+
+    With ``lexical_bigram_index`` every term is served by the pg_bigm index
+    (``scripts/add_bigram_index.py``). Otherwise matching relies on the
+    pg_trgm index (``scripts/add_trigram_index.py``), which cannot narrow a
+    two-character pattern: those terms are used only when the question has
+    no longer ones, and then only the newest ``lexical_short_term_scan_posts``
+    posts are scanned.
+    """
+    terms = [term for term in terms if len(term) >= MIN_LEXICAL_TERM_LENGTH]
+    bounded = False
+    if not settings.lexical_bigram_index:
+        long_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM_LENGTH]
+        bounded = bool(terms) and not long_terms
+        terms = long_terms or terms
+    if not terms:
+        return []
+
+    # pg_bigm serves LIKE only; Japanese has no case, so only ASCII terms need ILIKE
+    matches = [
+        (
+            Post.content.ilike(f"%{escape_like(term)}%", escape="\\")
+            if ASCII_LETTER_PATTERN.search(term)
+            else Post.content.like(f"%{escape_like(term)}%", escape="\\")
+        )
+        for term in terms
+    ]
+    hits = sum(case((match, 1), else_=0) for match in matches)
+    query = select(Post.post_id, CLUSTER_KEY).where(or_(*matches))
+    if bounded:
+        newest = select(func.max(Post.source_post_no)).scalar_subquery()
+        query = query.where(Post.source_post_no > newest - settings.lexical_short_term_scan_posts)
+    query = (
+        filter_posts(query, filters)
+        .order_by(hits.desc(), Post.source_post_no.desc())
+        .limit(limit * COLLAPSE_OVERFETCH)
+    )
+    return collapse_duplicates(session.execute(query).all(), limit)
+
+
+def reciprocal_rank_fusion(
+    rankings: dict[str, list[UUID]], k: int = 60, limit: int | None = None
+) -> list[UUID]:
+    """Merge ranked lists with reciprocal-rank fusion.
+
+    Args:
+        rankings: Ranked post IDs per retrieval branch
+        k: RRF damping constant
+        limit: Maximum number of post IDs to return
+
+    Returns:
+        Post IDs ordered by fused score
+    """
+    scores: dict[UUID, float] = {}
+    for ranking in rankings.values():
+        for rank, post_id in enumerate(dict.fromkeys(ranking)):
+            scores[post_id] = scores.get(post_id, 0.0) + 1.0 / (k + rank + 1)
+    fused = sorted(scores, key=lambda post_id: scores[post_id], reverse=True)
+    return fused[:limit] if limit is not None else fused
@@ -1,10 +1,21 @@
 """Data structures for the RAG pipeline."""
 
-from typing import Optional
+from datetime import datetime as dt
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
 
+class SearchFilters(BaseModel):
+    """Filters applied inside the search instead of to its results."""
+
+    post_no_from: Optional[int] = Field(default=None, description="Lowest post number to search")
+    post_no_to: Optional[int] = Field(default=None, description="Highest post number to search")
+    since: Optional[dt] = Field(default=None, description="Only posts at or after this time")
+    until: Optional[dt] = Field(default=None, description="Only posts before this time")
+    author: Optional[str] = Field(default=None, description="Only posts by this name and trip")
+
+
 class QuestionRequest(BaseModel):
     """Request model for asking questions."""
 
@@ -12,6 +23,32 @@ class QuestionRequest(BaseModel):
     conversation_id: Optional[str] = Field(
         None, description="Optional conversation ID for tracking"
     )
+    filters: Optional[SearchFilters] = Field(
+        None, description="Optional post number, time and author filters"
+    )
+
+
+class BatchQuestionRequest(BaseModel):
+    """Request model for answering many questions at once."""
+
+    questions: list[str] = Field(..., min_length=1, description="Questions to answer")
+    filters: Optional[SearchFilters] = Field(
+        None, description="Optional filters applied to every question"
+    )
+    format: Literal["json", "ndjson"] = Field(
+        "json", description="One JSON document, or one JSON line per answer as it completes"
+    )
+
+
+class BatchAnswer(BaseModel):
+    """One answer of a batch request."""
+
+    index: int = Field(..., description="Position of the question in the request")
+    question: str = Field(..., description="The question that was asked")
+    answer: Optional[str] = Field(default=None, description="The generated answer")
+    citations: list[dict[str, Any]] = Field(default_factory=list, description="Cited posts")
+    stats: dict[str, Any] = Field(default_factory=dict, description="Retrieval statistics")
+    error: Optional[str] = Field(default=None, description="Error message if the question failed")
 
 
 class StreamToken(BaseModel):
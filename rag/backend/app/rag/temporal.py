@@ -0,0 +1,140 @@
+"""Parsing of Japanese time expressions into post timestamp ranges."""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Optional
+
+LATEST_PATTERN = re.compile(r"最新|最近|直近|新しい")
+# Words that may surround 最新 in a question asking only for the newest posts
+LATEST_FILLER_PATTERN = re.compile(
+    r"投稿|レス|書き込み|スレッド|スレ|話題|流れ|内容|教えて|ください|見せて|どんな|なに|何"
+    r"|[のはをがにでもとやかな]|[\s、。・！？!?]"
+)
+FULL_DATE_PATTERN = re.compile(r"(\d{4})[年/-](\d{1,2})[月/-](\d{1,2})日?")
+MONTH_DAY_PATTERN = re.compile(r"(\d{1,2})月(\d{1,2})日")
+HOURS_AGO_PATTERN = re.compile(r"(\d+)時間(?:前|以内)")
+DAYS_WITHIN_PATTERN = re.compile(r"(?:(\d+)日以内|ここ(\d+)日)")
+DAYS_AGO_PATTERN = re.compile(r"(\d+)日前")
+
+# Relative day names mapped to (day offset from today, start hour, end hour)
+DAY_PARTS: dict[str, tuple[int, int, int]] = {
+    "今朝": (0, 4, 12),
+    "昨夜": (-1, 18, 30),
+    "昨晩": (-1, 18, 30),
+    "今夜": (0, 18, 24),
+    "今晩": (0, 18, 24),
+    "一昨日": (-2, 0, 24),
+    "おととい": (-2, 0, 24),
+    "昨日": (-1, 0, 24),
+    "今日": (0, 0, 24),
+    "本日": (0, 0, 24),
+}
+
+
+@dataclass(frozen=True)
+class TimeRange:
+    """A half-open timestamp range, or a request for the newest posts."""
+
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    latest: bool = False
+
+
+def _day_start(day: date, tz: Optional[tzinfo]) -> datetime:
+    return datetime.combine(day, time(), tzinfo=tz)
+
+
+def _asks_only_for_latest(text: str) -> bool:
+    """Whether the question asks for the newest posts and nothing more specific.
+
+    "最新の投稿は？" qualifies, while "最近の猫の話題" or "新しいiPhoneの話" name a
+    topic and are left to the normal retrieval branches.
+    """
+    if not LATEST_PATTERN.search(text):
+        return False
+    return not LATEST_FILLER_PATTERN.sub("", LATEST_PATTERN.sub("", text))
+
+
+def _absolute_date(text: str, today: date) -> Optional[date]:
+    match = FULL_DATE_PATTERN.search(text)
+    if match:
+        year, month, day = (int(g) for g in match.groups())
+    else:
+        match = MONTH_DAY_PATTERN.search(text)
+        if not match:
+            return None
+        year, month, day = today.year, int(match.group(1)), int(match.group(2))
+        if (month, day) > (today.month, today.day):
+            # "12月31日" asked in January means last year
+            year -= 1
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_time_range(
+    question: str, now: Optional[datetime] = None, tz: Optional[tzinfo] = None
+) -> Optional[TimeRange]:
+    """Extract the time range a question is scoped to.
+
+    Absolute dates take precedence over relative expressions; a question that
+    only asks for the newest posts, without naming a topic, yields an open
+    range with ``latest`` set.
+
+    Args:
+        question: User's question
+        now: Reference time (defaults to the current time in ``tz``)
+        tz: Time zone the expressions are interpreted in
+
+    Returns:
+        The time range, or None if the question is not time-scoped
+    """
+    now = now or datetime.now(tz)
+    tz = tz or now.tzinfo
+    today = now.astimezone(tz).date() if now.tzinfo else now.date()
+    text = unicodedata.normalize("NFKC", question)
+
+    day = _absolute_date(text, today)
+    if day is not None:
+        start = _day_start(day, tz)
+        return TimeRange(start, start + timedelta(days=1))
+
+    match = HOURS_AGO_PATTERN.search(text)
+    if match:
+        return TimeRange(now - timedelta(hours=int(match.group(1))), now)
+
+    match = DAYS_WITHIN_PATTERN.search(text)
+    if match:
+        days = int(match.group(1) or match.group(2))
+        return TimeRange(now - timedelta(days=days), now)
+
+    match = DAYS_AGO_PATTERN.search(text)
+    if match:
+        start = _day_start(today - timedelta(days=int(match.group(1))), tz)
+        return TimeRange(start, start + timedelta(days=1))
+
+    for word, (day_offset, start_hour, end_hour) in DAY_PARTS.items():
+        if word in text:
+            base = _day_start(today + timedelta(days=day_offset), tz)
+            return TimeRange(base + timedelta(hours=start_hour), base + timedelta(hours=end_hour))
+
+    if "今週" in text or "先週" in text:
+        week_start = _day_start(today - timedelta(days=today.weekday()), tz)
+        if "先週" in text:
+            return TimeRange(week_start - timedelta(days=7), week_start)
+        return TimeRange(week_start, now)
+
+    if "今月" in text or "先月" in text:
+        month_start = _day_start(today.replace(day=1), tz)
+        if "先月" in text:
+            previous = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+            return TimeRange(_day_start(previous, tz), month_start)
+        return TimeRange(month_start, now)
+
+    if _asks_only_for_latest(text):
+        return TimeRange(latest=True)
+
+    return None
@@ -0,0 +1,45 @@
+"""Token counting with the model's tokenizer."""
+
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional[Any]:
+    """Load the tiktoken encoding for a model, or None if unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use and may be unreachable offline
+        logger.warning(f"Falling back to approximate token counts for {model}: {e}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count the tokens ``text`` occupies in the model's context.
+
+    Args:
+        text: Text to measure
+        model: Model name (defaults to the configured LLM)
+
+    Returns:
+        Number of tokens
+    """
+    encoding = _get_encoding(model or settings.llm_model)
+    if encoding is None:
+        # Japanese text averages roughly one token per character
+        return len(text)
+    return len(encoding.encode(text, disallowed_special=()))
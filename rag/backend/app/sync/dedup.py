@@ -0,0 +1,123 @@
+"""Near-duplicate detection for copypasta, AA and repeated short replies."""
+
+import hashlib
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.graph import Post
+
+SIGNATURE_BITS = 64
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """Compute the 64-bit SimHash of a post over character shingles.
+
+    Character shingles suit Japanese text and ASCII art, which have no word
+    boundaries to tokenize on.
+
+    Args:
+        text: Post content
+        shingle_size: Characters per shingle
+
+    Returns:
+        Unsigned 64-bit signature
+    """
+    normalized = _normalize(text)
+    shingles = [
+        normalized[i : i + shingle_size] for i in range(max(len(normalized) - shingle_size + 1, 1))
+    ]
+
+    weights = [0] * SIGNATURE_BITS
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(SIGNATURE_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def to_signed(signature: int) -> int:
+    """Convert an unsigned signature to the signed form stored in BIGINT columns."""
+    if signature >> (SIGNATURE_BITS - 1):
+        return signature - (1 << SIGNATURE_BITS)
+    return signature
+
+
+def to_unsigned(signature: int) -> int:
+    """Convert a stored BIGINT signature back to its unsigned form."""
+    return signature & ((1 << SIGNATURE_BITS) - 1)
+
+
+class SimHashIndex:
+    """Banded LSH index over SimHash signatures of cluster representatives.
+
+    Signatures are split into ``max_distance + 1`` bands, so by the pigeonhole
+    principle any two signatures within ``max_distance`` bits share at least
+    one band exactly. Lookups only compare against posts in matching buckets.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        """Initialize the index.
+
+        Args:
+            max_distance: Largest Hamming distance treated as a near-duplicate
+        """
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = -(-SIGNATURE_BITS // self.bands)
+        self._buckets: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        self.size = 0
+
+    def _band_keys(self, signature: int) -> list[tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [(band, signature >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def add(self, post_no: int, signature: int) -> None:
+        """Register a cluster representative."""
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append((post_no, signature))
+        self.size += 1
+
+    def find(self, signature: int) -> Optional[int]:
+        """Return the closest representative within ``max_distance`` bits, if any."""
+        best: Optional[tuple[int, int]] = None
+        for key in self._band_keys(signature):
+            for post_no, candidate in self._buckets.get(key, ()):
+                distance = (signature ^ candidate).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, post_no)
+        return best[1] if best else None
+
+    def assign(self, post_no: int, signature: int) -> Optional[int]:
+        """Return the representative a new post duplicates, or register it as one."""
+        representative = self.find(signature)
+        if representative is None:
+            self.add(post_no, signature)
+        return representative
+
+    def extend(self, representatives: Iterable[tuple[int, int]]) -> None:
+        """Register many (post number, signature) representatives."""
+        for post_no, signature in representatives:
+            self.add(post_no, signature)
+
+    @classmethod
+    def load(cls, session: Session, max_distance: int = 3) -> "SimHashIndex":
+        """Build the index from the representatives already stored in the RAG DB."""
+        index = cls(max_distance=max_distance)
+        rows = session.execute(
+            select(Post.source_post_no, Post.simhash).where(
+                Post.simhash.is_not(None), Post.duplicate_of_no.is_(None)
+            )
+        )
+        index.extend((post_no, to_unsigned(signature)) for post_no, signature in rows)
+        return index
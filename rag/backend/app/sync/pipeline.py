@@ -1,15 +1,17 @@
 """Data synchronization pipeline for GraphRAG system."""
 
 import logging
-from typing import Any
+import time
+from typing import Any, Optional, cast
 
-from langchain_openai import OpenAIEmbeddings
 from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_rag_db, get_source_db
 from app.models.graph import Post, Relationship
+from app.sync.dedup import SimHashIndex, simhash, to_signed
+from app.sync.stats import record_sync_batch
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,11 +20,8 @@ logger = logging.getLogger(__name__)
 class DataSyncPipeline:
     """Pipeline for syncing data from source DB to GraphRAG DB."""
 
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            api_key=settings.openai_api_key,
-        )
+    def __init__(self) -> None:
+        self.dedup_index: Optional[SimHashIndex] = None
 
     def get_last_processed_no(self, rag_session: Session) -> int:
         """Get the last processed post number from RAG DB."""
@@ -66,14 +65,31 @@ class DataSyncPipeline:
             timestamp=post_data["datetime"],
         )
 
+    def assign_duplicate_cluster(self, post: Post, rag_session: Session) -> None:
+        """Sign the post and link it to the cluster of a near-identical earlier post."""
+        if self.dedup_index is None:
+            self.dedup_index = SimHashIndex.load(
+                rag_session, max_distance=settings.dedup_max_distance
+            )
+            logger.info(f"Loaded {self.dedup_index.size} near-duplicate cluster representatives")
+
+        signature = simhash(cast(str, post.content))
+        # The SQLAlchemy 1.4 stubs type mapped attributes as Column
+        post.simhash = to_signed(signature)  # type: ignore[assignment]
+        post.duplicate_of_no = self.dedup_index.assign(  # type: ignore[assignment]
+            cast(int, post.source_post_no), signature
+        )
+
     def create_sequential_relationships(
         self,
         post: Post,
         source_session: Session,
         rag_session: Session,
-        window_size: int = 20,
+        window_size: Optional[int] = None,
     ) -> list[Relationship]:
         """Create IS_SEQUENTIAL_TO relationships for subsequent posts."""
+        window_size = window_size or settings.sequential_window
+
         # Get subsequent posts from source DB
         query = text(
             """
@@ -110,6 +126,7 @@ class DataSyncPipeline:
     def sync_batch(self, batch_size: int = 100) -> int:
         """Sync a batch of posts from source to RAG DB."""
         processed_count = 0
+        started = time.perf_counter()
 
         with get_source_db() as source_db, get_rag_db() as rag_db:
             # Get last processed post number
@@ -120,6 +137,9 @@ class DataSyncPipeline:
             new_posts = self.extract_new_posts(source_db, last_no, batch_size)
             if not new_posts:
                 logger.info("No new posts to sync")
+                # Still refresh the source high-water mark used for sync lag
+                record_sync_batch(rag_db, source_db, [], 0)
+                rag_db.commit()
                 return 0
 
             logger.info(f"Found {len(new_posts)} new posts to sync")
@@ -129,13 +149,16 @@ class DataSyncPipeline:
                 try:
                     # Create post node
                     post = self.create_post_node(post_data)
+                    if settings.dedup_enabled:
+                        self.assign_duplicate_cluster(post, rag_db)
                     rag_db.add(post)
                     rag_db.flush()  # Get the post_id
 
-                    # Create sequential relationships
-                    seq_rels = self.create_sequential_relationships(post, source_db, rag_db)
-                    for rel in seq_rels:
-                        rag_db.add(rel)
+                    # Sequential edges are derived from post numbers in implicit mode
+                    if settings.sequential_edge_mode != "implicit":
+                        seq_rels = self.create_sequential_relationships(post, source_db, rag_db)
+                        for rel in seq_rels:
+                            rag_db.add(rel)
 
                     processed_count += 1
 
@@ -145,8 +168,18 @@ class DataSyncPipeline:
                 except Exception as e:
                     logger.error(f"Error processing post No.{post_data['no']}: {e}")
                     rag_db.rollback()
+                    # Representatives added in this batch were rolled back too
+                    self.dedup_index = None
                     raise
 
+            # Stats become visible in the same commit as the posts
+            record_sync_batch(
+                rag_db,
+                source_db,
+                [post_data["no"] for post_data in new_posts],
+                int((time.perf_counter() - started) * 1000),
+            )
+
             # Commit all changes
             rag_db.commit()
             logger.info(f"Successfully synced {processed_count} posts")
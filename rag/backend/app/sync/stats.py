@@ -0,0 +1,100 @@
+"""Precomputed index statistics maintained by the sync pipeline."""
+
+from datetime import datetime, timezone
+from typing import Any, Optional, cast
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.graph import IndexStats, Post
+
+STATS_ID = 1
+
+
+def source_max_post_no(source_session: Session) -> Optional[int]:
+    """Return the newest post number in the source DB (an index-only lookup)."""
+    return source_session.execute(text("SELECT max(no) FROM public.res")).scalar()
+
+
+def _backfill(rag_session: Session) -> IndexStats:
+    # One full scan, only when the stats row does not exist yet
+    total, min_no, max_no, last_created = rag_session.execute(
+        select(
+            func.count(Post.post_id),
+            func.min(Post.source_post_no),
+            func.max(Post.source_post_no),
+            func.max(Post.created_at),
+        )
+    ).one()
+    stats = IndexStats(
+        id=STATS_ID,
+        total_posts=total or 0,
+        min_post_no=min_no,
+        max_post_no=max_no,
+        last_sync_at=last_created,
+        last_batch_size=0,
+        last_batch_duration_ms=0,
+    )
+    rag_session.add(stats)
+    return stats
+
+
+def record_sync_batch(
+    rag_session: Session,
+    source_session: Session,
+    post_numbers: list[int],
+    duration_ms: int,
+) -> IndexStats:
+    """Fold a synced batch into the stats row inside the caller's transaction.
+
+    Must be called after the batch's posts are flushed and before commit, so
+    the stats and the posts become visible together.
+
+    Args:
+        rag_session: RAG DB session holding the batch
+        source_session: Source DB session, used to measure sync lag
+        post_numbers: Source post numbers synced in this batch (may be empty)
+        duration_ms: Time spent on the batch
+
+    Returns:
+        The updated stats row
+    """
+    now = datetime.now(timezone.utc)
+    stats = rag_session.get(IndexStats, STATS_ID, with_for_update=True)
+    if stats is None:
+        # The backfill already counts the flushed batch
+        stats = _backfill(rag_session)
+    elif post_numbers:
+        stats.total_posts += len(post_numbers)
+        low, high = min(post_numbers), max(post_numbers)
+        stats.min_post_no = low if stats.min_post_no is None else min(stats.min_post_no, low)
+        stats.max_post_no = high if stats.max_post_no is None else max(stats.max_post_no, high)
+
+    if post_numbers:
+        stats.last_sync_at = now
+        stats.last_batch_size = len(post_numbers)
+        stats.last_batch_duration_ms = duration_ms
+    stats.last_checked_at = now
+    stats.source_max_post_no = source_max_post_no(source_session)
+    return cast(IndexStats, stats)
+
+
+def stats_payload(stats: IndexStats) -> dict[str, Any]:
+    """Format the stats row for the status endpoint."""
+    max_post_no = cast(int, stats.max_post_no or 0)
+    source_max = cast(Optional[int], stats.source_max_post_no)
+    return {
+        "index": {
+            "total_posts": stats.total_posts,
+            "min_post_no": stats.min_post_no or 0,
+            "max_post_no": max_post_no,
+            "last_sync": stats.last_sync_at.isoformat() if stats.last_sync_at else None,
+        },
+        "sync": {
+            "source_max_post_no": source_max,
+            "lag_posts": max(source_max - max_post_no, 0) if source_max is not None else None,
+            "last_batch_size": stats.last_batch_size,
+            "last_batch_duration_ms": stats.last_batch_duration_ms,
+            "last_checked": stats.last_checked_at.isoformat() if stats.last_checked_at else None,
+        },
+    }
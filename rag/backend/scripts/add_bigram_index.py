@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Add a pg_bigm index on posts.content so 2-character terms are searched by index."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.core.database import get_rag_autocommit_connection
+
+
+def main() -> None:
+    """Create ix_posts_content_bigm without blocking writes."""
+    print("🔧 Adding bigram index on posts.content...")
+
+    try:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with get_rag_autocommit_connection() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_bigm"))
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_content_bigm
+                    ON posts USING gin (content gin_bigm_ops)
+                    """
+                )
+            )
+        print("✅ ix_posts_content_bigm is in place!")
+        print("ℹ️  Set LEXICAL_BIGRAM_INDEX=true to search every term through it")
+    except Exception as e:
+        print(f"❌ Error adding bigram index: {e}")
+        print("ℹ️  pg_bigm must be installed on the database server")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
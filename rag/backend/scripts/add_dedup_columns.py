@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Add near-duplicate columns to posts and cluster the posts already synced."""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, text, update
+
+from app.core.config import settings
+from app.core.database import get_rag_db
+from app.models.graph import Post
+from app.sync.dedup import SimHashIndex, simhash, to_signed
+
+
+def add_columns() -> None:
+    """Add the simhash and duplicate_of_no columns if they don't exist."""
+    with get_rag_db() as session:
+        session.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS simhash BIGINT"))
+        session.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS duplicate_of_no INTEGER"))
+        session.execute(
+            text(
+                """
+                CREATE INDEX IF NOT EXISTS ix_posts_duplicate_of_no
+                ON posts (duplicate_of_no)
+                """
+            )
+        )
+        session.commit()
+    print("  - Columns simhash and duplicate_of_no are in place")
+
+
+def backfill(batch_size: int) -> dict[str, int]:
+    """Sign unsigned posts in post order and assign them to clusters.
+
+    Returns:
+        Post numbers of the posts found to be near-duplicates, keyed by post ID
+    """
+    duplicates: dict[str, int] = {}
+    with get_rag_db() as session:
+        index = SimHashIndex.load(session, max_distance=settings.dedup_max_distance)
+        last_no = 0
+        while True:
+            rows = session.execute(
+                select(Post.post_id, Post.source_post_no, Post.content)
+                .where(Post.simhash.is_(None), Post.source_post_no > last_no)
+                .order_by(Post.source_post_no)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            for post_id, post_no, content in rows:
+                signature = simhash(content)
+                duplicate_of_no = index.assign(post_no, signature)
+                if duplicate_of_no is not None:
+                    duplicates[str(post_id)] = post_no
+                session.execute(
+                    update(Post)
+                    .where(Post.post_id == post_id)
+                    .values(simhash=to_signed(signature), duplicate_of_no=duplicate_of_no)
+                )
+            session.commit()
+
+            last_no = post_no  # Rows are in post number order
+            print(f"  - Signed posts up to No.{last_no} ({len(duplicates)} duplicates so far)")
+    return duplicates
+
+
+def prune_index(duplicates: dict[str, int], batch_size: int) -> None:
+    """Remove near-duplicate posts from the GraphRAG index.
+
+    Per-post indexes drop the duplicates' vectors. Micro-window indexes hold
+    one vector per window, so the windows containing duplicates are chunked
+    again from the representative posts.
+    """
+    if settings.index_chunking == "window":
+        # Sliding windows are built from the source DB, which has no clusters
+        print("  - Sliding-window indexes keep duplicates; nothing was pruned")
+        return
+    if settings.index_chunking == "micro":
+        rebuild_windows(sorted(duplicates.values()), batch_size)
+        return
+
+    from langchain_chroma import Chroma
+
+    collection = Chroma(
+        collection_name=settings.collection_name,
+        persist_directory=settings.chroma_persist_directory,
+    )._collection
+    post_ids = list(duplicates)
+    removed = 0
+    for i in range(0, len(post_ids), batch_size):
+        where: dict[str, Any] = {"post_id": {"$in": post_ids[i : i + batch_size]}}
+        found = collection.get(where=where)
+        if found["ids"]:
+            collection.delete(ids=found["ids"])
+            removed += len(found["ids"])
+    print(f"  - Removed {removed} duplicate vectors from the index")
+
+
+def rebuild_windows(post_numbers: list[int], batch_size: int) -> None:
+    """Chunk the micro-windows containing near-duplicates again without them."""
+    from scripts.update_graphrag_index import GraphRAGIndexUpdater
+
+    updater = GraphRAGIndexUpdater(chunking="micro")
+    windows = 0
+    with get_rag_db() as session:
+        for i in range(0, len(post_numbers), batch_size):
+            windows += asyncio.run(
+                updater.reindex_windows(session, post_numbers[i : i + batch_size], batch_size)
+            )
+    print(f"  - Rebuilt {windows} micro-windows without the duplicate posts")
+
+
+def main() -> None:
+    """Add the columns, backfill clusters and optionally prune the vector index."""
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate posts")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Number of posts signed per transaction (default: 1000)",
+    )
+    parser.add_argument(
+        "--prune-index",
+        action="store_true",
+        help="Delete the vectors of near-duplicate posts from the GraphRAG index",
+    )
+    args = parser.parse_args()
+
+    print("🔧 Clustering near-duplicate posts...")
+
+    try:
+        add_columns()
+        duplicates = backfill(args.batch_size)
+        if args.prune_index and duplicates:
+            prune_index(duplicates, args.batch_size)
+    except Exception as e:
+        print(f"❌ Error clustering posts: {e}")
+        sys.exit(1)
+
+    print(f"✅ Found {len(duplicates)} near-duplicate posts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Add an index on posts.timestamp for time-scoped questions."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.core.database import get_rag_autocommit_connection
+
+
+def main() -> None:
+    """Create ix_posts_timestamp without blocking writes."""
+    print("🔧 Adding index on posts.timestamp...")
+
+    try:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with get_rag_autocommit_connection() as conn:
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_timestamp
+                    ON posts (timestamp)
+                    """
+                )
+            )
+        print("✅ ix_posts_timestamp is in place!")
+    except Exception as e:
+        print(f"❌ Error adding timestamp index: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Add a trigram index on posts.content for the lexical retrieval branch."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.core.database import get_rag_autocommit_connection
+
+
+def main() -> None:
+    """Create ix_posts_content_trgm without blocking writes."""
+    print("🔧 Adding trigram index on posts.content...")
+
+    try:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with get_rag_autocommit_connection() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_content_trgm
+                    ON posts USING gin (content gin_trgm_ops)
+                    """
+                )
+            )
+        print("✅ ix_posts_content_trgm is in place!")
+    except Exception as e:
+        print(f"❌ Error adding trigram index: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Rewrite GraphRAG vector index metadata so search filters can be pushed down."""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Mapping
+from uuid import UUID
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain_chroma import Chroma
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import get_rag_db
+from app.models.graph import Post
+from app.rag.filters import post_metadata
+
+
+def main() -> None:
+    """Add numeric timestamps and authors to indexed posts in batches."""
+    parser = argparse.ArgumentParser(
+        description="Backfill timestamp_epoch and author metadata in the vector index"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Number of documents to update per batch (default: 1000)",
+    )
+    args = parser.parse_args()
+
+    print("🔧 Backfilling vector index metadata...")
+
+    # Metadata-only updates do not need an embedding function
+    collection = Chroma(
+        collection_name=settings.collection_name,
+        persist_directory=settings.chroma_persist_directory,
+    )._collection
+
+    updated = 0
+    offset = 0
+    with get_rag_db() as session:
+        while True:
+            batch = collection.get(include=["metadatas"], limit=args.batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            offset += len(batch["ids"])
+
+            # Only per-post documents carry a post_id; sliding windows are left alone
+            doc_ids = {
+                UUID(str(metadata["post_id"])): doc_id
+                for doc_id, metadata in zip(batch["ids"], batch["metadatas"] or [])
+                if metadata and "post_id" in metadata and "timestamp_epoch" not in metadata
+            }
+            if not doc_ids:
+                continue
+
+            posts = session.execute(select(Post).where(Post.post_id.in_(doc_ids))).scalars()
+            ids: list[str] = []
+            metadatas: list[Mapping[str, Any]] = []
+            for post in posts:
+                ids.append(doc_ids[post.post_id])
+                metadatas.append(post_metadata(post))
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+                updated += len(ids)
+                print(f"  - Updated {updated} documents so far")
+
+    print(f"✅ Backfilled metadata for {updated} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,10 @@ def main() -> None:
             session.execute(text("DELETE FROM posts"))
             print("  - Deleted all posts")
 
+            # The stats row is rebuilt from the posts by the next sync batch
+            session.execute(text("DELETE FROM index_stats"))
+            print("  - Deleted index stats")
+
             session.commit()
             print("✅ RAG database cleared successfully!")
         except Exception as e:
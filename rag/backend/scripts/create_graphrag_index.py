@@ -4,6 +4,8 @@
 import asyncio
 import sys
 from pathlib import Path
+from typing import Any, Iterator, cast
+from uuid import UUID
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -12,17 +14,107 @@ from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_rag_db
 from app.models.graph import Post
+from app.rag.chunking import MicroWindowChunker, window_post_ids
+from app.rag.filters import post_metadata
+
+# Near-duplicates are searched through their cluster representative
+REPRESENTATIVES = Post.duplicate_of_no.is_(None)
+
+
+def post_batches(session: Session, batch_size: int) -> Iterator[list[Post]]:
+    """Yield representative posts in post order, one batch at a time."""
+    last_no = 0
+    while True:
+        posts = (
+            session.execute(
+                select(Post)
+                .where(REPRESENTATIVES, Post.source_post_no > last_no)
+                .order_by(Post.source_post_no)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not posts:
+            return
+        yield list(posts)
+        last_no = posts[-1].source_post_no
+
+
+def index_micro_windows(
+    session: Session, vectorstore: Chroma, batch_size: int, topic_split: bool
+) -> int:
+    """Index representative posts as micro-windows.
+
+    With ``topic_split``, per-post vectors already in the collection are used
+    to detect topic shifts and are removed once their windows are written.
+
+    Returns:
+        Number of windows indexed
+    """
+    chunker = MicroWindowChunker(
+        max_tokens=settings.micro_window_max_tokens,
+        max_posts=settings.micro_window_max_posts,
+        max_gap_seconds=settings.micro_window_max_gap_seconds,
+        topic_threshold=settings.micro_window_topic_threshold,
+        model=settings.embedding_model,
+    )
+    stored: dict[UUID, Any] = {}
+    replaced_ids: list[str] = []
+
+    def posts() -> Iterator[Post]:
+        for batch in post_batches(session, batch_size):
+            if topic_split:
+                where: dict[str, Any] = {"post_id": {"$in": [str(p.post_id) for p in batch]}}
+                result = vectorstore.get(
+                    where=where,
+                    include=["embeddings", "metadatas"],
+                )
+                for doc_id, metadata, embedding in zip(
+                    result["ids"], result["metadatas"], result["embeddings"]
+                ):
+                    stored[UUID(metadata["post_id"])] = embedding
+                    replaced_ids.append(doc_id)
+            yield from batch
+
+    windows = 0
+    documents: list[Document] = []
+    for window in chunker.chunk(posts(), stored):
+        documents.append(window)
+        # Only the open window still needs its posts' embeddings
+        for post_id in window_post_ids(window.metadata):
+            stored.pop(post_id, None)
+        if len(documents) >= batch_size:
+            vectorstore.add_documents(documents)
+            windows += len(documents)
+            documents = []
+            print(f"   Progress: {windows} windows indexed")
+    if documents:
+        vectorstore.add_documents(documents)
+        windows += len(documents)
+
+    for i in range(0, len(replaced_ids), batch_size):
+        vectorstore.delete(ids=replaced_ids[i : i + batch_size])
+    if replaced_ids:
+        print(f"   Replaced {len(replaced_ids)} per-post vectors")
+
+    return windows
 
 
-async def create_index(batch_size: int = 100) -> None:
+async def create_index(
+    batch_size: int = 100, chunking: str = "post", topic_split: bool = False
+) -> None:
     """Create vector index from posts in RAG database.
 
     Args:
         batch_size: Number of posts to process in each batch
+        chunking: "post" for one vector per post, "micro" for micro-windows
+        topic_split: Split micro-windows on topic shifts using existing post vectors
     """
     print("🚀 Starting GraphRAG vector index creation...")
 
@@ -41,7 +133,10 @@ async def create_index(batch_size: int = 100) -> None:
 
     with get_rag_db() as session:
         # Get total count
-        total_count = session.execute(select(func.count()).select_from(Post)).scalar() or 0
+        total_count = (
+            session.execute(select(func.count()).select_from(Post).where(REPRESENTATIVES)).scalar()
+            or 0
+        )
 
         if total_count == 0:
             print("❌ No posts found in RAG database. Run sync pipeline first.")
@@ -49,35 +144,20 @@ async def create_index(batch_size: int = 100) -> None:
 
         print(f"📄 Found {total_count} posts in RAG database")
 
+        if chunking == "micro":
+            windows = index_micro_windows(session, vectorstore, batch_size, topic_split)
+            print("✅ GraphRAG vector index creation completed successfully!")
+            print(f"📊 Total posts indexed: {total_count} in {windows} micro-windows")
+            return
+
         # Process in batches
-        offset = 0
         processed = 0
 
-        while offset < total_count:
-            # Get batch of posts
-            posts = (
-                session.execute(
-                    select(Post).order_by(Post.source_post_no).limit(batch_size).offset(offset)
-                )
-                .scalars()
-                .all()
-            )
-
-            if not posts:
-                break
-
+        for posts in post_batches(session, batch_size):
             # Convert to documents
             documents = []
             for post in posts:
-                doc = Document(
-                    page_content=post.content,
-                    metadata={
-                        "post_id": str(post.post_id),
-                        "source_post_no": post.source_post_no,
-                        "timestamp": post.timestamp.isoformat(),
-                        "source": f"graphrag_post_{post.source_post_no}",
-                    },
-                )
+                doc = Document(page_content=cast(str, post.content), metadata=post_metadata(post))
                 documents.append(doc)
 
             # Add to vector store
@@ -89,8 +169,6 @@ async def create_index(batch_size: int = 100) -> None:
                 print(f"❌ Error indexing batch: {e}")
                 raise
 
-            offset += batch_size
-
     print("✅ GraphRAG vector index creation completed successfully!")
     print(f"📊 Total posts indexed: {processed}")
 
@@ -106,11 +184,24 @@ async def main() -> None:
         default=100,
         help="Batch size for processing (default: 100)",
     )
+    parser.add_argument(
+        "--chunking",
+        choices=["post", "micro"],
+        default=settings.index_chunking,
+        help="Index one vector per post or per micro-window (default: INDEX_CHUNKING)",
+    )
+    parser.add_argument(
+        "--topic-split",
+        action="store_true",
+        help="Split micro-windows on topic shifts using the per-post vectors already indexed",
+    )
 
     args = parser.parse_args()
 
     try:
-        await create_index(batch_size=args.batch_size)
+        await create_index(
+            batch_size=args.batch_size, chunking=args.chunking, topic_split=args.topic_split
+        )
     except KeyboardInterrupt:
         print("\n⚠️  Process interrupted by user")
         sys.exit(1)
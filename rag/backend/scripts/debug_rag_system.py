@@ -94,7 +94,9 @@ def test_vector_search():
     """Test vector search functionality."""
     print("\n=== Vector Search Test ===")
     try:
-        from app.rag.graphrag_chain import graphrag_chain
+        from app.rag.graphrag_chain import get_graphrag_chain
+
+        graphrag_chain = get_graphrag_chain()
 
         # Test question
         test_question = "最新の投稿について教えてください"
@@ -103,6 +105,11 @@ def test_vector_search():
         # Create initial state
         state = {
             "question": test_question,
+            "filters": None,
+            "query_path": "retrieval",
+            "time_range": None,
+            "query_embedding": [],
+            "branch_results": {},
             "vector_results": [],
             "graph_context": {},
             "formatted_context": "",
@@ -115,14 +122,15 @@ def test_vector_search():
         import asyncio
 
         result = asyncio.run(graphrag_chain._vector_retriever(state))
+        vector_results = result["branch_results"]["vector"]
 
-        print(f"Found {len(result['vector_results'])} posts")
+        print(f"Found {len(vector_results)} posts")
 
-        if result["vector_results"]:
+        if vector_results:
             print("Vector search is working!")
             # Get post details
             with get_rag_db() as session:
-                for post_id in result["vector_results"][:3]:
+                for post_id in vector_results[:3]:
                     post = session.get(Post, post_id)
                     if post:
                         print(f"  - No.{post.source_post_no}: {post.content[:50]}...")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Report the cold-start import time of the app and every CLI script."""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.importtime import measure_import
+
+# Generous upper bounds in milliseconds, to catch a heavy import creeping back.
+# Wall-clock times vary with the machine, so they are checked here on demand
+# rather than in the test suite.
+IMPORT_BUDGETS_MS = {
+    "app.main": 3000,
+    "scripts.clear_rag_db": 1500,
+    "scripts.add_updated_at_column": 1500,
+    "scripts.add_timestamp_index": 1500,
+    "scripts.init_rag_db": 1500,
+    "scripts.prune_sequential_relationships": 1500,
+    "scripts.add_dedup_columns": 2000,
+    "scripts.sync_data": 2000,
+}
+
+
+def main() -> None:
+    """Measure each target in a fresh interpreter and print the totals."""
+    parser = argparse.ArgumentParser(description="Measure import time with -X importtime")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="Modules to measure (default: app.main and every script)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=0,
+        help="Also list the N slowest modules of each target (default: 0)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if a module exceeds its import budget",
+    )
+    args = parser.parse_args()
+
+    scripts_dir = Path(__file__).parent
+    targets = args.targets or ["app.main"] + [
+        f"scripts.{path.stem}"
+        for path in sorted(scripts_dir.glob("*.py"))
+        if path.stem not in ("__init__", Path(__file__).stem)
+    ]
+
+    print(f"⏱️  Measuring import time of {len(targets)} modules...")
+    over_budget = []
+    for target in targets:
+        try:
+            # The faster of two runs discounts bytecode compilation on the first one
+            profile = min((measure_import(target) for _ in range(2)), key=lambda p: p.total_us)
+        except RuntimeError as e:
+            print(f"❌ {target}: {e}")
+            continue
+        budget = IMPORT_BUDGETS_MS.get(target)
+        note = ""
+        if budget is not None and profile.total_ms >= budget:
+            over_budget.append(target)
+            note = f"  ❌ over budget of {budget} ms"
+        print(f"{profile.total_ms:10.1f} ms  {target}{note}")
+        for name, cumulative_us in profile.slowest(args.top):
+            print(f"{'':14}{cumulative_us / 1000:10.1f} ms  {name}")
+
+    if args.check and over_budget:
+        print(f"❌ {len(over_budget)} modules exceed their import budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
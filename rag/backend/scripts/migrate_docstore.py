@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Migrate parent documents from the per-file docstore to the SQLite docstore."""
+
+import argparse
+import sys
+from itertools import islice
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain.storage import LocalFileStore
+
+from app.core.config import settings
+from app.rag.docstore import SQLiteByteStore
+
+
+def directory_size(path: Path) -> int:
+    """Return the total size of the files under a directory."""
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def main() -> None:
+    """Copy every parent document into the SQLite docstore in batches."""
+    parser = argparse.ArgumentParser(description="Migrate the parent docstore to SQLite")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="Number of documents copied per transaction (default: 500)",
+    )
+    args = parser.parse_args()
+
+    base_dir = Path(settings.chroma_persist_directory).parent
+    source_dir = base_dir / "docstore"
+    target_path = base_dir / "docstore.sqlite3"
+
+    if not source_dir.exists():
+        print(f"ℹ️  No file docstore found at {source_dir}")
+        return
+
+    print(f"🔧 Migrating {source_dir} to {target_path}...")
+
+    source = LocalFileStore(source_dir)
+    target = SQLiteByteStore(target_path)
+    migrated = 0
+    try:
+        keys = source.yield_keys()
+        while batch := list(islice(keys, args.batch_size)):
+            values = source.mget(batch)
+            target.mset([(k, v) for k, v in zip(batch, values) if v is not None])
+            migrated += len(batch)
+            print(f"  - Migrated {migrated} documents so far")
+    except Exception as e:
+        print(f"❌ Error migrating docstore: {e}")
+        sys.exit(1)
+    finally:
+        target.close()
+
+    before = directory_size(source_dir)
+    after = target_path.stat().st_size
+    print(f"✅ Migrated {migrated} documents ({before:,} bytes -> {after:,} bytes)")
+    print("   Set DOCSTORE_BACKEND=sqlite and remove the old directory once verified")
+
+
+if __name__ == "__main__":
+    main()
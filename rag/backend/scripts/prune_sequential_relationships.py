@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Prune stored IS_SEQUENTIAL_TO relationships once they are derived implicitly."""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import cast
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.engine import CursorResult
+
+from app.core.config import settings
+from app.core.database import get_rag_autocommit_connection, get_rag_db
+
+
+def main() -> None:
+    """Delete sequential relationship rows in batches."""
+    parser = argparse.ArgumentParser(description="Prune stored IS_SEQUENTIAL_TO relationships")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50000,
+        help="Number of rows to delete per transaction (default: 50000)",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Run VACUUM ANALYZE on relationships afterwards to reclaim space",
+    )
+    args = parser.parse_args()
+
+    if settings.sequential_edge_mode != "implicit":
+        print("❌ SEQUENTIAL_EDGE_MODE must be 'implicit' before pruning sequential rows")
+        sys.exit(1)
+
+    print("🔧 Pruning IS_SEQUENTIAL_TO relationships...")
+
+    total = 0
+    with get_rag_db() as session:
+        try:
+            while True:
+                result = session.execute(
+                    text(
+                        """
+                        DELETE FROM relationships
+                        WHERE relationship_id IN (
+                            SELECT relationship_id
+                            FROM relationships
+                            WHERE relationship_type = 'IS_SEQUENTIAL_TO'
+                            LIMIT :batch_size
+                        )
+                        """
+                    ),
+                    {"batch_size": args.batch_size},
+                )
+                deleted = cast(CursorResult, result).rowcount
+                session.commit()
+
+                if not deleted:
+                    break
+                total += deleted
+                print(f"  - Deleted {total} rows so far")
+        except Exception as e:
+            print(f"❌ Error pruning relationships: {e}")
+            session.rollback()
+            sys.exit(1)
+
+    if args.vacuum:
+        # VACUUM cannot run inside a transaction block
+        with get_rag_autocommit_connection() as conn:
+            conn.execute(text("VACUUM ANALYZE relationships"))
+        print("  - Vacuumed relationships")
+
+    print(f"✅ Pruned {total} sequential relationships")
+
+
+if __name__ == "__main__":
+    main()
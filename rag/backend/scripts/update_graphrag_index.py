@@ -6,7 +6,7 @@ import json
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Mapping, Optional, Sequence
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -15,17 +15,31 @@ from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_rag_db
 from app.models.graph import Post
+from app.rag.chunking import (
+    MicroWindowChunker,
+    SlidingWindowChunker,
+    covering_windows_where,
+    rechunk_spans,
+    window_post_ids,
+)
+from app.rag.filters import post_metadata
+from app.rag.loader import PostgresResLoader
 
 
 class GraphRAGIndexUpdater:
     """Incremental updater for GraphRAG vector index."""
 
-    def __init__(self):
-        """Initialize the updater."""
+    def __init__(self, chunking: str = settings.index_chunking):
+        """Initialize the updater.
+
+        Args:
+            chunking: "post", "micro" or "window" (sliding windows)
+        """
         self.metadata_path = Path("graphrag_index_metadata.json")
         self.embeddings = OpenAIEmbeddings(
             model=settings.embedding_model,
@@ -36,6 +50,17 @@ class GraphRAGIndexUpdater:
             embedding_function=self.embeddings,
             persist_directory=settings.chroma_persist_directory,
         )
+        self.chunker = (
+            MicroWindowChunker(
+                max_tokens=settings.micro_window_max_tokens,
+                max_posts=settings.micro_window_max_posts,
+                max_gap_seconds=settings.micro_window_max_gap_seconds,
+                topic_threshold=settings.micro_window_topic_threshold,
+                model=settings.embedding_model,
+            )
+            if chunking == "micro"
+            else None
+        )
 
     def load_metadata(self) -> dict[str, Any]:
         """Load index metadata from file."""
@@ -61,11 +86,16 @@ class GraphRAGIndexUpdater:
             # Get all documents from Chroma
             results = self.vectorstore._collection.get()
             if results and "metadatas" in results:
-                return {
-                    meta["post_id"]
-                    for meta in results["metadatas"]
-                    if meta and "post_id" in meta
-                }
+                post_ids: set[str] = set()
+                for meta in results["metadatas"] or []:
+                    if not meta:
+                        continue
+                    if "post_ids" in meta:
+                        # Micro-windows list their member posts
+                        post_ids.update(str(post_id) for post_id in window_post_ids(meta))
+                    elif "post_id" in meta:
+                        post_ids.add(str(meta["post_id"]))
+                return post_ids
         except Exception as e:
             print(f"⚠️  Warning: Could not retrieve existing documents: {e}")
         return set()
@@ -117,9 +147,14 @@ class GraphRAGIndexUpdater:
                     print(f"🔄 Found {len(updated_posts)} updated posts to reindex")
                     total_updated_posts = len(updated_posts)
                     # Process updated posts
-                    await self._process_posts(
-                        updated_posts, indexed_post_ids, batch_size, is_update=True
-                    )
+                    if self.chunker is not None:
+                        await self.reindex_windows(
+                            session, [p.source_post_no for p in updated_posts], batch_size
+                        )
+                    else:
+                        await self._process_posts(
+                            updated_posts, indexed_post_ids, batch_size, is_update=True
+                        )
 
             # Get total count of new posts
             new_count = session.execute(
@@ -140,6 +175,13 @@ class GraphRAGIndexUpdater:
             offset = 0
             max_post_no = last_processed_no
 
+            if self.chunker is not None:
+                # Windows run across batch edges, so micro indexes chunk one stream
+                total_new_posts, max_post_no = await self._append_windows(
+                    session, last_processed_no, indexed_post_ids, batch_size
+                )
+                offset = new_count
+
             while offset < new_count:
                 # Get batch of posts
                 posts = (
@@ -190,6 +232,53 @@ class GraphRAGIndexUpdater:
 
         return total_new_posts + total_updated_posts
 
+    async def update_windows(self, batch_size: int = 100) -> int:
+        """Index sliding windows for posts added since the last run.
+
+        Posts are streamed from the source database starting at the first
+        window that was still filling up. Those trailing windows are replaced
+        and every earlier window is left as it is.
+
+        Args:
+            batch_size: Number of windows to add to the vector store at once
+
+        Returns:
+            Number of windows indexed
+        """
+        chunker = SlidingWindowChunker(settings.window_size, settings.window_overlap)
+        existing = self.vectorstore._collection.get(include=["metadatas"])
+        windows = [
+            meta
+            for meta in existing["metadatas"] or []
+            if meta and str(meta.get("source", "")).startswith("window_")
+        ]
+
+        resume = chunker.resume_from(windows)
+        start_no = None
+        if resume is not None:
+            start_no, stale = resume
+            print(f"📊 Incremental windowing from post No.{start_no}")
+            if stale:
+                stale_where: dict[str, Any] = {"source": {"$in": stale}}
+                self.vectorstore._collection.delete(where=stale_where)
+                print(f"   Deleted {len(stale)} windows that were still filling up")
+
+        # Posts are streamed, so only one batch of windows is held in memory
+        loader = PostgresResLoader(start_no=start_no)
+        indexed = 0
+        batch: list[Document] = []
+        for window in chunker.iter_windows(loader.lazy_load()):
+            batch.append(window)
+            if len(batch) == batch_size:
+                indexed += self._add_documents(batch, batch_size)
+                print(f"   Progress: {indexed} windows indexed")
+                batch = []
+        indexed += self._add_documents(batch, batch_size)
+
+        print("✅ Sliding window index update completed!")
+        print(f"📊 Windows indexed: {indexed}")
+        return indexed
+
     async def _process_posts(
         self,
         posts: list[Post],
@@ -208,7 +297,7 @@ class GraphRAGIndexUpdater:
         Returns:
             Number of posts indexed
         """
-        documents = []
+        documents: list[Document] = []
         post_ids_to_delete = []
 
         for post in posts:
@@ -218,17 +307,12 @@ class GraphRAGIndexUpdater:
             if is_update and post_id_str in indexed_post_ids:
                 post_ids_to_delete.append(post_id_str)
 
+            # Near-duplicates are searched through their cluster representative
+            if post.duplicate_of_no is not None:
+                continue
+
             # Create document
-            doc = Document(
-                page_content=post.content,
-                metadata={
-                    "post_id": post_id_str,
-                    "source_post_no": post.source_post_no,
-                    "timestamp": post.timestamp.isoformat(),
-                    "source": f"graphrag_post_{post.source_post_no}",
-                    "author": post.author or "名無し",
-                },
-            )
+            doc = Document(page_content=post.content, metadata=post_metadata(post))
             documents.append(doc)
             indexed_post_ids.add(post_id_str)
 
@@ -240,6 +324,147 @@ class GraphRAGIndexUpdater:
             except Exception as e:
                 print(f"⚠️  Warning: Could not delete old documents: {e}")
 
+        return self._add_documents(documents, batch_size)
+
+    async def _append_windows(
+        self,
+        session: Session,
+        last_processed_no: int,
+        indexed_post_ids: set[str],
+        batch_size: int,
+    ) -> tuple[int, int]:
+        """Chunk the posts added since the last run into micro-windows.
+
+        The last window of the previous run may still have room for the new
+        posts, so, as ``SlidingWindowChunker.resume_from`` does for sliding
+        windows, its posts are streamed again ahead of the new ones and it is
+        replaced. All posts go through one ``chunk`` call, so window
+        boundaries follow the conversation instead of the batches.
+
+        Topic shifts are not detected here: that needs per-post embeddings,
+        which only ``create_graphrag_index.py --topic-split`` has at hand.
+        Incremental windows are split by the token, post and time-gap limits.
+
+        Args:
+            session: RAG DB session
+            last_processed_no: Highest post number handled by the last run
+            indexed_post_ids: Set of already indexed post IDs, updated in place
+            batch_size: Posts read and windows added per batch
+
+        Returns:
+            Number of windows indexed and the highest post number handled
+        """
+        assert self.chunker is not None  # Only micro-window indexes have windows
+        upper_no = session.execute(select(func.max(Post.source_post_no))).scalar()
+        if upper_no is None or upper_no <= last_processed_no:
+            return 0, last_processed_no
+
+        start_no = last_processed_no + 1
+        trailing_ids: list[str] = []
+        last_window_no = session.execute(
+            select(func.max(Post.source_post_no)).where(
+                Post.duplicate_of_no.is_(None), Post.source_post_no <= last_processed_no
+            )
+        ).scalar()
+        if last_window_no is not None:
+            trailing = self.vectorstore._collection.get(
+                where={"end_no": last_window_no}, include=["metadatas"]
+            )
+            metadatas: list[Mapping[str, Any]] = list(trailing["metadatas"] or [])
+            for doc_id, meta in zip(trailing["ids"], metadatas):
+                if meta and "post_ids" in meta:
+                    trailing_ids.append(doc_id)
+                    start_no = min(start_no, int(meta["start_no"]))
+
+        def posts() -> Iterator[Post]:
+            last_no = start_no - 1
+            while True:
+                batch = list(
+                    session.execute(
+                        select(Post)
+                        .where(
+                            Post.duplicate_of_no.is_(None),
+                            Post.source_post_no > last_no,
+                            Post.source_post_no <= upper_no,
+                        )
+                        .order_by(Post.source_post_no)
+                        .limit(batch_size)
+                    ).scalars()
+                )
+                if not batch:
+                    return
+                indexed_post_ids.update(str(post.post_id) for post in batch)
+                yield from batch
+                last_no = batch[-1].source_post_no
+
+        indexed = 0
+        documents: list[Document] = []
+        for window in self.chunker.chunk(posts()):
+            documents.append(window)
+            if len(documents) == batch_size:
+                indexed += self._add_documents(documents, batch_size)
+                print(f"   Progress: {indexed} windows indexed")
+                documents = []
+        indexed += self._add_documents(documents, batch_size)
+
+        # The trailing window is deleted only once its replacement is written
+        if trailing_ids:
+            self.vectorstore._collection.delete(ids=trailing_ids)
+            print(f"   Replaced the open window ending at post No.{last_window_no}")
+        return indexed, upper_no
+
+    async def reindex_windows(
+        self, session: Session, post_numbers: Sequence[int], batch_size: int
+    ) -> int:
+        """Rebuild the micro-windows that contain the given posts.
+
+        Used for edited posts and for posts that became near-duplicates.
+        Windows carry no per-post IDs, so the windows covering the posts are
+        found by their post number range, deleted, and the representative
+        posts they covered are chunked again.
+
+        Args:
+            session: RAG DB session
+            post_numbers: Numbers of the posts that changed
+            batch_size: Batch size for vector store operations
+
+        Returns:
+            Number of windows indexed
+        """
+        assert self.chunker is not None  # Only micro-window indexes have windows
+        numbers = list(post_numbers)
+        existing = self.vectorstore._collection.get(
+            where=covering_windows_where(numbers), include=["metadatas"]
+        )
+        spans = rechunk_spans([m for m in existing["metadatas"] or [] if m], numbers)
+
+        if existing["ids"]:
+            self.vectorstore._collection.delete(ids=existing["ids"])
+            print(f"   Deleted {len(existing['ids'])} windows containing changed posts")
+
+        documents: list[Document] = []
+        for start_no, end_no in spans:
+            posts = (
+                session.execute(
+                    select(Post)
+                    .where(
+                        Post.source_post_no.between(start_no, end_no),
+                        Post.duplicate_of_no.is_(None),
+                    )
+                    .order_by(Post.source_post_no)
+                )
+                .scalars()
+            )
+            documents.extend(self.chunker.chunk(posts))
+
+        return self._add_documents(documents, batch_size)
+
+    def _add_documents(self, documents: list[Document], batch_size: int) -> int:
+        """Add documents to the vector store in batches.
+
+        Returns:
+            Number of documents indexed
+        """
         # Add documents in smaller batches to avoid timeouts
         indexed = 0
         for i in range(0, len(documents), batch_size):
@@ -272,16 +497,25 @@ async def main() -> None:
         action="store_true",
         help="Force reindexing of all posts",
     )
+    parser.add_argument(
+        "--chunking",
+        choices=["post", "micro", "window"],
+        default=settings.index_chunking,
+        help="Index posts, micro-windows or sliding windows (default: INDEX_CHUNKING)",
+    )
 
     args = parser.parse_args()
 
-    updater = GraphRAGIndexUpdater()
+    updater = GraphRAGIndexUpdater(chunking=args.chunking)
 
     try:
-        indexed = await updater.update_index(
-            batch_size=args.batch_size,
-            force_reindex=args.force_reindex,
-        )
+        if args.chunking == "window":
+            indexed = await updater.update_windows(batch_size=args.batch_size)
+        else:
+            indexed = await updater.update_index(
+                batch_size=args.batch_size,
+                force_reindex=args.force_reindex,
+            )
         if indexed == 0:
             print("ℹ️  Index is already up to date")
     except KeyboardInterrupt:
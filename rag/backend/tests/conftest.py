@@ -0,0 +1,37 @@
+"""Shared test helpers."""
+
+from datetime import datetime, timedelta
+from typing import Optional, cast
+from uuid import UUID, uuid4
+
+from app.models.graph import Post
+
+START = datetime(2024, 1, 1, 12, 0)
+
+
+def make_post(
+    no: int,
+    content: Optional[str] = None,
+    minutes: float = 0,
+    author: Optional[str] = None,
+    updated_at: Optional[datetime] = None,
+) -> Post:
+    """Build an unsaved post, posted ``minutes`` after :data:`START`."""
+    return Post(
+        post_id=uuid4(),
+        source_post_no=no,
+        content=f"レス{no}" if content is None else content,
+        author=author,
+        timestamp=START + timedelta(minutes=minutes),
+        updated_at=updated_at,
+    )
+
+
+def id_of(post: Post) -> UUID:
+    """Return the ID of a test post, which the SQLAlchemy stubs type as a Column."""
+    return cast(UUID, post.post_id)
+
+
+def count_chars(text: str, model: object = None) -> int:
+    """Stand-in for ``count_tokens`` counting one token per character."""
+    return len(text)
@@ -0,0 +1,81 @@
+"""Test admission control."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.admission import AdmissionController, Overloaded, StageLimiter
+
+
+def test_admission_rejects_when_queue_is_full() -> None:
+    """Test that requests beyond the slots and queue fail fast."""
+
+    async def scenario() -> None:
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1.0)
+        release = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.waiting == 1
+
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        assert error.value.reason == "queue_full"
+
+        release()
+        release()  # Releasing twice must not free a second slot
+        (await waiter)()
+        assert controller.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_times_out_and_stages_bound_concurrency() -> None:
+    """Test the queue timeout and per-stage limits."""
+
+    async def scenario() -> None:
+        controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=0.01)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        assert error.value.reason == "queue_timeout"
+
+        limiter = StageLimiter({"db": 2})
+        running = peak = 0
+
+        async def work() -> None:
+            nonlocal running, peak
+            async with limiter.limit("db"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        assert peak == 2
+
+    asyncio.run(scenario())
+
+
+def test_stage_slot_is_held_until_a_cancelled_thread_returns() -> None:
+    """Test that timing out on thread work does not free its slot early."""
+    finished = threading.Event()
+
+    def slow_query() -> None:
+        finished.wait(1.0)
+
+    async def scenario() -> None:
+        limiter = StageLimiter({"db": 1})
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.to_thread("db", slow_query), timeout=0.01)
+
+        waiter = asyncio.create_task(limiter.acquire("db"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        finished.set()
+        release = await asyncio.wait_for(waiter, timeout=1.0)
+        release()
+        assert await limiter.to_thread("db", lambda: 42) == 42
+
+    asyncio.run(scenario())
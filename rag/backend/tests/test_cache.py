@@ -0,0 +1,23 @@
+"""Test the in-process TTL cache."""
+
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_reuses_value_until_expiry() -> None:
+    """Test that a value is computed once per TTL period."""
+    now = [0.0]
+    calls = []
+    cache = TTLCache(5.0, clock=lambda: now[0])
+
+    def compute() -> int:
+        calls.append(now[0])
+        return len(calls)
+
+    assert cache.get_or_set("status", compute) == 1
+    now[0] = 4.9
+    assert cache.get_or_set("status", compute) == 1
+    now[0] = 5.0
+    assert cache.get_or_set("status", compute) == 2
+
+    cache.invalidate("status")
+    assert cache.get_or_set("status", compute) == 3
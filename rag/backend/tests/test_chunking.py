@@ -0,0 +1,179 @@
+"""Test chunking of consecutive posts into window documents."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+from uuid import UUID
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.rag.chunking import (
+    MicroWindowChunker,
+    SlidingWindowChunker,
+    covering_windows_where,
+    rechunk_spans,
+    window_post_ids,
+)
+from app.rag.citations import resolve_citations
+from app.rag.graphrag_chain import GraphRAGChain
+from tests.conftest import count_chars, id_of, make_post
+
+
+def test_micro_windows_split_on_budget_and_time_gap() -> None:
+    """Test that windows close at the token budget and after long silences."""
+    minutes = [0, 1, 2, 120, 121]
+    posts = [make_post(no, "うん", m) for no, m in enumerate(minutes, start=1)]
+    chunker = MicroWindowChunker(max_tokens=100, max_gap_seconds=600)
+
+    with patch("app.rag.chunking.count_tokens", side_effect=count_chars):
+        windows = list(chunker.chunk(posts))
+
+    assert [(w.metadata["start_no"], w.metadata["end_no"]) for w in windows] == [
+        (1, 2),
+        (3, 3),
+        (4, 5),
+    ]
+    assert window_post_ids(windows[0].metadata) == [posts[0].post_id, posts[1].post_id]
+
+
+def test_micro_windows_split_on_topic_shift() -> None:
+    """Test that a post dissimilar to the window starts a new one."""
+    posts = [make_post(no, "うん", no) for no in range(1, 5)]
+    embeddings = {
+        id_of(posts[0]): [1.0, 0.0],
+        id_of(posts[1]): [0.9, 0.1],
+        id_of(posts[2]): [0.0, 1.0],
+        id_of(posts[3]): [0.1, 0.9],
+    }
+    chunker = MicroWindowChunker(max_tokens=10_000, topic_threshold=0.5)
+
+    windows = list(chunker.chunk(posts, embeddings))
+
+    assert [w.metadata["post_count"] for w in windows] == [2, 2]
+
+
+def test_micro_window_posts_resolve_as_citations() -> None:
+    """Test that citations find posts inside micro-window documents."""
+    posts = [make_post(1, content="最初"), make_post(2, minutes=1, content="返信")]
+
+    window = next(MicroWindowChunker(max_tokens=10_000).chunk(posts))
+    citations = resolve_citations("No.2を参照", [window])
+
+    assert [(c.no, c.content) for c in citations] == [(2, "返信")]
+
+
+def _res(no: int) -> Document:
+    return Document(
+        page_content=f"レス{no}",
+        metadata={"no": no, "name_and_trip": "名無し", "datetime": "2024-01-01T00:00:00"},
+    )
+
+
+def _eager_windows(docs: list[Document], window_size: int, overlap: int) -> list[tuple[int, int]]:
+    """Window ranges as produced by the original list-based implementation."""
+    step = window_size - overlap
+    return [
+        (docs[i].metadata["no"], docs[i : i + window_size][-1].metadata["no"])
+        for i in range(0, len(docs), step)
+    ]
+
+
+def test_streaming_windows_match_list_based_windows() -> None:
+    """Test that streaming yields the same windows as slicing the full list."""
+    for count in (0, 1, 7, 10, 23, 50):
+        docs = [_res(no) for no in range(1, count + 1)]
+        for window_size, overlap in ((5, 2), (4, 0), (10, 9)):
+            chunker = SlidingWindowChunker(window_size=window_size, overlap=overlap)
+
+            windows = list(chunker.iter_windows(iter(docs)))
+
+            assert [(w.metadata["start_no"], w.metadata["end_no"]) for w in windows] == (
+                _eager_windows(docs, window_size, overlap)
+            )
+
+
+def test_incremental_windows_replace_only_trailing_windows() -> None:
+    """Test that appending posts re-streams only the windows they can change."""
+    chunker = SlidingWindowChunker(window_size=5, overlap=2)
+    old = list(chunker.iter_windows(_res(no) for no in range(1, 13)))
+
+    resume = chunker.resume_from(w.metadata for w in old)
+    assert resume is not None
+    resume_no, stale = resume
+    kept = [w for w in old if w.metadata["source"] not in stale]
+    fresh = list(chunker.iter_windows(_res(no) for no in range(resume_no, 21)))
+    full = list(chunker.iter_windows(_res(no) for no in range(1, 21)))
+
+    assert resume_no == 10
+    assert [w.metadata for w in kept + fresh] == [w.metadata for w in full]
+
+
+def test_covering_windows_where_merges_consecutive_posts() -> None:
+    """Test that runs of post numbers become one window-overlap range each."""
+    assert covering_windows_where([4, 3, 9]) == {
+        "$or": [
+            {"$and": [{"start_no": {"$lte": 4}}, {"end_no": {"$gte": 3}}]},
+            {"$and": [{"start_no": {"$lte": 9}}, {"end_no": {"$gte": 9}}]},
+        ]
+    }
+    assert covering_windows_where([]) is None
+
+
+def test_stored_embeddings_resolve_posts_through_micro_windows() -> None:
+    """Test that pruning and temporal rerank find vectors in a micro-window index."""
+    posts = [make_post(no, minutes=no) for no in range(1, 5)]
+    with patch("app.rag.chunking.count_tokens", side_effect=count_chars):
+        windows = list(MicroWindowChunker(max_posts=2).chunk(posts))
+    chain = GraphRAGChain.__new__(GraphRAGChain)
+    chain._vectorstore = MagicMock()
+    chain._vectorstore.get.return_value = {
+        "metadatas": [w.metadata for w in windows],
+        "embeddings": [[1.0, 0.0], [0.0, 1.0]],
+    }
+
+    async def post_numbers(function: object, *args: object) -> dict[UUID, int]:
+        return {id_of(posts[1]): 2, id_of(posts[2]): 3}
+
+    wanted = [id_of(posts[1]), id_of(posts[2])]
+    with (
+        patch.object(chain, "_in_db", post_numbers),
+        patch.object(settings, "index_chunking", "micro"),
+    ):
+        # The pruner passes post numbers; the temporal path looks them up
+        pruning = asyncio.run(chain._stored_embeddings(wanted, [2, 3]))
+        temporal = asyncio.run(chain._stored_embeddings(wanted))
+
+    assert pruning == temporal == {posts[1].post_id: [1.0, 0.0], posts[2].post_id: [0.0, 1.0]}
+    assert chain._vectorstore.get.call_args.kwargs["where"] == covering_windows_where([2, 3])
+
+
+def test_stored_embeddings_average_overlapping_sliding_windows() -> None:
+    """Test that pruning finds vectors in a sliding-window index."""
+    posts = [make_post(no) for no in (2, 5)]
+    chain = GraphRAGChain.__new__(GraphRAGChain)
+    chain._vectorstore = MagicMock()
+    chain._vectorstore.get.return_value = {
+        "metadatas": [
+            {"start_no": 1, "end_no": 5, "post_count": 5, "source": "window_1_5"},
+            {"start_no": 4, "end_no": 8, "post_count": 5, "source": "window_4_8"},
+        ],
+        "embeddings": [[1.0, 0.0], [0.0, 1.0]],
+    }
+
+    with patch.object(settings, "index_chunking", "window"):
+        embeddings = asyncio.run(chain._stored_embeddings([id_of(p) for p in posts], [2, 5]))
+
+    assert embeddings == {posts[0].post_id: [1.0, 0.0], posts[1].post_id: [0.5, 0.5]}
+    assert chain._vectorstore.get.call_args.kwargs["where"] == covering_windows_where([2, 5])
+
+
+def test_rechunk_spans_cover_whole_windows_of_edited_posts() -> None:
+    """Test that edited posts are re-chunked together with their windows' other posts."""
+    windows = [
+        {"start_no": 1, "end_no": 4},
+        {"start_no": 5, "end_no": 8},
+        {"start_no": 20, "end_no": 22},
+    ]
+
+    # No.9 was in no window (e.g. it stopped being a near-duplicate)
+    assert rechunk_spans(windows, [2, 6, 9, 21, 22]) == [(1, 4), (5, 8), (9, 9), (20, 22)]
@@ -0,0 +1,43 @@
+"""Test local citation resolution."""
+
+from langchain_core.documents import Document
+
+from app.rag.citations import CitationScanner, find_post_numbers, resolve_citations
+
+
+def test_find_post_numbers_dedupes_in_order() -> None:
+    """Test that cited numbers are returned once each in order of appearance."""
+    answer = "No.12 と No.5 によると…（No.12 も参照）"
+
+    assert find_post_numbers(answer) == [12, 5]
+
+
+def test_resolve_citations_from_window_documents() -> None:
+    """Test that cited posts are read from retrieved windows without a DB query."""
+    window = Document(
+        page_content=(
+            "No.10 名前：名無し 投稿日：2024-01-01T00:00:00\nこんにちは"
+            "\n\n---\n\n"
+            "No.11 名前：太郎 投稿日：2024-01-01T00:01:00\n今日は\n晴れ"
+        ),
+        metadata={"start_no": 10, "end_no": 11},
+    )
+
+    citations = resolve_citations("No.11 が答えです", [window])
+
+    assert len(citations) == 1
+    assert citations[0].no == 11
+    assert citations[0].name_and_trip == "太郎"
+    assert citations[0].datetime == "2024-01-01T00:01:00"
+    assert citations[0].content == "今日は\n晴れ"
+
+
+def test_citation_scanner_waits_for_complete_numbers() -> None:
+    """Test that references split across tokens are reported once complete."""
+    scanner = CitationScanner()
+
+    assert scanner.feed("詳しくはNo") == []
+    assert scanner.feed(".12") == []
+    assert scanner.feed("3を参照。No.5") == [123]
+    assert scanner.feed("、No.123") == [5]
+    assert scanner.flush() == []
@@ -0,0 +1,73 @@
+"""Test token-budget-aware context assembly."""
+
+from unittest.mock import patch
+
+from app.models.graph import Relationship
+from app.rag.context_builder import ContextBuilder, format_post
+from tests.conftest import count_chars, make_post
+
+
+def test_build_drops_sequential_relationship_lines() -> None:
+    """Test that only relationships not implied by post order are listed."""
+    first, second = make_post(1), make_post(2)
+    context_data = {
+        "posts": [first, second],
+        "relationships": [
+            Relationship(
+                source_node_id=first.post_id,
+                target_node_id=second.post_id,
+                relationship_type="IS_SEQUENTIAL_TO",
+            ),
+            Relationship(
+                source_node_id=second.post_id,
+                target_node_id=first.post_id,
+                relationship_type="IS_REPLY_TO",
+            ),
+        ],
+    }
+
+    with patch("app.rag.context_builder.count_tokens", side_effect=count_chars):
+        context, tokens = ContextBuilder().build(context_data)
+
+    assert "IS_SEQUENTIAL_TO" not in context
+    assert "- No.2 IS_REPLY_TO No.1" in context
+    assert context.index("No.1 名前") < context.index("No.2 名前")
+    assert tokens == len(context)
+
+
+def test_build_trims_lowest_scored_posts_to_budget() -> None:
+    """Test that the highest-scoring posts are kept when the budget is tight."""
+    posts = [make_post(no) for no in range(1, 6)]
+    scores = {p.post_id: float(p.source_post_no) for p in posts}
+    budget = 120 + 2 * len(format_post(posts[0]) + "\n---\n")
+
+    with patch("app.rag.context_builder.count_tokens", side_effect=count_chars):
+        context, tokens = ContextBuilder(token_budget=budget).build(
+            {"posts": posts, "relationships": [], "scores": scores}
+        )
+
+    assert "No.4 名前" in context and "No.5 名前" in context
+    assert "No.3 名前" not in context
+    assert tokens <= budget
+
+
+def test_build_reuses_token_counts_from_selection() -> None:
+    """Test that posts counted during selection are not tokenized again."""
+    posts = [make_post(no) for no in range(1, 4)]
+    scores = {p.post_id: float(p.source_post_no) for p in posts}
+    post_tokens = {p.post_id: 1000 if p.source_post_no == 3 else 1 for p in posts}
+    counted: list[str] = []
+
+    def count(text: str, model: object = None) -> int:
+        counted.append(text)
+        return len(text)
+
+    with patch("app.rag.context_builder.count_tokens", side_effect=count):
+        context, _ = ContextBuilder(token_budget=500).build(
+            {"posts": posts, "relationships": [], "scores": scores, "post_tokens": post_tokens}
+        )
+
+    # No.3 is dropped on its recorded count although its text would fit
+    assert "No.3 名前" not in context
+    assert "No.1 名前" in context and "No.2 名前" in context
+    assert not any(format_post(p) in counted for p in posts)
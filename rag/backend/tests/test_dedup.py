@@ -0,0 +1,28 @@
+"""Test near-duplicate detection."""
+
+from app.sync.dedup import SimHashIndex, simhash, to_signed, to_unsigned
+
+COPYPASTA = "今北産業。誰か三行でまとめてくれ。スレの流れが速すぎて追えない。" * 3
+
+
+def test_simhash_is_close_for_near_duplicates() -> None:
+    """Test that small edits keep signatures within a few bits."""
+    original = simhash(COPYPASTA)
+    edited = simhash(COPYPASTA + "！")
+    unrelated = simhash("ラーメンは醤油か味噌か、それが問題だ。豚骨も捨てがたい。")
+
+    assert (original ^ edited).bit_count() <= 3
+    assert (original ^ unrelated).bit_count() > 3
+    assert simhash("草") == simhash(" 草 ")
+    assert to_unsigned(to_signed(original)) == original
+
+
+def test_index_assigns_duplicates_to_first_representative() -> None:
+    """Test that the first post of a cluster becomes its representative."""
+    index = SimHashIndex(max_distance=3)
+
+    assert index.assign(1, simhash(COPYPASTA)) is None
+    assert index.assign(2, simhash("まったく別の話題です。")) is None
+    assert index.assign(3, simhash(COPYPASTA + "！")) == 1
+    assert index.assign(4, simhash(COPYPASTA)) == 1
+    assert index.size == 2
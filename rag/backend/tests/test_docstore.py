@@ -0,0 +1,55 @@
+"""Test the SQLite parent-document store."""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from app.rag.docstore import SQLiteByteStore
+
+
+def test_batched_get_set_delete(tmp_path: Path) -> None:
+    """Test that values round-trip through the compressed store."""
+    store = SQLiteByteStore(tmp_path / "docstore.sqlite3")
+    value = "No.1 名前：名無し\nテスト".encode() * 100
+
+    store.mset([("window_1", value), ("window_2", b"short"), ("other", b"x")])
+
+    assert store.mget(["window_2", "missing", "window_1"]) == [b"short", None, value]
+    assert list(store.yield_keys(prefix="window_")) == ["window_1", "window_2"]
+
+    store.mdelete(["window_1"])
+
+    assert store.mget(["window_1"]) == [None]
+    assert list(store.yield_keys()) == ["other", "window_2"]
+    assert (tmp_path / "docstore.sqlite3").stat().st_size < len(value) * 10
+
+
+def test_zlib_fallback_reads_alongside_zstd(tmp_path: Path) -> None:
+    """Test that values written without zstandard stay readable."""
+    path = tmp_path / "docstore.sqlite3"
+    with patch("app.rag.docstore.zstandard", None):
+        SQLiteByteStore(path).mset([("a", b"zlib value")])
+
+    store = SQLiteByteStore(path)
+    store.mset([("b", b"default value")])
+
+    assert store.mget(["a", "b"]) == [b"zlib value", b"default value"]
+
+
+def test_concurrent_get_and_set_round_trip(tmp_path: Path) -> None:
+    """Test that executor threads can compress and decompress at the same time."""
+    store = SQLiteByteStore(tmp_path / "docstore.sqlite3")
+
+    def work(worker: int) -> None:
+        for i in range(50):
+            pairs = [
+                (f"w{worker}_{i}_{j}", f"{worker}-{i}-{j} レス".encode() * 200) for j in range(5)
+            ]
+            store.mset(pairs)
+            assert store.mget([key for key, _ in pairs]) == [value for _, value in pairs]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [executor.submit(work, worker) for worker in range(8)]:
+            future.result()
+
+    assert len(list(store.yield_keys())) == 8 * 50 * 5
@@ -0,0 +1,73 @@
+"""Test search filter pushdown."""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.graph import Post
+from app.rag.filters import chroma_where, filter_post_ids, filter_posts, post_metadata
+from app.rag.schemas import SearchFilters
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+def test_chroma_where_uses_numeric_ranges() -> None:
+    """Test that filters become range predicates on numeric metadata."""
+    since = datetime(2024, 1, 1, tzinfo=JST)
+    where = chroma_where(SearchFilters(post_no_from=100, post_no_to=200, since=since))
+
+    assert where == {
+        "$and": [
+            {"source_post_no": {"$gte": 100}},
+            {"source_post_no": {"$lte": 200}},
+            {"timestamp_epoch": {"$gte": int(since.timestamp())}},
+        ]
+    }
+    assert chroma_where(SearchFilters(author="名無し")) == {"author": {"$eq": "名無し"}}
+    assert chroma_where(SearchFilters()) is None
+    assert chroma_where(None) is None
+
+
+def test_post_metadata_matches_filter_fields() -> None:
+    """Test that indexed metadata carries every field the filters use."""
+    post = Post(
+        post_id=uuid4(),
+        source_post_no=7,
+        content="テスト",
+        author=None,
+        timestamp=datetime(2024, 1, 1, tzinfo=JST),
+    )
+
+    metadata = post_metadata(post)
+
+    assert metadata["timestamp_epoch"] == int(post.timestamp.timestamp())
+    assert metadata["author"] == "名無し"
+    assert metadata["source_post_no"] == 7
+
+
+def test_filter_posts_adds_sql_predicates() -> None:
+    """Test that the SQL branches receive the same filters."""
+    query = filter_posts(select(Post.post_id), SearchFilters(post_no_from=10, author="名無し"))
+    sql = str(query)
+
+    assert "posts.source_post_no >=" in sql
+    assert "posts.author IS NULL" in sql
+
+
+def test_micro_index_filters_authors_on_member_posts() -> None:
+    """Test that micro-windows, which have no author, are filtered per member post."""
+    keep, drop = uuid4(), uuid4()
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value = [keep]
+
+    with patch.object(settings, "index_chunking", "micro"):
+        where = chroma_where(SearchFilters(post_no_from=5, author="名無し"))
+    kept = filter_post_ids(session, [drop, keep], SearchFilters(author="名無し"))
+
+    assert where == {"source_post_no": {"$gte": 5}}
+    assert kept == [keep]
+    assert "posts.author IS NULL" in str(session.execute.call_args.args[0])
@@ -0,0 +1,102 @@
+"""Test the in-process graph index."""
+
+from unittest.mock import MagicMock
+from uuid import UUID, uuid4
+
+from app.rag.graph_index import GraphIndex, _Snapshot
+
+
+def _chain_snapshot(length: int) -> tuple[_Snapshot, list[UUID]]:
+    """Build a snapshot with posts linked one after another."""
+    post_ids = [uuid4() for _ in range(length)]
+    posts = [(post_id, no + 1) for no, post_id in enumerate(post_ids)]
+    edges = [(a, b, "IS_SEQUENTIAL_TO") for a, b in zip(post_ids, post_ids[1:])]
+    return GraphIndex._extend(_Snapshot(), posts, edges), post_ids
+
+
+def test_traverse_respects_depth() -> None:
+    """Test that BFS stops at the maximum depth in both directions."""
+    index = GraphIndex()
+    index._snapshot, post_ids = _chain_snapshot(10)
+
+    reached = index.traverse([post_ids[5]], max_depth=2)
+
+    assert reached == {
+        post_ids[3]: 2,
+        post_ids[4]: 1,
+        post_ids[5]: 0,
+        post_ids[6]: 1,
+        post_ids[7]: 2,
+    }
+
+
+def test_traverse_filters_relationship_types() -> None:
+    """Test that only the requested relationship types are followed."""
+    index = GraphIndex()
+    index._snapshot, post_ids = _chain_snapshot(3)
+
+    assert index.traverse([post_ids[0]], ["IS_REPLY_TO"]) == {post_ids[0]: 0}
+
+
+def test_incremental_extend() -> None:
+    """Test that appended posts and edges are reachable after an extend."""
+    index = GraphIndex()
+    snapshot, post_ids = _chain_snapshot(3)
+    new_id = uuid4()
+    index._snapshot = GraphIndex._extend(
+        snapshot, [(new_id, 4)], [(post_ids[2], new_id, "IS_REPLY_TO")]
+    )
+
+    assert index.high_water_mark == 4
+    assert index.traverse([post_ids[0]], max_depth=3)[new_id] == 3
+    assert index.memory_stats()["edges"] == 3
+
+
+def test_traverse_implicit_sequential_window() -> None:
+    """Test that sequential neighbours are derived from post numbers."""
+    post_ids = [uuid4() for _ in range(10)]
+    index = GraphIndex()
+    index._snapshot = GraphIndex._extend(
+        _Snapshot(), [(post_id, no * 2) for no, post_id in enumerate(post_ids)], []
+    )
+
+    reached = index.traverse([post_ids[5]], max_depth=2, sequential_window=2)
+
+    assert reached == {
+        post_ids[3]: 2,
+        post_ids[4]: 1,
+        post_ids[5]: 0,
+        post_ids[6]: 1,
+        post_ids[7]: 2,
+    }
+
+
+def test_refresh_selects_new_edges_by_node_id() -> None:
+    """Test that a refresh fetches edges through the new post IDs, not a join."""
+    index = GraphIndex()
+    index._snapshot, post_ids = _chain_snapshot(3)
+    new_id = uuid4()
+    session = MagicMock()
+    session.execute.return_value.all.return_value = [(new_id, 4)]
+    session.execute.return_value.__iter__.return_value = iter(
+        [(post_ids[2], new_id, "IS_REPLY_TO")]
+    )
+
+    assert index.refresh(session) == 1
+
+    statement, params = session.execute.call_args.args
+    assert "ANY(:ids)" in str(statement)
+    assert "JOIN" not in str(statement)
+    assert params == {"ids": [new_id]}
+    assert index.traverse([post_ids[0]], ["IS_REPLY_TO", "IS_SEQUENTIAL_TO"])[new_id] == 3
+
+
+def test_traverse_each_matches_separate_traversals() -> None:
+    """Test that searches sharing a depth buffer do not leak into each other."""
+    index = GraphIndex()
+    index._snapshot, post_ids = _chain_snapshot(10)
+    seeds = [post_ids[1], post_ids[8], post_ids[2]]
+
+    reached = index.traverse_each(seeds, max_depth=2)
+
+    assert reached == {seed: index.traverse([seed], max_depth=2) for seed in seeds}
@@ -0,0 +1,46 @@
+"""Test scored context expansion in the graph traverser."""
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from app.models.graph import Post
+from app.rag.graph_traversal import GraphTraverser
+from tests.conftest import id_of, make_post
+
+
+def _session(posts: list[Post]) -> MagicMock:
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value = posts
+    return session
+
+
+def test_score_candidates_decays_with_distance_and_rank() -> None:
+    """Test that closer posts and higher-ranked seeds score higher."""
+    traverser = GraphTraverser(decay=0.5)
+    seed_a, seed_b, near, far = uuid4(), uuid4(), uuid4(), uuid4()
+
+    scores = traverser.score_candidates(
+        [seed_a, seed_b],
+        {
+            seed_a: {seed_a: 0.0, near: 1.0, far: 3.0},
+            seed_b: {seed_b: 0.0, near: 2.0},
+        },
+    )
+
+    assert scores[seed_a] == 1.0
+    assert scores[seed_b] == 0.5
+    assert scores[near] == 0.5 + 0.5 * 0.25
+    assert scores[far] == 0.125
+
+
+def test_select_posts_fills_budget_by_score() -> None:
+    """Test that the token budget keeps the best posts, not the oldest."""
+    old, hit, neighbour = make_post(1), make_post(50), make_post(51)
+    scores = {id_of(old): 0.1, id_of(hit): 1.0, id_of(neighbour): 0.5}
+    traverser = GraphTraverser(token_budget=20)
+
+    with patch("app.rag.context_builder.count_tokens", return_value=10):
+        posts, post_tokens = traverser.select_posts(_session([old, hit, neighbour]), scores)
+
+    assert [p.source_post_no for p in posts] == [50, 51]
+    assert post_tokens == {id_of(hit): 10, id_of(neighbour): 10}
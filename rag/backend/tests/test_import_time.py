@@ -0,0 +1,30 @@
+"""Test that the app and the CLI scripts import without the RAG stack."""
+
+import pytest
+
+from app.core.importtime import measure_import
+
+# Packages only the question-answering path may load
+RAG_STACK = ("langchain", "langchain_core", "langchain_openai", "langchain_chroma", "langgraph")
+
+# Import time budgets are checked by `make import-time`, not here: wall-clock
+# measurements are flaky on loaded CI machines
+LIGHTWEIGHT_TARGETS = (
+    "app.main",
+    "scripts.add_dedup_columns",
+    "scripts.add_timestamp_index",
+    "scripts.add_updated_at_column",
+    "scripts.clear_rag_db",
+    "scripts.init_rag_db",
+    "scripts.prune_sequential_relationships",
+    "scripts.sync_data",
+)
+
+
+@pytest.mark.parametrize("target", LIGHTWEIGHT_TARGETS)
+def test_import_skips_rag_stack(target: str) -> None:
+    """Test that the app and lightweight scripts do not load the RAG stack."""
+    profile = measure_import(target)
+
+    loaded = [package for package in RAG_STACK if profile.loaded(package)]
+    assert not loaded, f"{target} imports {loaded}"
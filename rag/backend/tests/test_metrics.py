@@ -0,0 +1,68 @@
+"""Test the in-process metrics registry."""
+
+import asyncio
+
+from app.core.metrics import Counter, Gauge, Histogram, Registry, time_async
+
+
+def test_counter_tracks_label_values_separately() -> None:
+    """Test that increments are keyed by their label values."""
+    counter = Counter("test_paths_total", "Test counter", ("path",))
+
+    counter.inc(path="post_number")
+    counter.inc(path="retrieval")
+    counter.inc(2, path="retrieval")
+
+    assert counter.snapshot() == {("post_number",): 1.0, ("retrieval",): 3.0}
+
+
+def test_histogram_snapshot() -> None:
+    """Test that the histogram records count and sum."""
+    histogram = Histogram("test_tokens", "Test histogram", (10, 100))
+
+    histogram.observe(5)
+    histogram.observe(500)
+
+    assert histogram.snapshot() == {"count": 2, "sum": 505.0}
+
+
+def test_registry_renders_prometheus_text() -> None:
+    """Test the exposition format of labelled histograms and gauges."""
+    registry = Registry()
+    histogram = Histogram("test_seconds", "Test latency", (0.1, 1), ("node",), registry=registry)
+    gauge = Gauge("test_connections", "Test gauge", ("state",), registry=registry)
+
+    histogram.observe(0.05, node="query_analyzer")
+    histogram.observe(2, node="query_analyzer")
+    gauge.set(3, state="idle")
+
+    assert registry.render().splitlines() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{node="query_analyzer",le="0.1"} 1',
+        'test_seconds_bucket{node="query_analyzer",le="1"} 1',
+        'test_seconds_bucket{node="query_analyzer",le="+Inf"} 2',
+        'test_seconds_sum{node="query_analyzer"} 2.05',
+        'test_seconds_count{node="query_analyzer"} 2',
+        "# HELP test_connections Test gauge",
+        "# TYPE test_connections gauge",
+        'test_connections{state="idle"} 3',
+    ]
+
+
+def test_disabled_registry_records_nothing() -> None:
+    """Test that updates and timing wrappers are no-ops when disabled."""
+    registry = Registry(enabled=False)
+    histogram = Histogram("test_seconds", "Test latency", (1,), registry=registry)
+    counter = Counter("test_total", "Test counter", registry=registry)
+
+    async def node() -> int:
+        return 1
+
+    assert time_async(histogram, node) is node
+    assert asyncio.run(node()) == 1
+    histogram.observe(0.5)
+    counter.inc()
+
+    assert histogram.snapshot() == {"count": 0, "sum": 0.0}
+    assert counter.snapshot() == {}
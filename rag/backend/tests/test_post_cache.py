@@ -0,0 +1,65 @@
+"""Test the hot-post cache."""
+
+from datetime import datetime
+from typing import Optional
+from unittest.mock import MagicMock
+
+from app.models.graph import Post
+from app.rag.post_cache import PostCache
+from tests.conftest import make_post
+
+
+def _session(posts: list[Post], stored: Optional[list[Post]] = None) -> MagicMock:
+    """Session loading ``posts`` and reporting ``stored`` (default: posts) as current."""
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value = posts
+    session.execute.return_value.all.return_value = [
+        (post.source_post_no, post.updated_at) for post in (posts if stored is None else stored)
+    ]
+    return session
+
+
+def test_get_many_loads_only_misses_in_one_query() -> None:
+    """Test that misses share one query and cached posts only get a freshness check."""
+    cache = PostCache(max_size=10)
+    session = _session([make_post(1), make_post(2)])
+    assert set(cache.get_many(session, [1, 2, 3])) == {1, 2}
+    assert session.execute.call_count == 1
+
+    session = _session([], stored=[make_post(1), make_post(2)])
+    records = cache.get_many(session, [2, 1])
+    assert records[1].content == "レス1"
+    assert records[2].text.startswith("No.2 名前：名無し")
+    assert session.execute.call_count == 1
+    session.execute.return_value.scalars.assert_not_called()
+
+
+def test_get_many_reloads_posts_edited_elsewhere() -> None:
+    """Test that a post edited by another process is served fresh before the TTL."""
+    cache = PostCache(max_size=10, ttl=300.0)
+    original = make_post(1, "元の本文", updated_at=datetime(2024, 1, 1, 12, 0))
+    cache.get_many(_session([original]), [1])
+
+    edited = make_post(1, "編集後の本文", updated_at=datetime(2024, 1, 1, 12, 5))
+    assert cache.get_many(_session([edited]), [1])[1].content == "編集後の本文"
+
+    # A deleted post is dropped instead of being served from the cache
+    assert cache.get_many(_session([], stored=[]), [1]) == {}
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recent_and_expired_posts() -> None:
+    """Test LRU eviction, expiry and explicit invalidation."""
+    now = [0.0]
+    cache = PostCache(max_size=2, ttl=10.0, clock=lambda: now[0])
+    posts = {no: make_post(no) for no in (1, 2, 3)}
+    cache.get_many(_session([posts[1], posts[2]]), [1, 2])
+    cache.get_many(_session([], stored=[posts[1]]), [1])
+    cache.get_many(_session([posts[3]]), [3])
+    assert cache.get_many(_session([], stored=list(posts.values())), [1, 2, 3]).keys() == {1, 3}
+
+    cache.invalidate([1])
+    assert cache.get_many(_session([], stored=list(posts.values())), [1, 3]).keys() == {3}
+
+    now[0] = 10.0
+    assert cache.get_many(_session([]), [3]) == {}
@@ -0,0 +1,42 @@
+"""Test the on-demand sampling profiler."""
+
+import threading
+import time
+
+import pytest
+
+from app.core.profiling import ProfilerBusy, sampling_profile
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_collapses_busy_thread_stacks() -> None:
+    """Test that a busy thread shows up as a collapsed stack with a count."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="busy")
+    with sampling_profile(interval=0.001) as profiler:
+        worker.start()
+        time.sleep(0.1)
+        stop.set()
+        worker.join()
+
+    lines = profiler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_spin (tests/test_profiling.py:11)" in stack.split(";")
+    assert profiler.sample_count > 0
+
+
+def test_only_one_profile_runs_at_a_time() -> None:
+    """Test that a second profile is refused while one is running."""
+    with sampling_profile():
+        with pytest.raises(ProfilerBusy):
+            with sampling_profile():
+                pass
+    with sampling_profile():
+        pass
@@ -0,0 +1,36 @@
+"""Test embedding-based pruning of expanded posts."""
+
+from uuid import uuid4
+
+from app.rag.pruning import prune_posts, rank_by_similarity
+from tests.conftest import id_of, make_post
+
+
+def test_prune_keeps_top_posts_and_neighbours() -> None:
+    """Test that the most similar post survives with its sequential neighbours."""
+    posts = [make_post(no) for no in range(1, 11)]
+    embeddings = {id_of(p): [0.0, 1.0] for p in posts}
+    embeddings[id_of(posts[6])] = [1.0, 0.0]
+
+    kept = prune_posts(posts, embeddings, [1.0, 0.0], top_n=1, neighbor_window=1)
+
+    assert [p.source_post_no for p in kept] == [6, 7, 8]
+
+
+def test_prune_is_noop_below_top_n() -> None:
+    """Test that small contexts are left untouched."""
+    posts = [make_post(2), make_post(1)]
+
+    kept = prune_posts(posts, {}, [1.0, 0.0], top_n=5)
+
+    assert [p.source_post_no for p in kept] == [1, 2]
+
+
+def test_rank_by_similarity_puts_unscored_posts_last() -> None:
+    """Test that candidates are ordered by similarity to the question."""
+    near, far, unscored = uuid4(), uuid4(), uuid4()
+    embeddings = {near: [1.0, 0.1], far: [0.0, 1.0]}
+
+    ranked = rank_by_similarity([unscored, far, near], embeddings, [1.0, 0.0])
+
+    assert ranked == [near, far, unscored]
@@ -0,0 +1,77 @@
+"""Test retrieval branch helpers and rank fusion."""
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.rag.retrieval import (
+    escape_like,
+    extract_keywords,
+    extract_post_numbers,
+    lexical_search,
+    reciprocal_rank_fusion,
+)
+
+
+def test_extract_question_signals() -> None:
+    """Test that post references and keywords are recognised."""
+    question = "No.12と>>15について教えて。ラーメン情報は？"
+
+    assert extract_post_numbers(question) == [12, 15]
+    assert "ラーメン" in extract_keywords(question)
+    assert "12" not in extract_keywords(question)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    """Test that posts found by several branches outrank single-branch hits."""
+    shared, vector_only, lexical_only = uuid4(), uuid4(), uuid4()
+
+    fused = reciprocal_rank_fusion(
+        {"vector": [vector_only, shared], "lexical": [lexical_only, shared], "post_number": []},
+        limit=2,
+    )
+
+    assert fused[0] == shared
+    assert len(fused) == 2
+
+
+def test_lexical_search_escapes_wildcards_and_skips_short_terms() -> None:
+    """Test that terms match literally and single characters are not searched."""
+    assert escape_like("100%_a\\b") == "100\\%\\_a\\\\b"
+
+    session = MagicMock()
+    session.execute.return_value.all.return_value = []
+    assert lexical_search(session, ["猫"], limit=5) == []
+    session.execute.assert_not_called()
+
+    lexical_search(session, ["100%", "猫"], limit=5)
+    query = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert "ESCAPE" in str(query)
+    assert "%100\\%%" in query.params.values()
+
+
+def test_lexical_search_handles_two_kanji_keywords() -> None:
+    """Test that typical 2-kanji keywords are searched with a bounded scan."""
+    keywords = extract_keywords("野球の話題について教えて")
+    assert keywords == ["野球", "話題"]
+
+    session = MagicMock()
+    session.execute.return_value.all.return_value = []
+    lexical_search(session, keywords, limit=5)
+    query = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert {"%野球%", "%話題%"} <= set(query.params.values())
+    assert "max(posts.source_post_no)" in str(query)
+
+    # Longer terms are served by the trigram index, so short ones are dropped
+    lexical_search(session, ["野球", "ホームラン"], limit=5)
+    query = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert "%野球%" not in query.params.values()
+    assert "max(posts.source_post_no)" not in str(query)
+
+    with patch.object(settings, "lexical_bigram_index", True):
+        lexical_search(session, ["野球", "ホームラン"], limit=5)
+    query = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert {"%野球%", "%ホームラン%"} <= set(query.params.values())
+    assert "ILIKE" not in str(query)
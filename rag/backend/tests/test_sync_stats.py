@@ -0,0 +1,81 @@
+"""Test the precomputed index statistics kept by the sync pipeline."""
+
+from datetime import datetime, timezone
+from typing import Optional
+from unittest.mock import MagicMock
+
+from app.models.graph import IndexStats
+from app.sync.stats import STATS_ID, record_sync_batch, stats_payload
+
+
+def _sessions(stats: Optional[IndexStats], source_max: int = 120) -> tuple[MagicMock, MagicMock]:
+    rag_session = MagicMock()
+    rag_session.get.return_value = stats
+    source_session = MagicMock()
+    source_session.execute.return_value.scalar.return_value = source_max
+    return rag_session, source_session
+
+
+def test_record_sync_batch_folds_batch_into_existing_row() -> None:
+    """Test that a batch updates counts and bounds without rescanning posts."""
+    stats = IndexStats(
+        id=STATS_ID,
+        total_posts=10,
+        min_post_no=1,
+        max_post_no=10,
+        last_batch_size=0,
+        last_batch_duration_ms=0,
+    )
+    rag_session, source_session = _sessions(stats)
+
+    assert record_sync_batch(rag_session, source_session, [11, 12, 13], 40) is stats
+
+    assert stats.total_posts == 13
+    assert stats.min_post_no == 1
+    assert stats.max_post_no == 13
+    assert stats.last_batch_size == 3
+    assert stats.last_batch_duration_ms == 40
+    assert stats.source_max_post_no == 120
+    rag_session.get.assert_called_once_with(IndexStats, STATS_ID, with_for_update=True)
+    rag_session.execute.assert_not_called()
+    payload = stats_payload(stats)
+    assert payload["index"]["total_posts"] == 13
+    assert payload["sync"]["lag_posts"] == 107
+
+
+def test_record_sync_batch_backfills_missing_row_once() -> None:
+    """Test that a missing row is built from the posts, already counting the batch."""
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rag_session, source_session = _sessions(None)
+    rag_session.execute.return_value.one.return_value = (3, 1, 3, created)
+
+    stats = record_sync_batch(rag_session, source_session, [2, 3], 15)
+
+    assert stats.total_posts == 3
+    assert stats.min_post_no == 1
+    assert stats.max_post_no == 3
+    assert stats.last_batch_size == 2
+    rag_session.add.assert_called_once_with(stats)
+
+
+def test_record_sync_batch_without_posts_only_records_check() -> None:
+    """Test that an empty batch keeps the last sync but refreshes the lag."""
+    last_sync = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    stats = IndexStats(
+        id=STATS_ID,
+        total_posts=5,
+        min_post_no=1,
+        max_post_no=5,
+        last_sync_at=last_sync,
+        last_batch_size=5,
+        last_batch_duration_ms=30,
+    )
+    rag_session, source_session = _sessions(stats, source_max=8)
+
+    record_sync_batch(rag_session, source_session, [], 0)
+
+    assert stats.total_posts == 5
+    assert stats.last_sync_at == last_sync
+    assert stats.last_batch_size == 5
+    assert stats.last_checked_at is not None
+    assert stats.source_max_post_no == 8
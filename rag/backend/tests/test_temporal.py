@@ -0,0 +1,91 @@
+"""Test parsing of Japanese time expressions."""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from app.rag.graphrag_chain import GraphRAGChain
+from app.rag.temporal import TimeRange, parse_time_range
+
+JST = ZoneInfo("Asia/Tokyo")
+NOW = datetime(2024, 3, 5, 15, 0, tzinfo=JST)
+
+
+def test_relative_day_expressions() -> None:
+    """Test that relative days map to ranges in the board time zone."""
+    yesterday = parse_time_range("昨日の話題は？", now=NOW, tz=JST)
+    this_morning = parse_time_range("今朝のスレの流れ", now=NOW, tz=JST)
+    days_ago = parse_time_range("３日前に何があった？", now=NOW, tz=JST)
+
+    assert yesterday == TimeRange(
+        datetime(2024, 3, 4, tzinfo=JST), datetime(2024, 3, 5, tzinfo=JST)
+    )
+    assert this_morning == TimeRange(
+        datetime(2024, 3, 5, 4, tzinfo=JST), datetime(2024, 3, 5, 12, tzinfo=JST)
+    )
+    assert days_ago == TimeRange(datetime(2024, 3, 2, tzinfo=JST), datetime(2024, 3, 3, tzinfo=JST))
+    assert parse_time_range("5時間以内", now=NOW, tz=JST) == TimeRange(
+        NOW - timedelta(hours=5), NOW
+    )
+
+
+def test_absolute_dates_and_latest() -> None:
+    """Test absolute dates, year rollover and open "latest" requests."""
+    assert parse_time_range("2024年1月2日の投稿", now=NOW, tz=JST) == TimeRange(
+        datetime(2024, 1, 2, tzinfo=JST), datetime(2024, 1, 3, tzinfo=JST)
+    )
+    assert parse_time_range("12月31日の話", now=NOW, tz=JST) == TimeRange(
+        datetime(2023, 12, 31, tzinfo=JST), datetime(2024, 1, 1, tzinfo=JST)
+    )
+    assert parse_time_range("最新の投稿", now=NOW, tz=JST) == TimeRange(latest=True)
+    assert parse_time_range("ラーメンの話", now=NOW, tz=JST) is None
+
+
+def test_latest_words_with_a_topic_are_not_temporal() -> None:
+    """Test that 最近/新しい next to a topic leave the question to normal retrieval."""
+    assert parse_time_range("最新の投稿を教えて", now=NOW, tz=JST) == TimeRange(latest=True)
+    assert parse_time_range("新しいiPhoneの話をしているレスは？", now=NOW, tz=JST) is None
+    assert parse_time_range("最近の猫の話題", now=NOW, tz=JST) is None
+
+
+def test_empty_time_range_falls_back_to_retrieval_branches() -> None:
+    """Test that a time range without posts is answered by the retrieval fan-out."""
+    hit = uuid4()
+    chain = GraphRAGChain.__new__(GraphRAGChain)
+
+    def node(**update: Any) -> Any:
+        async def run(state: dict[str, Any]) -> dict[str, Any]:
+            return update
+
+        return run
+
+    async def no_posts(function: Any, *args: Any) -> list[Any]:
+        return []
+
+    async def traverse(state: dict[str, Any]) -> dict[str, Any]:
+        return {"graph_context": {"seeds": state["vector_results"]}}
+
+    stubs = {
+        "_query_analyzer": node(query_path="temporal", time_range=TimeRange(start=NOW, end=NOW)),
+        "_vector_retriever": node(branch_results={"vector": [hit]}),
+        "_lexical_retriever": node(branch_results={"lexical": []}),
+        "_graph_traverser": traverse,
+        "_in_db": no_posts,
+    }
+    for name in ("post_pruner", "context_synthesizer", "response_generator", "citation_extractor"):
+        stubs[f"_{name}"] = node()
+    for name, stub in stubs.items():
+        setattr(chain, name, stub)
+
+    state: Any = {
+        "question": "昨日の話",
+        "filters": None,
+        "query_embedding": [],
+        "branch_results": {},
+    }
+    result = asyncio.run(chain._build_workflow().ainvoke(state))
+
+    assert result["query_path"] == "retrieval"
+    assert result["graph_context"]["seeds"] == [hit]
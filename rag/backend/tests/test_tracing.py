@@ -0,0 +1,67 @@
+"""Test request-scoped tracing."""
+
+import asyncio
+import json
+from pathlib import Path
+
+from app.core.tracing import JsonLinesExporter, Trace, Tracer, server_timing, span
+
+
+class _ListExporter:
+    def __init__(self) -> None:
+        self.traces: list[Trace] = []
+
+    def export(self, trace: Trace) -> None:
+        self.traces.append(trace)
+
+    def flush(self) -> None:
+        pass
+
+
+def test_spans_nest_across_tasks_and_threads() -> None:
+    """Test parent links through asyncio tasks and to_thread calls."""
+    exporter = _ListExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    def query() -> None:
+        with span("sql"):
+            pass
+
+    async def node() -> None:
+        with span("graph_traverser"):
+            await asyncio.to_thread(query)
+
+    async def request() -> None:
+        with tracer.trace("req-1", conversation_id="c1"):
+            await asyncio.create_task(node())
+
+    asyncio.run(request())
+
+    (trace,) = exporter.traces
+    assert trace.trace_id == "req-1"
+    assert trace.attributes == {"conversation_id": "c1"}
+    parent, child = trace.spans
+    assert (parent.name, parent.parent_id) == ("graph_traverser", None)
+    assert (child.name, child.parent_id) == ("sql", parent.span_id)
+    assert server_timing(trace).startswith("graph_traverser;dur=")
+
+
+def test_sampling_keeps_forced_and_slow_traces(tmp_path: Path) -> None:
+    """Test that unsampled traces are dropped unless forced or slow."""
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonLinesExporter(path)
+    tracer = Tracer(exporter, sample_rate=0.0, slow_seconds=60.0)
+
+    with tracer.trace("dropped"):
+        pass
+    with tracer.trace("forced", force=True):
+        with span("openai.chat"):
+            pass
+    tracer.slow_seconds = 0.0
+    with tracer.trace("slow"):
+        pass
+
+    exporter.flush()
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["trace_id"] for line in lines] == ["forced", "slow"]
+    assert lines[0]["spans"][0]["name"] == "openai.chat"
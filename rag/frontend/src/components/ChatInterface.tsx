@@ -76,6 +76,18 @@ export const ChatInterface: React.FC = () => {
                     break;
                   } else if (parsed.type === 'error') {
                     throw new Error(parsed.message);
+                  } else if (parsed.type === 'citation' && parsed.citation) {
+                    // Citation recognized while the answer is still streaming
+                    const cited: Citation = parsed.citation;
+                    if (!citations.some(c => c.source_post_no === cited.source_post_no)) {
+                      citations = [...citations, cited];
+                      const current = citations;
+                      setMessages(prev => {
+                        const newMessages = [...prev];
+                        newMessages[newMessages.length - 1].citations = current;
+                        return newMessages;
+                      });
+                    }
                   } else if (parsed.type === 'citations' && parsed.citations) {
                     // Received citations
                     citations = parsed.citations;